@@ -39,6 +39,9 @@ else:
     logger.error(f"❌ Directory src non trovata: {src_dir}")
     sys.exit(1)
 
+# Budget thread CPU condiviso da loop principale e server
+from src.utils.thread_budget import configure_thread_budget, get_thread_budget
+
 # App FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -71,6 +74,7 @@ def main_processing_loop():
     global main_loop_running, current_real_fps, last_preview_frame
 
     logger.info("🔄 Avviato loop principale con i TUOI moduli originali!")
+    get_thread_budget().pin_current_thread('compositing')
 
     frame_count = 0
     start_time = time.time()
@@ -102,7 +106,10 @@ def main_processing_loop():
 
             person_mask = ai_processor.process_frame(frame, output_size)
 
-            if person_mask is not None:
+            if person_mask is not None and ai_processor.is_idle():
+                # 💤 Nessuno in scena: sfondo sfocato in cache, aggiornato sui frame sonda
+                blurred_frame = effects_processor.apply_idle_blur(frame, refresh=not ai_processor.idle_skipped)
+            elif person_mask is not None:
                 blurred_frame = effects_processor.apply_background_blur(frame, person_mask)
             else:
                 blurred_frame = frame
@@ -140,6 +147,10 @@ def initialize_your_modules():
         config = StreamBlurConfig()
         logger.info("✅ TUA configurazione caricata")
         
+        # 🧵 Budget thread CPU: pool OpenCV, thread AI, affinity per stadio
+        thread_budget = configure_thread_budget(config)
+        logger.info(f"🧵 Budget thread applicato: {thread_budget.get_stats()['applied']}")
+        
         # Importa il TUO performance monitor
         from src.utils.performance import PerformanceMonitor
         performance_monitor = PerformanceMonitor()
@@ -184,10 +195,15 @@ async def health_check():
     
     all_loaded = all(modules_status.values())
     
+    # 🔥 Motore AI pronto per il real-time (modello scaldato e nel budget del frame)
+    ai_engine = ai_processor.get_readiness() if ai_processor and hasattr(ai_processor, 'get_readiness') else None
+    
     return {
         "status": "healthy" if all_loaded else "unhealthy",
         "message": "Bridge ai TUOI moduli originali con package support",
         "modules": modules_status,
+        "ai_engine": ai_engine,
+        "ready_for_realtime": bool(ai_engine and ai_engine.get('ready')),
         "using_your_src_folder": True,
         "src_path": str(src_dir)
     }
@@ -307,7 +323,8 @@ async def update_settings(settings: dict):
                 try:
                     # Usa il metodo del TUO EffectsProcessor
                     if hasattr(effects_processor, 'set_blur_intensity'):
-                        effects_processor.set_blur_intensity(int(value))
+                        # Float: il blur piramidale accetta intensità frazionarie
+                        effects_processor.set_blur_intensity(float(value))
                         # Log solo significativi (ogni 5 unità)
                         if int(value) % 5 == 0:
                             logger.info(f"🎛️ Blur intensity: {value}")
@@ -320,8 +337,21 @@ async def update_settings(settings: dict):
                 except Exception as e:
                     logger.error(f"❌ Errore aggiornamento blur intensity: {e}")
             
+            # 🖼️ SOSTITUZIONE SFONDO (immagine pre-scalata in cache, nessun decode sul frame loop)
+            if key in ["background_mode", "backgroundMode"] and effects_processor:
+                if hasattr(effects_processor, 'set_background_mode'):
+                    effects_processor.set_background_mode(str(value))
+                    logger.info(f"🖼️ Modalità sfondo: {value}")
+            
+            if key in ["background_image", "backgroundImage"] and effects_processor:
+                if hasattr(effects_processor, 'set_background_image'):
+                    if effects_processor.set_background_image(str(value)):
+                        logger.info(f"🖼️ Sfondo di sostituzione: {value}")
+                    else:
+                        logger.warning(f"⚠️ Sfondo non caricato: {value}")
+            
             # 🤖 PROPAGA AI SETTINGS AI TUOI MODULI
-            if key in ["ai_enabled", "performance_mode", "edgeSmoothing", "edge_smoothing", "temporalSmoothing", "temporal_smoothing"] and ai_processor:
+            if key in ["ai_enabled", "performance_mode", "edgeSmoothing", "edge_smoothing", "temporalSmoothing", "temporal_smoothing", "temporalStrength", "temporal_strength"] and ai_processor:
                 try:
                     # Performance Mode (solo se AI è già inizializzato)
                     if key in ["performance_mode", "performanceMode"]:
@@ -343,6 +373,12 @@ async def update_settings(settings: dict):
                             ai_processor.set_temporal_smoothing(bool(value))
                             logger.info(f"⏱️ Temporal smoothing aggiornato nel TUO AIProcessor: {value}")
                     
+                    # Temporal Strength
+                    elif key in ["temporalStrength", "temporal_strength"]:
+                        if hasattr(ai_processor, 'set_temporal_strength'):
+                            ai_processor.set_temporal_strength(float(value))
+                            logger.info(f"⏱️ Temporal strength aggiornata nel TUO AIProcessor: {value}")
+                    
                     # Generic AI settings
                     elif hasattr(ai_processor, key):
                         setattr(ai_processor, key, value)
@@ -351,7 +387,7 @@ async def update_settings(settings: dict):
                 except Exception as e:
                     logger.error(f"❌ Errore aggiornamento AI {key}: {e}")
             
-            # Quality level: low/medium/high — aggiorna modello AI e risoluzione
+            # Quality level: low/medium/high/auto — aggiorna modello AI e risoluzione
             if key == "quality" and ai_processor:
                 try:
                     if hasattr(ai_processor, 'update_quality') and hasattr(ai_processor, 'segmentation') and ai_processor.segmentation:
@@ -373,7 +409,7 @@ async def update_settings(settings: dict):
 # 🤖 AI SETTINGS UPDATE ENDPOINT
 @app.post("/api/ai-settings")
 async def update_ai_settings(settings: dict):
-    """Aggiorna specificamente le impostazioni AI"""
+    """Aggiorna specificamente le impostazioni AI (quality: low/medium/high/auto)"""
     logger.info(f"🤖 Aggiornamento AI settings: {settings}")
     
     try:
@@ -387,6 +423,8 @@ async def update_ai_settings(settings: dict):
             "status": "ai_settings_updated", 
             "settings": settings, 
             "quality_mode": settings.get('quality', 'unknown'),
+            "adaptive_quality": ai_processor.adaptive_quality.get_stats()
+                if ai_processor and getattr(ai_processor, 'adaptive_quality', None) else None,
             "propagated": True
         }
         
@@ -446,7 +484,16 @@ async def get_status():
             "fps": round(fps_value, 1),
             "cpu_usage": round(cpu_usage, 1), 
             "memory_usage": round(memory_usage_gb, 1),  # 📊 GB
-            "memory_mb": round(memory_usage_mb, 0)      # 📊 MB per logica condizionale
+            "memory_mb": round(memory_usage_mb, 0),     # 📊 MB per logica condizionale
+            # 🎚️ Decisione del controller qualità 'auto' (None se qualità manuale)
+            "adaptive_quality": ai_processor.adaptive_quality.get_stats()
+                if ai_processor and getattr(ai_processor, 'adaptive_quality', None) else None,
+            # 💤 Presenza: tempo in idle e CPU risparmiata (AI + blur in cache)
+            "presence": {**ai_processor.presence.get_stats(),
+                         "blur_saved_ms": round(effects_processor.idle_cpu_saved_ms, 1)}
+                if ai_processor and getattr(ai_processor, 'presence', None) and effects_processor else None,
+            # 🧵 Thread OpenCV/AI e core assegnati a ogni stadio
+            "thread_budget": get_thread_budget().get_stats()
         }
         
         return status_response
@@ -471,6 +518,7 @@ if __name__ == "__main__":
             "timeout_keep_alive": 5  # Timeout più breve per evitare connessioni stagnanti
         }
         
+        get_thread_budget().pin_current_thread('api')
         uvicorn.run(app, **config_server)
     else:
         logger.error("❌ Impossibile avviare - problemi con i TUOI moduli")
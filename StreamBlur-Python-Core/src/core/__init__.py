@@ -11,17 +11,20 @@ Contiene i moduli principali per l'elaborazione video
 try:
     from .camera import CameraManager
     from .ai_processor import AIProcessor
+    from .segmentation_service import SegmentationService
     from .effects import EffectsProcessor
     from .virtual_camera import VirtualCameraManager
 except ImportError:
     from camera import CameraManager
     from ai_processor import AIProcessor
+    from segmentation_service import SegmentationService
     from effects import EffectsProcessor
     from virtual_camera import VirtualCameraManager
 
 __all__ = [
     'CameraManager',
     'AIProcessor', 
+    'SegmentationService',
     'EffectsProcessor',
     'VirtualCameraManager'
 ]
\ No newline at end of file
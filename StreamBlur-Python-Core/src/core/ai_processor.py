@@ -4,21 +4,40 @@
 
 import cv2
 import numpy as np
-import mediapipe as mp
 import time
-from typing import Optional, Tuple
-from collections import deque
+from typing import Optional, Tuple, Dict
 
 from ..utils.config import StreamBlurConfig
 from ..utils.performance import PerformanceMonitor
+from ..utils.thread_budget import get_thread_budget
+from .segmentation_worker import SegmentationWorker
+from .segmentation_process import SharedMemorySegmenter
+from .segmentation_service import SegmentationService
+from .segmentation_backends import SegmentationBackend, SEGMENTATION_BACKENDS, create_backend, available_backends
+from .motion_gate import MotionGate
+from .presence_detector import PresenceDetector
+from .mask_propagation import FlowMaskPropagator
+from .roi_tracker import PersonROITracker
+from .guided_filter import FastGuidedFilter
+from .temporal_filter import TemporalMaskFilter
+from .model_pool import ModelPool
+from .quality_controller import AdaptiveQualityController, QUALITY_LADDER
+from .buffer_pool import BufferPool
+from .letterbox import LetterboxMapper
+from .hybrid_segmenter import HybridSegmenter
 
 class AIProcessor:
     """Processore AI per segmentazione persona/sfondo"""
     
-    def __init__(self, config: StreamBlurConfig, performance_monitor: PerformanceMonitor):
+    def __init__(self, config: StreamBlurConfig, performance_monitor: PerformanceMonitor,
+                 segmentation_service: Optional[SegmentationService] = None, stream_id: str = 'default'):
         self.config = config
         self.performance = performance_monitor
         
+        # Servizio condiviso tra più camere: il modello è unico, lo stato mask resta per stream
+        self.segmentation_service = segmentation_service
+        self.stream_id = stream_id
+        
         # Configurazione AI con conversione sicura
         ai_width = config.get('video.ai_width', 512)
         self.ai_width = ai_width if isinstance(ai_width, int) else 512
@@ -39,15 +58,218 @@ class AIProcessor:
         edge_kernel = config.get('performance.edge_kernel_size', 3)
         self.edge_kernel_size = edge_kernel if isinstance(edge_kernel, int) else 3
         
-        temporal_buffer = config.get('performance.temporal_buffer_size', 2)
-        self.temporal_buffer_size = temporal_buffer if isinstance(temporal_buffer, int) else 2
+        # Motore refinement bordi: 'guided' (guided filter O(1) guidato dal frame) o 'morphology'
+        refinement = config.get('effects.edge_refinement', 'morphology')
+        self.edge_refinement = refinement if refinement in ('guided', 'morphology') else 'morphology'
+        
+        guided_eps = config.get('effects.guided_eps', 0.001)
+        self.guided_eps = guided_eps if isinstance(guided_eps, (int, float)) else 0.001
+        
+        # Kernel e filtri precalcolati per (motore, edge_kernel_size, scala mask)
+        self._refinement_cache: Dict[tuple, object] = {}
         
-        # MediaPipe
-        self.mp_selfie_segmentation = None
+        # Backend di segmentazione (registro in segmentation_backends)
+        backend_name = config.get('ai.backend', 'mediapipe')
+        self.backend_name = backend_name if backend_name in SEGMENTATION_BACKENDS else 'mediapipe'
         self.segmentation = None
         
-        # Temporal smoothing buffer
-        self.mask_buffer = deque(maxlen=self.temporal_buffer_size)
+        # Pool modelli caldi: cambio modello/qualità senza stallo al confine di frame
+        preload_models = config.get('ai.preload_models', True)
+        self.preload_models = preload_models if isinstance(preload_models, bool) else True
+        self.model_pool: Optional[ModelPool] = None
+        
+        # Inferenze di warm-up su frame sintetico prima che un modello serva frame reali
+        warmup_iterations = config.get('ai.warmup_iterations', 3)
+        self.warmup_iterations = warmup_iterations if isinstance(warmup_iterations, int) else 3
+        
+        # Risoluzione AI richiesta (applicata al confine di frame insieme al modello, già scaldato)
+        self.requested_ai_size = (self.ai_width, self.ai_height)
+        
+        # Qualità 'auto': controller ad anello chiuso sul budget del frame
+        fps = config.get('video.fps', 30)
+        self.target_fps = fps if isinstance(fps, (int, float)) and fps > 0 else 30
+        
+        adaptive_high = config.get('ai.adaptive_high_ratio', 0.85)
+        self.adaptive_high_ratio = adaptive_high if isinstance(adaptive_high, (int, float)) else 0.85
+        
+        adaptive_low = config.get('ai.adaptive_low_ratio', 0.5)
+        self.adaptive_low_ratio = adaptive_low if isinstance(adaptive_low, (int, float)) else 0.5
+        
+        adaptive_cpu = config.get('ai.adaptive_cpu_high', 90.0)
+        self.adaptive_cpu_high = adaptive_cpu if isinstance(adaptive_cpu, (int, float)) else 90.0
+        
+        self.adaptive_quality: Optional[AdaptiveQualityController] = None
+        
+        # Modalità inferenza: 'inprocess' oppure 'subprocess' (shared memory, fuori dal GIL)
+        inference_mode = config.get('ai.inference_mode', 'inprocess')
+        self.inference_mode = inference_mode if inference_mode in ('inprocess', 'subprocess') else 'inprocess'
+        
+        ring_size = config.get('ai.shared_memory_ring_size', 3)
+        self.ring_size = ring_size if isinstance(ring_size, int) else 3
+        
+        # Temporal smoothing: EMA o one-euro su accumulatori preallocati
+        temporal_mode = config.get('effects.temporal_filter', 'ema')
+        temporal_mode = temporal_mode if temporal_mode in TemporalMaskFilter.MODES else 'ema'
+        
+        temporal_strength = config.get('effects.temporal_strength', 0.5)
+        temporal_strength = temporal_strength if isinstance(temporal_strength, (int, float)) else 0.5
+        
+        temporal_beta = config.get('effects.temporal_beta', 0.05)
+        temporal_beta = temporal_beta if isinstance(temporal_beta, (int, float)) else 0.05
+        
+        self.temporal_filter = TemporalMaskFilter(temporal_mode, temporal_strength, temporal_beta)
+        
+        # Inferenza asincrona: il compositing usa sempre l'ultima mask disponibile
+        async_inference = config.get('ai.async_inference', False)
+        self.async_inference = async_inference if isinstance(async_inference, bool) else False
+        
+        first_mask_timeout = config.get('ai.first_mask_timeout', 1.0)
+        self.first_mask_timeout = first_mask_timeout if isinstance(first_mask_timeout, (int, float)) else 1.0
+        
+        # Deadline per frame: attesa massima della mask del frame corrente, poi fallback sull'ultima buona
+        deadline_ratio = config.get('ai.frame_deadline_ratio', 0.6)
+        deadline_ratio = deadline_ratio if isinstance(deadline_ratio, (int, float)) else 0.6
+        
+        frame_deadline = config.get('ai.frame_deadline_ms', 'auto')
+        if isinstance(frame_deadline, (int, float)) and not isinstance(frame_deadline, bool):
+            self.frame_deadline_ms = max(0.0, float(frame_deadline))
+        else:
+            self.frame_deadline_ms = 1000.0 / self.target_fps * deadline_ratio
+        
+        self.worker: Optional[SegmentationWorker] = None
+        
+        # Motion gate: riusa la mask precedente se la scena non è cambiata
+        gate_enabled = config.get('ai.motion_gate_enabled', False)
+        self.motion_gate_enabled = gate_enabled if isinstance(gate_enabled, bool) else False
+        
+        gate_threshold = config.get('ai.motion_gate_threshold', 3.0)
+        gate_threshold = gate_threshold if isinstance(gate_threshold, (int, float)) else 3.0
+        
+        gate_tiles = config.get('ai.motion_gate_tiles', [16, 9])
+        gate_tiles = tuple(gate_tiles) if isinstance(gate_tiles, (list, tuple)) and len(gate_tiles) == 2 else (16, 9)
+        
+        gate_max_skip = config.get('ai.motion_gate_max_skip', 10)
+        gate_max_skip = gate_max_skip if isinstance(gate_max_skip, int) else 10
+        
+        self.motion_gate = MotionGate(gate_threshold, gate_tiles, gate_max_skip)
+        self.last_mask: Optional[np.ndarray] = None
+        
+        # Presenza: senza persona in scena l'inferenza scende a un frame sonda ogni tanto
+        presence_detection = config.get('ai.presence_detection', False)
+        presence_detection = presence_detection if isinstance(presence_detection, bool) else False
+        
+        presence_min_coverage = config.get('ai.presence_min_coverage', 0.01)
+        presence_min_coverage = presence_min_coverage if isinstance(presence_min_coverage, (int, float)) else 0.01
+        
+        presence_absence = config.get('ai.presence_absence_seconds', 5.0)
+        presence_absence = presence_absence if isinstance(presence_absence, (int, float)) else 5.0
+        
+        idle_probe_interval = config.get('ai.idle_probe_interval', 0.5)
+        idle_probe_interval = idle_probe_interval if isinstance(idle_probe_interval, (int, float)) else 0.5
+        
+        self.presence: Optional[PresenceDetector] = PresenceDetector(presence_min_coverage, presence_absence) \
+            if presence_detection else None
+        # In idle: sonda anticipata al primo movimento, altrimenti una ogni idle_probe_interval
+        self.idle_gate = MotionGate(gate_threshold, gate_tiles, max(1, int(idle_probe_interval * self.target_fps)))
+        self.idle_skipped = False
+        # Ultimo risultato del worker già valutato dalla presenza (le sonde async finiscono dopo)
+        self.presence_index = 0
+        
+        # Keyframe mode: MediaPipe ogni K frame, mask propagata con optical flow nel mezzo
+        keyframe_mode = config.get('ai.keyframe_mode', False)
+        self.keyframe_mode = keyframe_mode if isinstance(keyframe_mode, bool) else False
+        
+        keyframe_interval = config.get('ai.keyframe_interval', 3)
+        keyframe_interval = keyframe_interval if isinstance(keyframe_interval, int) else 3
+        
+        keyframe_min_interval = config.get('ai.keyframe_min_interval', 1)
+        keyframe_min_interval = keyframe_min_interval if isinstance(keyframe_min_interval, int) else 1
+        
+        motion_low = config.get('ai.keyframe_motion_low', 0.3)
+        motion_low = motion_low if isinstance(motion_low, (int, float)) else 0.3
+        
+        motion_high = config.get('ai.keyframe_motion_high', 2.0)
+        motion_high = motion_high if isinstance(motion_high, (int, float)) else 2.0
+        
+        self.propagator = FlowMaskPropagator(keyframe_interval, keyframe_min_interval, motion_low, motion_high)
+        
+        # ROI tracking: inferenza sul ritaglio attorno alla persona
+        roi_tracking = config.get('ai.roi_tracking', False)
+        self.roi_tracking = roi_tracking if isinstance(roi_tracking, bool) else False
+        
+        # Modalità ibrida: modello veloce su ogni frame, accurato ogni N frame nella banda del bordo
+        hybrid_mode = config.get('ai.hybrid_mode', False)
+        hybrid_mode = hybrid_mode if isinstance(hybrid_mode, bool) else False
+        
+        hybrid_interval = config.get('ai.hybrid_interval', 5)
+        hybrid_interval = hybrid_interval if isinstance(hybrid_interval, int) else 5
+        
+        hybrid_background = config.get('ai.hybrid_background', True)
+        hybrid_background = hybrid_background if isinstance(hybrid_background, bool) else True
+        
+        hybrid_band = config.get('ai.hybrid_band', [0.1, 0.9])
+        hybrid_band = tuple(hybrid_band) if isinstance(hybrid_band, (list, tuple)) and len(hybrid_band) == 2 \
+            else (0.1, 0.9)
+        
+        hybrid_band_radius = config.get('ai.hybrid_band_radius', 4)
+        hybrid_band_radius = hybrid_band_radius if isinstance(hybrid_band_radius, int) else 4
+        
+        self.hybrid: Optional[HybridSegmenter] = HybridSegmenter(
+            self._run_accurate_model, hybrid_interval, hybrid_background,
+            hybrid_band[0], hybrid_band[1], hybrid_band_radius
+        ) if hybrid_mode else None
+        self._accurate_rgb: Optional[np.ndarray] = None
+        
+        # Letterbox: input AI senza distorsione per camere 4:3 o verticali (mappe remap in cache)
+        letterbox = config.get('ai.letterbox', False)
+        self.letterbox = letterbox if isinstance(letterbox, bool) else False
+        self.letterbox_mapper = LetterboxMapper()
+        
+        roi_padding = config.get('ai.roi_padding', 0.15)
+        roi_padding = roi_padding if isinstance(roi_padding, (int, float)) else 0.15
+        
+        roi_full_interval = config.get('ai.roi_full_frame_interval', 30)
+        roi_full_interval = roi_full_interval if isinstance(roi_full_interval, int) else 30
+        
+        self.roi_tracker = PersonROITracker(roi_padding, roi_full_interval)
+        
+        roi_canvas_scale = config.get('ai.roi_canvas_scale', 2.0)
+        self.roi_canvas_scale = roi_canvas_scale if isinstance(roi_canvas_scale, (int, float)) else 2.0
+        
+        # Rapporto risoluzione mask / output (scala i kernel del post-processing)
+        self.mask_scale = 1.0
+        
+        # Buffer preallocati per preprocessing e post-processing (dst=, zero allocazioni a regime)
+        self.buffers = BufferPool()
+        # Percorso idle sul thread del loop: pool separato perché BufferPool non è thread-safe
+        # e self.buffers è usato dal worker di inferenza asincrona
+        self.idle_buffers = BufferPool()
+        
+        # Verifica allocazioni: 'off', 'measure' (stats per stadio) o 'assert' (errore a regime)
+        allocation_check = config.get('performance.allocation_check', 'off')
+        self.allocation_check = allocation_check if allocation_check in ('off', 'measure', 'assert') else 'off'
+        self.allocation_violations = 0
+        self._steady_frames = 0
+        self._pool_allocations = 0
+        if self.allocation_check != 'off':
+            self.performance.enable_allocation_tracking()
+        
+        # Costo medio di un frame con inferenza completa e CPU risparmiata dagli skip
+        self.full_inference_ms = 0.0
+        self.cpu_saved_ms = 0.0
+        
+        # Età della mask usata per il compositing
+        self.frame_index = 0
+        self.mask_age_frames = 0
+        self.mask_age_ms = 0.0
+        self.max_mask_age_frames = 0
+        
+        # Stats deadline: sorgenti di jitter
+        self.deadline_misses = 0
+        self.fallback_frames = 0
+        self.late_masks_used = 0
+        self.max_late_ms = 0.0
+        self._last_late_index = 0
         
         # GPU acceleration (se disponibile)
         self.gpu_available = False
@@ -57,38 +279,25 @@ class AIProcessor:
         print("🤖 Inizializzando AI processor...")
         
         try:
-            # Inizializza MediaPipe con controllo di sicurezza
-            import mediapipe as mp
-            
-            # Prova diversi modi per accedere a selfie_segmentation
-            self.mp_selfie_segmentation = None
-            try:
-                # Metodo 1: accesso sicuro con getattr
-                self.mp_selfie_segmentation = getattr(mp.solutions, 'selfie_segmentation', None)
-            except:
-                pass
-                
-            if not self.mp_selfie_segmentation:
-                try:
-                    # Metodo 2: import esplicito (commentato per evitare errori di tipo)
-                    # from mediapipe.solutions import selfie_segmentation
-                    # self.mp_selfie_segmentation = selfie_segmentation
-                    print("⚠️ Warning: Usando fallback per MediaPipe")
-                    return False
-                except:
-                    print("❌ Errore: MediaPipe selfie_segmentation non disponibile")
-                    return False
-            
-            if self.mp_selfie_segmentation:
-                self.segmentation = self.mp_selfie_segmentation.SelfieSegmentation(
-                    model_selection=self.model_selection
-                )
-            else:
-                print("❌ Errore: Impossibile inizializzare selfie_segmentation")
+            # Warm-up incluso: il primo frame reale non paga l'inizializzazione del grafo
+            self.requested_ai_size = (self.ai_width, self.ai_height)
+            # La modalità ibrida usa sempre entrambi i modelli
+            preload = (0, 1) if self.preload_models or self.hybrid else ()
+            self.model_pool = ModelPool(self._create_segmentation, preload=preload,
+                                        warmup_iterations=self.warmup_iterations)
+            if not self.model_pool.start(self.model_selection, self.requested_ai_size):
+                print(f"❌ Errore: Impossibile inizializzare il backend '{self.backend_name}'")
+                self.model_pool = None
                 return False
+            self.segmentation, _, _ = self.model_pool.acquire()
             
+            warmup = self.model_pool.warmups.get(self.model_selection, {})
             print(f"✅ AI inizializzato - Risoluzione: {self.ai_width}x{self.ai_height}")
+            print(f"🔥 Warm-up: cold start {warmup.get('cold_start_ms', 0):.0f}ms → "
+                  f"{warmup.get('warm_ms', 0):.0f}ms a regime ({self.warmup_iterations} inferenze)")
+            print(f"🧠 Backend: {self.backend_name}")
             print(f"🎯 Modello: {'Accurato' if self.model_selection else 'Veloce'}")
+            print(f"🧵 Inferenza: {self._inference_mode_label()}")
             
             # Test GPU acceleration
             self._test_gpu_acceleration()
@@ -99,6 +308,98 @@ class AIProcessor:
             print(f"❌ Errore inizializzazione AI: {e}")
             return False
     
+    def _create_segmentation(self, model_selection: int) -> Optional[SegmentationBackend]:
+        """Crea il backend configurato secondo la modalità di inferenza (None se non disponibile)"""
+        if self.segmentation_service is not None:
+            return self.segmentation_service.attach(self.stream_id, model_selection, self.target_fps)
+        
+        if self.inference_mode == 'subprocess':
+            segmenter = SharedMemorySegmenter(self.config, self.backend_name, self.ai_width, self.ai_height,
+                                              ring_size=self.ring_size)
+            if segmenter.initialize(model_selection):
+                get_thread_budget().apply_inference(segmenter)
+                return segmenter
+            segmenter.close()
+            print("⚠️ Processo AI non disponibile - fallback in-process")
+        
+        backend = create_backend(self.backend_name, self.config)
+        if backend is None or not backend.initialize(model_selection):
+            return None
+        get_thread_budget().apply_inference(backend)
+        return backend
+    
+    def _apply_pending_changes(self):
+        """Confine di frame: applica modello e risoluzione AI richiesti, solo quando già scaldati"""
+        if self.model_pool is None:
+            return
+        
+        backend, size, switch_latency = self.model_pool.acquire()
+        if switch_latency is None:
+            return
+        
+        # Nuovo modello o risoluzione: lo stato temporale precedente non è più valido
+        self.segmentation = backend
+        self.ai_width, self.ai_height = size
+        self.temporal_filter.reset()
+        self.motion_gate.reset()
+        self.propagator.reset()
+        self.roi_tracker.reset()
+        self.last_mask = None
+        if self.hybrid:
+            self.hybrid.reset()
+        self.performance.record_stage_time('model_switch', switch_latency)
+        print(f"✅ Modello attivo: {self.model_pool.active_selection} a {size[0]}x{size[1]} "
+              f"(swap dopo {switch_latency * 1000:.0f}ms)")
+    
+    def _request_quality(self, model_selection: int, size: Tuple[int, int]):
+        """Richiede modello e risoluzione AI: il pool li scalda in background prima dello swap"""
+        self.model_selection = model_selection
+        self.requested_ai_size = size
+        
+        if self.model_pool is None:
+            # AI non ancora inizializzato: initialize() userà direttamente questi valori
+            self.ai_width, self.ai_height = size
+            return
+        
+        self.model_pool.request(model_selection, size)
+    
+    def get_readiness(self) -> Dict[str, object]:
+        """Stato del motore AI per /health: pronto per il real-time quando il modello attivo è
+        scaldato alla risoluzione attiva e la sua latenza a regime sta nel budget del frame"""
+        frame_budget_ms = 1000.0 / self.target_fps
+        if self.model_pool is None or self.segmentation is None:
+            return {'ready': False, 'state': 'not_initialized', 'frame_budget_ms': round(frame_budget_ms, 2)}
+        
+        warmup = self.model_pool.warmups.get(self.model_pool.active_selection, {})
+        warm_ms = self.segmentation.warm_latency_ms or warmup.get('warm_ms', 0.0)
+        
+        if not self.model_pool.is_warm():
+            state = 'warming'
+        elif warm_ms > frame_budget_ms:
+            state = 'over_budget'
+        else:
+            state = 'ready'
+        
+        return {
+            'ready': state == 'ready',
+            'state': state,
+            'model': self.model_pool.active_selection,
+            'ai_resolution': f"{self.ai_width}x{self.ai_height}",
+            'cold_start_ms': warmup.get('cold_start_ms'),
+            'warm_latency_ms': round(warm_ms, 2),
+            'frame_budget_ms': round(frame_budget_ms, 2),
+            'warmup_iterations': self.warmup_iterations
+        }
+    
+    def _inference_mode_label(self) -> str:
+        if self.segmentation_service is not None:
+            return f"servizio condiviso (stream '{self.stream_id}')"
+        return 'processo separato (shared memory)' if self.is_out_of_process() else 'in-process'
+    
+    def is_out_of_process(self) -> bool:
+        """True se la segmentazione gira nel processo figlio"""
+        return isinstance(self.segmentation, SharedMemorySegmenter)
+    
     def _test_gpu_acceleration(self):
         """Testa disponibilità GPU acceleration"""
         try:
@@ -118,81 +419,442 @@ class AIProcessor:
             print(f"⚠️ Errore GPU detection: {e}")
     
     def process_frame(self, frame: np.ndarray, output_size: Tuple[int, int]) -> Optional[np.ndarray]:
-        """Processa frame per segmentazione persona/sfondo"""
+        """Processa frame per segmentazione persona/sfondo
+        
+        La mask uint8 resta a risoluzione AI: l'upsample a output_size avviene
+        una sola volta nel compositor (EffectsProcessor.apply_background_blur).
+        """
+        self.frame_index += 1
+        
+        # Letto una volta: update_quality() dal thread API può azzerarlo in qualsiasi momento
+        adaptive_quality = self.adaptive_quality
+        if adaptive_quality is not None and adaptive_quality.due():
+            self._update_adaptive_quality(adaptive_quality)
+        
+        # Idle: nessuna inferenza tra un frame sonda e l'altro
+        if self.is_idle():
+            self._check_async_probe()
+        self.idle_skipped = self.is_idle() and not self._idle_probe(frame)
+        if self.idle_skipped:
+            return self._idle_mask(output_size)
+        
+        if not self.async_inference:
+            start_time = time.time()
+            mask = self._segment_frame(frame, output_size)
+            # Senza worker la deadline non può essere rispettata: si contano solo gli sforamenti
+            if self.frame_deadline_ms > 0 and (time.time() - start_time) * 1000 > self.frame_deadline_ms:
+                self.deadline_misses += 1
+            self.mask_age_frames = 0
+            self.mask_age_ms = 0.0
+        else:
+            mask = self._process_frame_async(frame, output_size)
+        
+        if self.presence is not None and mask is not None:
+            self.presence.update(mask)
+        return mask
+    
+    def _check_async_probe(self):
+        """In idle asincrono: valuta subito la sonda appena terminata dal worker
+        
+        Senza questo controllo il risultato di una sonda arriverebbe alla presenza solo con
+        la sonda successiva, un intero idle_probe_interval dopo il rientro della persona.
+        """
+        if not self.async_inference or self.worker is None:
+            return
+        result = self.worker.latest()
+        if result is None or result.frame_index <= self.presence_index or result.mask is None:
+            return
+        self.presence_index = result.frame_index
+        self.presence.update(result.mask)
+    
+    def is_idle(self) -> bool:
+        """True se nessuna persona è in scena da presence_absence_seconds"""
+        return self.presence is not None and self.presence.is_idle
+    
+    def _idle_probe(self, frame: np.ndarray) -> bool:
+        """In idle: True se il frame va segmentato (movimento in scena o sonda periodica)"""
+        start_time = time.time()
+        probe_size = self.idle_gate.probe_size
+        thumbnail = cv2.resize(frame, probe_size, interpolation=cv2.INTER_AREA,
+                               dst=self.idle_buffers.get('idle_thumbnail', (probe_size[1], probe_size[0], 3)))
+        gray = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY,
+                            dst=self.idle_buffers.get('idle_gray', (probe_size[1], probe_size[0])))
+        
+        if self.idle_gate.should_infer(gray):
+            self.presence.record_probe()
+            return True
+        
+        self.presence.record_idle_frame(self.full_inference_ms - (time.time() - start_time) * 1000)
+        return False
+    
+    def _idle_mask(self, output_size: Tuple[int, int]) -> np.ndarray:
+        """Mask vuota (tutto sfondo) con la forma dell'ultima mask pubblicata"""
+        last_mask = self.last_mask
+        if last_mask is not None:
+            shape = last_mask.shape[:2]
+        else:
+            mask_size = self._mask_size(output_size)
+            shape = (mask_size[1], mask_size[0])
+        
+        mask = self.idle_buffers.get('mask_idle', shape)
+        mask.fill(0)
+        return mask
+    
+    def _process_frame_async(self, frame: np.ndarray, output_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Pubblica il frame al worker e attende la sua mask al massimo fino alla deadline
+        
+        Se l'inferenza è in ritardo il frame usa l'ultima mask buona; il risultato tardivo
+        viene pubblicato dal worker e usato dal frame successivo, senza bloccare il loop.
+        """
+        if self.worker is None:
+            self.worker = SegmentationWorker(self._segment_frame)
+        if not self.worker.is_running:
+            self.worker.start()
+        
+        self.worker.submit(frame, output_size, self.frame_index)
+        
+        result = self.worker.latest()
+        if result is None:
+            # Nessuna mask ancora: attendi la prima per non inviare frame senza blur
+            self.worker.wait_for_inference(1, self.first_mask_timeout)
+            result = self.worker.latest()
+            if result is None:
+                return None
+        elif self.frame_deadline_ms > 0:
+            wait_start = time.time()
+            if not self.worker.wait_for_frame(self.frame_index, self.frame_deadline_ms / 1000):
+                self.deadline_misses += 1
+            self.performance.record_stage_time('deadline_wait', time.time() - wait_start)
+            result = self.worker.latest()
+        
+        self.presence_index = result.frame_index
+        self.mask_age_frames = self.frame_index - result.frame_index
+        self.mask_age_ms = (time.time() - result.timestamp) * 1000
+        self.max_mask_age_frames = max(self.max_mask_age_frames, self.mask_age_frames)
+        
+        if self.mask_age_frames > 0:
+            self.fallback_frames += 1
+            late_ms = (result.completed_at - result.timestamp) * 1000 - self.frame_deadline_ms
+            if late_ms > 0 and result.frame_index != self._last_late_index:
+                # Mask arrivata dopo la deadline del suo frame, usata da un frame successivo
+                self.late_masks_used += 1
+                self._last_late_index = result.frame_index
+                self.max_late_ms = max(self.max_late_ms, late_ms)
+        
+        return result.mask
+    
+    def _segment_frame(self, frame: np.ndarray, output_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Segmentazione completa di un frame: inferenza + post-processing mask"""
         start_time = time.time()
+        # Finestra allocazioni aperta e stadio a cui attribuirla se il frame esce in anticipo
+        allocation_window = None
+        stage = 'preprocess'
         
         try:
-            # Ridimensiona per AI processing
-            ai_frame = cv2.resize(frame, (self.ai_width, self.ai_height))
+            self._apply_pending_changes()
+            allocation_window = self._start_allocation_window()
             
-            # Converte BGR -> RGB per MediaPipe
-            rgb_frame = cv2.cvtColor(ai_frame, cv2.COLOR_BGR2RGB)
+            # Ridimensiona per AI processing (nel buffer preallocato)
+            # Con ROI tracking il ritaglio ha già l'aspect dell'input AI: niente letterbox
+            frame_size = (frame.shape[1], frame.shape[0])
+            ai_size = (self.ai_width, self.ai_height)
+            letterboxed = self.letterbox and not self.roi_tracking and \
+                not self.letterbox_mapper.is_identity(frame_size, ai_size)
+            ai_frame_buffer = self.buffers.get('ai_frame', (self.ai_height, self.ai_width, 3))
+            if letterboxed:
+                ai_frame = self.letterbox_mapper.to_ai(frame, ai_size, dst=ai_frame_buffer)
+            else:
+                ai_frame = cv2.resize(frame, ai_size, dst=ai_frame_buffer)
             
-            # Segmentazione AI
-            # Verifica che segmentation sia stato inizializzato
-            if not self.segmentation:
-                print("❌ Errore: segmentation non inizializzato")
-                return None
-                
-            results = self.segmentation.process(rgb_frame)
-            mask = results.segmentation_mask
+            # Grigio a risoluzione AI condiviso da motion gate, optical flow e guided filter
+            gray_frame = None
+            if self.motion_gate_enabled or self.keyframe_mode or \
+                    (self.edge_smoothing and self.edge_refinement == 'guided'):
+                gray_frame = cv2.cvtColor(ai_frame, cv2.COLOR_BGR2GRAY,
+                                          dst=self.buffers.get('ai_gray', (self.ai_height, self.ai_width)))
+            self.performance.record_stage_time('preprocess', time.time() - start_time)
+            allocation_window = self._end_allocation_window('preprocess', allocation_window)
+            stage = 'inference'
             
-            if mask is None:
-                return None
+            mask_size = self._mask_size(output_size)
+            self.mask_scale = mask_size[0] / output_size[0]
+            mask_shape = (mask_size[1], mask_size[0])
+            
+            # Con letterbox la mask pubblicata copre solo l'area utile, alla sua risoluzione nell'input AI
+            published_shape = mask_shape
+            if letterboxed:
+                content_width, content_height = self.letterbox_mapper.content_rect[2:]
+                published_shape = (content_height, content_width)
+                self.mask_scale = content_width / output_size[0]
+            
+            # Scena invariata rispetto all'ultima inferenza: riusa la mask precedente
+            if self.motion_gate_enabled and self.last_mask is not None \
+                    and self.last_mask.shape[:2] == published_shape:
+                if not self.motion_gate.should_infer(gray_frame):
+                    stage = 'motion_gate'
+                    processing_time = time.time() - start_time
+                    self.cpu_saved_ms += max(0.0, self.full_inference_ms - processing_time * 1000)
+                    # Fuori dai tempi di processing: abbasserebbero il p95 del controller adattivo
+                    self.performance.record_stage_time('motion_gate', processing_time)
+                    return self.last_mask
+            
+            # Keyframe mode: il modello gira ogni K frame, in mezzo la mask segue il flow
+            stage_start = time.time()
+            propagated = self.keyframe_mode and not self.propagator.needs_keyframe(gray_frame)
+            if propagated:
+                mask = self.propagator.propagate(gray_frame)
+            else:
+                mask = self._segment_with_roi(frame, ai_frame, mask_size) if self.roi_tracking \
+                    else self._run_segmentation(ai_frame)
+                if mask is None:
+                    return None
+                if self.keyframe_mode:
+                    if mask.shape != gray_frame.shape:
+                        mask = cv2.resize(mask, (self.ai_width, self.ai_height), interpolation=cv2.INTER_AREA,
+                                          dst=self.buffers.get('keyframe_mask', gray_frame.shape, np.float32))
+                    self.propagator.set_keyframe(gray_frame, mask)
+            
+            self.performance.record_stage_time('inference', time.time() - stage_start)
+            # Allocazioni del modello: misurate ma fuori dal controllo della pipeline
+            allocation_window = self._end_allocation_window('inference', allocation_window, enforce=False)
+            stage = 'postprocess'
+            
+            # Output del modello tenuto vivo fino a fine post-processing: se venisse liberato a metà
+            # stadio, il picco misurato non vedrebbe i temporanei allocati dopo
+            model_mask = mask
+            
+            # Post-processing a risoluzione mask: costo indipendente dalla camera
+            hybrid = self.hybrid is not None and not self.roi_tracking and self.segmentation.model_selection == 0
+            if mask.shape[:2] != mask_shape:
+                mask = cv2.resize(mask.astype(np.float32, copy=False), mask_size,
+                                  dst=self.buffers.get('mask_float', mask_shape, np.float32))
+            elif hybrid:
+                # La correzione è in-place: non toccare output del modello o stato del propagator
+                mask_float = self.buffers.get('mask_float', mask_shape, np.float32)
+                np.copyto(mask_float, mask)
+                mask = mask_float
             
-            # Ridimensiona mask alla risoluzione output
-            mask_resized = cv2.resize(mask, output_size)
-            mask_resized = (mask_resized * 255).astype(np.uint8)
+            if hybrid:
+                stage_start = time.time()
+                mask = self.hybrid.apply(mask, ai_frame, fresh=not propagated)
+                self.performance.record_stage_time('hybrid', time.time() - stage_start)
+            
+            # Buffer uint8 finale: ring pubblicato al compositor se nessuno stadio segue
+            morphology = self.edge_smoothing and self.edge_refinement == 'morphology'
+            mask_u8 = self.buffers.get('mask_u8', mask_shape) if morphology or self.temporal_smoothing \
+                else self.buffers.ring('mask_out', mask_shape)
             
             # Applica miglioramenti
+            stage_start = time.time()
+            if self.edge_smoothing and self.edge_refinement == 'guided':
+                guide = self._refinement_guide(frame, gray_frame, mask_size)
+                mask = self._apply_guided_refinement(mask, guide)
+                np.clip(mask, 0.0, 1.0, out=mask)
+            
+            mask_resized = cv2.convertScaleAbs(mask, dst=mask_u8, alpha=255.0)
+            
+            if morphology:
+                smoothed = self.buffers.get('mask_smooth', mask_shape) if self.temporal_smoothing \
+                    else self.buffers.ring('mask_out', mask_shape)
+                mask_resized = self._apply_edge_smoothing(mask_resized, smoothed)
+            
             if self.edge_smoothing:
-                mask_resized = self._apply_edge_smoothing(mask_resized)
+                self.performance.record_stage_time(f'refinement_{self.edge_refinement}', time.time() - stage_start)
             
             if self.temporal_smoothing:
+                stage_start = time.time()
                 mask_resized = self._apply_temporal_smoothing(mask_resized)
+                self.performance.record_stage_time('temporal', time.time() - stage_start)
+            
+            # Post-processing nel dominio dell'input AI (guide, flow e mask allineati), poi via le bande
+            if letterboxed:
+                mask_resized = self.letterbox_mapper.from_ai(mask_resized, frame_size, published_shape[::-1],
+                                                             dst=self.buffers.ring('mask_unletterboxed', published_shape))
+            
+            self._end_allocation_window('postprocess', allocation_window)
+            allocation_window = None
+            del model_mask
             
             # Record performance
             processing_time = time.time() - start_time
             self.performance.record_processing_time(processing_time)
+            self.full_inference_ms = 0.9 * self.full_inference_ms + 0.1 * processing_time * 1000 \
+                if self.full_inference_ms else processing_time * 1000
             
+            self.last_mask = mask_resized
             return mask_resized
             
+        except AssertionError:
+            # Modalità allocation_check 'assert': l'errore non va nascosto (finestra già chiusa)
+            allocation_window = None
+            raise
         except Exception as e:
             print(f"⚠️ Errore processing AI: {e}")
             return None
+        finally:
+            # Ogni uscita (motion gate, mask assente, errori) chiude la finestra e conta il frame
+            if allocation_window is not None:
+                self._end_allocation_window(stage, allocation_window, enforce=False)
+            self._end_frame_allocations()
+    
+    def _start_allocation_window(self) -> Optional[int]:
+        """Apre una finestra di misura allocazioni (None se la verifica è disattivata)"""
+        if self.allocation_check == 'off':
+            return None
+        return self.performance.start_allocation_window()
+    
+    def _end_allocation_window(self, stage: str, window: Optional[int], enforce: bool = True) -> Optional[int]:
+        """Chiude la finestra di uno stadio e ne apre una nuova per il successivo
+        
+        In modalità 'assert', a regime (buffer già allocati) nessuno stadio della pipeline
+        può allocare temporanei grandi quanto una mask a risoluzione AI.
+        """
+        if window is None:
+            return None
+        
+        transient = self.performance.end_allocation_window(stage, window)
+        limit = self.ai_width * self.ai_height
+        if enforce and self.allocation_check == 'assert' and self._steady_frames >= 5 and transient >= limit:
+            self.allocation_violations += 1
+            raise AssertionError(f"Stadio '{stage}': {transient / 1024:.0f} KB di temporanei a regime "
+                                 f"(limite {limit / 1024:.0f} KB)")
+        return self.performance.start_allocation_window()
+    
+    def _end_frame_allocations(self):
+        """Regime: frame consecutivi senza nuove allocazioni nel buffer pool"""
+        if self.buffers.allocations != self._pool_allocations:
+            self._pool_allocations = self.buffers.allocations
+            self._steady_frames = 0
+        else:
+            self._steady_frames += 1
+    
+    def _mask_size(self, output_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Risoluzione della mask prodotta: AI, oppure AI x roi_canvas_scale con ROI tracking"""
+        if not self.roi_tracking:
+            return (self.ai_width, self.ai_height)
+        
+        # Canvas fisso (anche per le passate a frame intero) per non perdere il dettaglio del ritaglio
+        return (min(output_size[0], int(self.ai_width * self.roi_canvas_scale)),
+                min(output_size[1], int(self.ai_height * self.roi_canvas_scale)))
+    
+    def _segment_with_roi(self, frame: np.ndarray, ai_frame: np.ndarray,
+                          mask_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Segmenta il ritaglio attorno alla persona e lo incolla in una mask a frame intero"""
+        frame_height, frame_width = frame.shape[:2]
+        roi = self.roi_tracker.next_roi(frame_width, frame_height, (self.ai_width, self.ai_height))
+        
+        if roi is None:
+            # Passata a frame intero: (ri)acquisizione del soggetto
+            mask = self._run_segmentation(ai_frame)
+        else:
+            x, y, w, h = roi
+            crop = cv2.resize(frame[y:y + h, x:x + w], (self.ai_width, self.ai_height),
+                              dst=self.buffers.get('roi_crop', (self.ai_height, self.ai_width, 3)))
+            crop_mask = self._run_segmentation(crop)
+            canvas = self.buffers.get('roi_canvas', (mask_size[1], mask_size[0]), np.float32)
+            mask = None if crop_mask is None else \
+                self.roi_tracker.paste(crop_mask, roi, (frame_width, frame_height), mask_size, out=canvas)
+        
+        if mask is not None:
+            self.roi_tracker.update(mask)
+        return mask
+    
+    def _run_segmentation(self, ai_frame: np.ndarray) -> Optional[np.ndarray]:
+        """Esegue il backend di segmentazione su un frame BGR a risoluzione AI"""
+        # Verifica che segmentation sia stato inizializzato
+        if not self.segmentation:
+            print("❌ Errore: segmentation non inizializzato")
+            return None
+        
+        # Converte BGR -> RGB solo se il backend lo richiede
+        if self.segmentation.color_order == 'RGB':
+            ai_frame = cv2.cvtColor(ai_frame, cv2.COLOR_BGR2RGB, dst=self.buffers.get('ai_rgb', ai_frame.shape))
+        
+        return self.segmentation.segment(ai_frame)
     
-    def _apply_edge_smoothing(self, mask: np.ndarray) -> np.ndarray:
+    def _run_accurate_model(self, ai_frame: np.ndarray) -> Optional[np.ndarray]:
+        """Modello accurato per la modalità ibrida (preso in prestito dal pool, anche da un altro thread)"""
+        pool = self.model_pool
+        backend = pool.borrow(1) if pool else None
+        if backend is None:
+            return None
+        
+        try:
+            if backend.color_order == 'RGB':
+                # Buffer dedicato: il BufferPool appartiene al thread di inferenza principale
+                if self._accurate_rgb is None or self._accurate_rgb.shape != ai_frame.shape:
+                    self._accurate_rgb = np.empty_like(ai_frame)
+                ai_frame = cv2.cvtColor(ai_frame, cv2.COLOR_BGR2RGB, dst=self._accurate_rgb)
+            return backend.segment(ai_frame)
+        finally:
+            pool.release(1)
+    
+    def _refinement_guide(self, frame: np.ndarray, gray_frame: np.ndarray,
+                          mask_size: Tuple[int, int]) -> np.ndarray:
+        """Guide del guided filter: frame camera in grigio (0-1) alla risoluzione mask"""
+        mask_shape = (mask_size[1], mask_size[0])
+        if mask_size != (self.ai_width, self.ai_height):
+            # Canvas ROI più grande dell'input AI: guide dal frame pieno
+            resized = cv2.resize(frame, mask_size, dst=self.buffers.get('guide_bgr', mask_shape + (3,)))
+            gray_frame = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY, dst=self.buffers.get('guide_gray', mask_shape))
+        return np.multiply(gray_frame, 1.0 / 255.0, dtype=np.float32,
+                           out=self.buffers.get('guide', mask_shape, np.float32))
+    
+    def _apply_guided_refinement(self, mask: np.ndarray, guide: np.ndarray) -> np.ndarray:
+        """Refinement bordi con fast guided filter: costo O(1) per pixel qualunque sia il raggio"""
+        key = ('guided', self.edge_kernel_size, round(self.mask_scale, 3))
+        guided = self._refinement_cache.get(key)
+        if guided is None:
+            # Stesso raggio effettivo del kernel morfologico, in pixel della mask
+            radius = max(1, int(round(self.edge_kernel_size * 2 * self.mask_scale)))
+            guided = FastGuidedFilter(radius, self.guided_eps)
+            self._refinement_cache[key] = guided
+        
+        return guided.filter(guide, mask)
+    
+    def _apply_edge_smoothing(self, mask: np.ndarray, out: np.ndarray) -> np.ndarray:
         """Applica edge smoothing per bordi più morbidi - EFFETTO AMPLIFICATO"""
-        # Kernel più grande per effetto più visibile
+        # Kernel più grande per effetto più visibile, scalato alla risoluzione mask
         kernel_size = max(5, self.edge_kernel_size * 2)  # Raddoppia l'effetto
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, 
-                                         (kernel_size, kernel_size))
+        kernel_size = max(3, int(round(kernel_size * self.mask_scale)) | 1)
+        
+        # Structuring element precalcolato per dimensione
+        key = ('morphology', kernel_size)
+        kernel = self._refinement_cache.get(key)
+        if kernel is None:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+            self._refinement_cache[key] = kernel
         
-        # Morphological closing più aggressivo
-        mask_smooth = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-        mask_smooth = cv2.morphologyEx(mask_smooth, cv2.MORPH_OPEN, kernel)
+        # Morphological closing più aggressivo (buffer intermedio riusato, output in 'out')
+        closed = self.buffers.get('morphology', mask.shape)
+        cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, dst=closed)
+        mask_smooth = cv2.morphologyEx(closed, cv2.MORPH_OPEN, kernel, dst=out)
         
-        # Gaussian blur più visibile
-        mask_smooth = cv2.GaussianBlur(mask_smooth, (7, 7), 1.5)  # Blur più forte
+        # Gaussian blur più visibile (in-place)
+        mask_smooth = cv2.GaussianBlur(mask_smooth, (0, 0), max(0.5, 1.5 * self.mask_scale), dst=mask_smooth)  # Blur più forte
         
         # Log rimosso - troppo spam!
         return mask_smooth
     
     def _apply_temporal_smoothing(self, mask: np.ndarray) -> np.ndarray:
-        """Applica temporal smoothing per stabilità movimento - EFFETTO AMPLIFICATO"""
-        self.mask_buffer.append(mask.copy())
-        
-        if len(self.mask_buffer) >= 3:  # Usa più frame per effetto più stabile
-            # Media ponderata più aggressiva: 50% corrente, 50% media precedenti
-            prev_avg = np.mean([m.astype(np.float32) for m in self.mask_buffer[-3:-1]], axis=0)
-            smoothed_mask = (0.5 * mask.astype(np.float32) + 0.5 * prev_avg)
-            # Log rimosso - troppo spam!
-            return smoothed_mask.astype(np.uint8)
-        
-        return mask
+        """Applica temporal smoothing per stabilità movimento (accumulatore in-place)"""
+        return self.temporal_filter.apply(mask)
     
     def update_quality(self, quality: str):
-        """Aggiorna qualità AI: risoluzione e modello in base al livello scelto"""
+        """Aggiorna qualità AI: risoluzione e modello in base al livello scelto ('auto' = controller adattivo)"""
+        if quality == 'auto':
+            if self.adaptive_quality is None:
+                self.adaptive_quality = AdaptiveQualityController(
+                    fps=self.target_fps, start_level=self._closest_quality_level(),
+                    high_ratio=self.adaptive_high_ratio, low_ratio=self.adaptive_low_ratio,
+                    cpu_high=self.adaptive_cpu_high
+                )
+                self.adaptive_quality.samples_at_change = self.performance.processing_samples
+            print(f"✅ AI quality 'auto': budget {self.adaptive_quality.frame_budget_ms:.1f}ms/frame")
+            return
+        
+        self.adaptive_quality = None
+        
         quality_map = {
             'low':    (0, 256, 144),   # Veloce: risoluzione ridotta + modello leggero
             'medium': (0, 384, 216),   # Bilanciato: risoluzione media + modello leggero
@@ -200,12 +862,35 @@ class AIProcessor:
         }
         model_sel, w, h = quality_map.get(quality, quality_map['medium'])
 
-        self.ai_width = w
-        self.ai_height = h
+        # Modello e risoluzione scaldati in background, applicati al confine di frame
         performance_mode = (model_sel == 0)
-        self.switch_model(performance_mode)
+        if self.config.get('ai.performance_mode', False) != performance_mode:
+            self.config.set('ai.performance_mode', performance_mode)
+        self._request_quality(model_sel, (w, h))
         print(f"✅ AI quality '{quality}': {w}x{h}, model={'fast' if model_sel == 0 else 'accurate'}")
-
+    
+    def _closest_quality_level(self) -> int:
+        """Livello del controller più vicino alla configurazione corrente"""
+        width = self.requested_ai_size[0]
+        return min(range(len(QUALITY_LADDER)),
+                   key=lambda i: (QUALITY_LADDER[i][0] != self.model_selection, abs(QUALITY_LADDER[i][1] - width)))
+    
+    def _update_adaptive_quality(self, controller: AdaptiveQualityController):
+        """Valuta p95 e carico CPU e applica il livello scelto dal controller"""
+        self.performance.update_system_metrics()
+        
+        samples_total = self.performance.processing_samples
+        p95_ms = self.performance.get_processing_percentile(95, last_n=samples_total - controller.samples_at_change)
+        
+        level = controller.evaluate(p95_ms, samples_total, self.performance.cpu_usage,
+                                    self.performance.process_cpu_usage)
+        if level is None:
+            return
+        
+        model_sel, w, h = level
+        self._request_quality(model_sel, (w, h))
+        print(f"🎚️ Qualità auto {controller.decision}: {w}x{h} {'accurate' if model_sel else 'fast'} ({controller.reason})")
+    
     def set_edge_smoothing(self, enabled: bool):
         """Abilita/disabilita edge smoothing"""
         if self.edge_smoothing != enabled:
@@ -218,43 +903,121 @@ class AIProcessor:
         if self.temporal_smoothing != enabled:
             self.temporal_smoothing = enabled
             if not enabled:
-                self.mask_buffer.clear()
+                self.temporal_filter.reset()
             self.config.set('effects.temporal_smoothing', enabled)
             print(f"⏱️ Temporal smoothing: {'ATTIVATO' if enabled else 'DISATTIVATO'}")
     
+    def set_temporal_strength(self, strength: float):
+        """Imposta forza del temporal smoothing (0-0.95)"""
+        self.temporal_filter.set_strength(strength)
+        self.config.set('effects.temporal_strength', self.temporal_filter.strength)
+        print(f"⏱️ Temporal strength: {self.temporal_filter.strength:.2f}")
+    
     def get_stats(self) -> dict:
         """Ottieni statistiche AI processor"""
         return {
             'ai_resolution': f"{self.ai_width}x{self.ai_height}",
             'model': 'Accurato' if self.model_selection else 'Veloce',
+            'model_pool': self.model_pool.get_stats() if self.model_pool else None,
+            'readiness': self.get_readiness(),
+            'adaptive_quality': self.adaptive_quality.get_stats() if self.adaptive_quality else None,
+            'backend': self.segmentation.describe() if self.segmentation else {'name': self.backend_name},
+            'available_backends': available_backends(),
             'edge_smoothing': self.edge_smoothing,
+            'edge_refinement': self.edge_refinement,
             'temporal_smoothing': self.temporal_smoothing,
             'gpu_available': self.gpu_available,
-            'buffer_size': len(self.mask_buffer)
+            'temporal_filter': self.temporal_filter.get_stats(),
+            'async_inference': self.async_inference,
+            'mask_age_frames': self.mask_age_frames,
+            'mask_age_ms': round(self.mask_age_ms, 1),
+            'max_mask_age_frames': self.max_mask_age_frames,
+            'deadline': {
+                'deadline_ms': round(self.frame_deadline_ms, 2),
+                'misses': self.deadline_misses,
+                'miss_rate': round(self.deadline_misses / max(1, self.frame_index), 4),
+                'fallback_frames': self.fallback_frames,
+                'late_masks_used': self.late_masks_used,
+                'max_late_ms': round(self.max_late_ms, 1)
+            },
+            'worker': self.worker.get_stats() if self.worker else None,
+            'inference_mode': 'service' if self.segmentation_service else
+                              'subprocess' if self.is_out_of_process() else 'inprocess',
+            'service_stream': self.segmentation_service.get_stream_stats().get(self.stream_id)
+                              if self.segmentation_service else None,
+            'ipc': self.segmentation.get_stats() if self.is_out_of_process() else None,
+            'motion_gate_enabled': self.motion_gate_enabled,
+            'motion_gate': self.motion_gate.get_stats(),
+            'cpu_saved_ms': round(self.cpu_saved_ms, 1),
+            'presence': self.presence.get_stats() if self.presence else None,
+            'keyframe_mode': self.keyframe_mode,
+            'keyframes': self.propagator.get_stats(),
+            'roi_tracking': self.roi_tracking,
+            'letterbox': self.letterbox_mapper.get_stats() if self.letterbox else None,
+            'hybrid': self.hybrid.get_stats() if self.hybrid else None,
+            'roi': self.roi_tracker.get_stats(),
+            'buffers': self.buffers.get_stats(),
+            'allocation_check': self.allocation_check,
+            'allocation_violations': self.allocation_violations,
+            'allocations': self.performance.get_allocation_stats() if self.allocation_check != 'off' else None
         }
     
     def cleanup(self):
         """Pulizia risorse AI"""
         print("🧹 Cleanup AI processor...")
         
-        if self.segmentation:
-            self.segmentation.close()
-            self.segmentation = None
+        self._stop_worker()
         
-        self.mask_buffer.clear()
+        if self.model_pool:
+            self.model_pool.close()
+            self.model_pool = None
+        self.segmentation = None
+        
+        self.temporal_filter.reset()
         print("✅ AI cleanup completato")
     
+    def _stop_worker(self):
+        """Ferma worker di inferenza asincrona e azzera l'età mask"""
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+        
+        self.frame_index = 0
+        self.mask_age_frames = 0
+        self.mask_age_ms = 0.0
+        self.max_mask_age_frames = 0
+        self.deadline_misses = 0
+        self.fallback_frames = 0
+        self.late_masks_used = 0
+        self.max_late_ms = 0.0
+        self._last_late_index = 0
+        
+        self.motion_gate.reset()
+        self.propagator.reset()
+        self.roi_tracker.reset()
+        self.last_mask = None
+        if self.hybrid:
+            self.hybrid.stop()
+        if self.presence:
+            self.presence.reset()
+        self.idle_gate.reset()
+        self.presence_index = 0
+    
     def reset_for_restart(self):
         """Reset completo per permettere restart pulito"""
         print("🔄 Reset AI per restart...")
         
-        # Chiudi segmentatore ma non rilasciare MediaPipe
-        if self.segmentation:
-            self.segmentation.close()
-            self.segmentation = None
+        # Ferma worker prima di chiudere il segmentatore che sta usando
+        self._stop_worker()
+        
+        # Chiudi i modelli del pool (ricreati da initialize al restart)
+        if self.model_pool:
+            self.model_pool.close()
+            self.model_pool = None
+        self.segmentation = None
         
         # Pulisci buffer
-        self.mask_buffer.clear()
+        self.temporal_filter.reset()
         
         # Resetta flag
         self.gpu_available = False
@@ -264,45 +1027,29 @@ class AIProcessor:
     def switch_model(self, performance_mode: bool):
         """Cambia modello AI dinamicamente senza riavvio"""
         try:
-            old_performance_mode = self.config.get('ai.performance_mode', False)
-            
-            if old_performance_mode == performance_mode:
-                return True  # Nessun cambio necessario
-            
-            mode_name = "� PERFORMANCE (veloce)" if performance_mode else "🎯 ACCURATO (preciso)"
-            print(f"🔄 Cambio modello AI → {mode_name}")
-            
             # Aggiorna configurazione
-            self.config.set('ai.performance_mode', performance_mode)
+            if self.config.get('ai.performance_mode', False) != performance_mode:
+                self.config.set('ai.performance_mode', performance_mode)
             
             # Determina nuovo modello
             new_model_selection = 0 if performance_mode else 1
             
-            # Se il modello è già quello giusto, non fare nulla
+            # Se il modello è già quello giusto (anche se scelto dalla qualità auto), non fare nulla
             if self.model_selection == new_model_selection:
                 return True
             
-            # Chiudi il vecchio segmentatore
-            if self.segmentation:
-                self.segmentation.close()
-                self.segmentation = None
+            mode_name = "� PERFORMANCE (veloce)" if performance_mode else "🎯 ACCURATO (preciso)"
+            print(f"🔄 Cambio modello AI → {mode_name}")
             
-            # Crea nuovo segmentatore con nuovo modello
-            self.model_selection = new_model_selection
+            if self.model_pool is None:
+                print("❌ Errore durante il cambio modello: AI non inizializzato")
+                return False
             
-            if self.mp_selfie_segmentation:
-                self.segmentation = self.mp_selfie_segmentation.SelfieSegmentation(
-                    model_selection=self.model_selection
-                )
-                
-                # Pulisci buffer per evitare inconsistenze
-                self.mask_buffer.clear()
-                
-                print(f"✅ Modello cambiato con successo: {self.model_selection} ({'Performance' if performance_mode else 'Accurato'})")
-                return True
+            # Swap non bloccante: il thread di inferenza passa al nuovo modello appena è caldo
+            self._request_quality(new_model_selection, self.requested_ai_size)
             
-            print("❌ Errore durante il cambio modello: mp_selfie_segmentation non disponibile")
-            return False
+            print(f"✅ Cambio modello richiesto: {self.model_selection} ({'Performance' if performance_mode else 'Accurato'})")
+            return True
             
         except Exception as e:
             print(f"❌ Errore switch_model: {e}")
@@ -0,0 +1,211 @@
+# =============================================================================
+# File 35: src/core/background_store.py
+# =============================================================================
+
+import os
+import hashlib
+import threading
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any
+
+Size = Tuple[int, int]  # width, height
+
+
+class BackgroundStore:
+    """Immagini di sfondo per la sostituzione, decodificate e scalate una sola volta
+
+    Ogni immagine è identificata da percorso, dimensione e data di modifica; per ogni
+    risoluzione di output viene ritagliata in modalità "cover" (riempie il frame senza
+    deformare), convertita in BGR a 3 canali e salvata come .npy nella cartella cache.
+    Le versioni pronte sono memory-mapped (np.load mmap_mode='r'): ai riavvii non si
+    decodifica né ridimensiona nulla e tornare a uno sfondo già usato costa solo la
+    lookup nel dizionario. Il frame loop legge solo get(), mai il decoder: una risoluzione
+    non preparata viene preparata su un thread in background e nel frattempo get() restituisce
+    None (il chiamante usa il blur). La cartella cache è limitata a max_cache_mb: oltre il
+    limite si eliminano i .npy usati meno di recente.
+    """
+
+    def __init__(self, cache_dir: Path, max_cache_mb: float = 256.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_cache_bytes = int(max_cache_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        # Preparazioni in corso in background (lock breve, mai tenuto durante la decodifica)
+        self.pending_lock = threading.Lock()
+        self.pending = set()
+
+        # (chiave immagine, dimensione) -> sfondo pronto (memmap o array)
+        self.prepared: Dict[Tuple[str, Size], np.ndarray] = {}
+        self.paths: Dict[str, str] = {}
+        self.active: Optional[str] = None
+
+        # Stats
+        self.decodes = 0
+        self.disk_hits = 0
+        self.memory_hits = 0
+        self.frame_path_misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        """Chiave stabile tra riavvii; cambia se il file viene modificato"""
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+
+    def select(self, path: str, sizes=()) -> bool:
+        """Rende attiva l'immagine e prepara le risoluzioni indicate (fuori dal frame loop)"""
+        try:
+            path = os.path.expanduser(path)
+            key = self._key(path)
+            self.paths[key] = path
+            for size in sizes:
+                self._prepare(key, (int(size[0]), int(size[1])))
+        except (OSError, ValueError) as e:
+            print(f"❌ Sfondo non caricato ({path}): {e}")
+            return False
+
+        self.active = key
+        return True
+
+    def get(self, size: Size) -> Optional[np.ndarray]:
+        """Sfondo attivo alla risoluzione richiesta (sola lettura), None se nessuno è selezionato"""
+        key = self.active
+        if key is None:
+            return None
+
+        background = self.prepared.get((key, size))
+        if background is not None:
+            self.memory_hits += 1
+            return background
+
+        # Risoluzione non preparata (es. camera cambiata): pronta tra qualche frame
+        with self.pending_lock:
+            if (key, size) in self.pending:
+                return None
+            self.pending.add((key, size))
+        self.frame_path_misses += 1
+        threading.Thread(target=self._prepare_background, args=(key, size),
+                         name='BackgroundPrepare', daemon=True).start()
+        return None
+
+    def _prepare_background(self, key: str, size: Size):
+        """Preparazione fuori dal frame loop per una risoluzione richiesta da get()"""
+        try:
+            self._prepare(key, size)
+        except (OSError, ValueError) as e:
+            print(f"❌ Sfondo non disponibile a {size[0]}x{size[1]}: {e}")
+            if self.active == key:
+                self.active = None
+        finally:
+            with self.pending_lock:
+                self.pending.discard((key, size))
+
+    def _prepare(self, key: str, size: Size) -> np.ndarray:
+        """Sfondo pronto da memoria, da disco (.npy mmap) o decodificato e salvato"""
+        with self.lock:
+            background = self.prepared.get((key, size))
+            if background is not None:
+                return background
+
+            width, height = size
+            cache_file = self.cache_dir / f"{key}_{width}x{height}.npy"
+            if cache_file.exists():
+                try:
+                    background = np.load(cache_file, mmap_mode='r')
+                    if background.shape == (height, width, 3) and background.dtype == np.uint8:
+                        self.disk_hits += 1
+                        self._touch(cache_file)
+                        self.prepared[(key, size)] = background
+                        return background
+                except ValueError:
+                    # File troncato o di un'altra versione: si rigenera
+                    pass
+
+            background = self._decode(self.paths[key], size)
+            self.prepared[(key, size)] = self._save(cache_file, background)
+            self._evict(key)
+            return self.prepared[(key, size)]
+
+    def _decode(self, path: str, size: Size) -> np.ndarray:
+        """Decodifica in BGR e ritaglio "cover" alla dimensione di output"""
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("formato immagine non supportato")
+        self.decodes += 1
+
+        width, height = size
+        image_height, image_width = image.shape[:2]
+        scale = max(width / image_width, height / image_height)
+        scaled_size = (max(width, int(np.ceil(image_width * scale))), max(height, int(np.ceil(image_height * scale))))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        scaled = cv2.resize(image, scaled_size, interpolation=interpolation)
+
+        left = (scaled_size[0] - width) // 2
+        top = (scaled_size[1] - height) // 2
+        return np.ascontiguousarray(scaled[top:top + height, left:left + width])
+
+    def _save(self, cache_file: Path, background: np.ndarray) -> np.ndarray:
+        """Salva il .npy (scrittura atomica) e lo riapre memory-mapped; in memoria se il disco fallisce"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temporary = cache_file.with_name(cache_file.stem + '.tmp.npy')
+            np.save(temporary, background)
+            os.replace(temporary, cache_file)
+            return np.load(cache_file, mmap_mode='r')
+        except OSError as e:
+            print(f"⚠️ Cache sfondo su disco non disponibile: {e}")
+            return background
+
+    @staticmethod
+    def _touch(cache_file: Path):
+        """Data di modifica = ultimo uso (ordine di eliminazione della cache)"""
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str):
+        """Elimina i .npy meno recenti oltre max_cache_bytes (mai quelli dell'immagine attiva o appena preparata)"""
+        try:
+            files = [(entry, entry.stat()) for entry in self.cache_dir.glob('*.npy')]
+        except OSError:
+            return
+
+        protected = {keep, self.active}
+        total = sum(stat.st_size for _, stat in files)
+        for entry, stat in sorted(files, key=lambda item: item[1].st_mtime):
+            if total <= self.max_cache_bytes:
+                break
+            key, _, resolution = entry.stem.partition('_')
+            if key in protected:
+                continue
+            try:
+                # Su Windows un file ancora mappato non si può eliminare: resta fino al prossimo giro
+                entry.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+            self.evictions += 1
+            width, _, height = resolution.partition('x')
+            if width.isdigit() and height.isdigit():
+                self.prepared.pop((key, (int(width), int(height))), None)
+
+    def clear_memory(self):
+        """Rilascia le mappe in memoria (i file .npy restano su disco)"""
+        with self.lock:
+            self.prepared.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche cache sfondi"""
+        return {
+            'active': self.active,
+            'prepared': len(self.prepared),
+            'decodes': self.decodes,
+            'disk_hits': self.disk_hits,
+            'memory_hits': self.memory_hits,
+            'frame_path_misses': self.frame_path_misses,
+            'pending': len(self.pending),
+            'evictions': self.evictions
+        }
@@ -0,0 +1,66 @@
+# =============================================================================
+# File 24: src/core/buffer_pool.py
+# =============================================================================
+
+import numpy as np
+from typing import Dict, Tuple, List, Any
+
+
+class BufferPool:
+    """Buffer numpy riusati per nome: riallocati solo quando cambiano forma o dtype
+
+    Le funzioni OpenCV/numpy scrivono nei buffer con dst=/out=, così a regime
+    la pipeline non alloca array grandi quanto il frame.
+    """
+
+    def __init__(self):
+        self.buffers: Dict[str, np.ndarray] = {}
+        self.rings: Dict[str, Tuple[List[np.ndarray], int]] = {}
+
+        # Stats: ogni (ri)allocazione viene contata
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """Buffer con nome; il contenuto precedente non è garantito"""
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+            self._count(buffer)
+        return buffer
+
+    def ring(self, name: str, shape: Tuple[int, ...], dtype=np.uint8, size: int = 3) -> np.ndarray:
+        """Prossimo buffer di un ring: i size-1 buffer restituiti prima restano intatti
+
+        Serve per le mask pubblicate ad altri thread (compositor) mentre si calcola la successiva.
+        """
+        buffers, index = self.rings.get(name, ([], 0))
+        if len(buffers) != size or buffers[0].shape != shape or buffers[0].dtype != dtype:
+            buffers = [np.empty(shape, dtype=dtype) for _ in range(size)]
+            index = 0
+            for buffer in buffers:
+                self._count(buffer)
+
+        self.rings[name] = (buffers, (index + 1) % size)
+        return buffers[index]
+
+    def _count(self, buffer: np.ndarray):
+        self.allocations += 1
+        self.allocated_bytes += buffer.nbytes
+
+    def clear(self):
+        """Rilascia tutti i buffer"""
+        self.buffers.clear()
+        self.rings.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche buffer pool"""
+        resident = sum(buffer.nbytes for buffer in self.buffers.values()) + \
+            sum(buffer.nbytes for buffers, _ in self.rings.values() for buffer in buffers)
+        return {
+            'buffers': len(self.buffers) + sum(len(buffers) for buffers, _ in self.rings.values()),
+            'resident_kb': round(resident / 1024, 1),
+            'allocations': self.allocations,
+            'allocated_kb': round(self.allocated_bytes / 1024, 1)
+        }
@@ -11,6 +11,7 @@ from typing import Optional, Tuple, Dict, Any
 
 from ..utils.config import StreamBlurConfig
 from ..utils.performance import PerformanceMonitor
+from ..utils.thread_budget import get_thread_budget
 
 class CameraManager:
     """Gestione webcam per StreamBlur Pro"""
@@ -108,6 +109,7 @@ class CameraManager:
     def _capture_loop(self):
         """Loop cattura frame (thread separato)"""
         print("📹 Thread cattura avviato...")
+        get_thread_budget().pin_current_thread('capture')
         
         while self.is_running:
             if not self.cap or not self.cap.isOpened():
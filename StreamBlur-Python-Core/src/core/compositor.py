@@ -0,0 +1,185 @@
+# =============================================================================
+# File 31: src/core/compositor.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple, List, Dict, Any
+
+from .buffer_pool import BufferPool
+
+# Classi dei tile
+TILE_BACKGROUND = 0
+TILE_BAND = 1
+TILE_FOREGROUND = 2
+
+
+class AlphaCompositor:
+    """Composizione persona/sfondo con alpha uint8 a un canale, senza immagini float
+
+    La sfumatura del bordo agisce solo sul canale alpha; il blend è
+    frame * a/255 + sfondo * (255 - a)/255 con moltiplicazioni 8 bit saturate e
+    arrotondate di OpenCV (errore massimo 2 livelli rispetto al blend float).
+    Tutti i buffer sono preallocati; l'output è un ring perché il frame composto
+    può essere ancora in uso (preview, virtual camera) mentre si calcola il successivo.
+
+    Con sparse=True la mask viene classificata per tile (somme esatte da cv2.integral).
+    Un tile è puro se lui e i suoi vicini sono tutti 0 o tutti 255: la sfumatura (raggio
+    minore del tile) non può cambiarlo, quindi resta sfondo sfocato o è copiato dal frame.
+    Sfumatura e blend girano solo sui tile della banda del bordo, raggruppati in run
+    orizzontali. Se la banda supera max_band_fraction il percorso denso costa meno: misurato
+    in pareggio attorno al 15% dei tile a 1080p, mai nettamente in vantaggio a 720p.
+
+    Con out/rows si compone solo una fascia di righe dell'input (le altre sono l'alone
+    letto dalla sfumatura) scrivendo direttamente nella vista del chiamante.
+    """
+
+    def __init__(self, sparse: bool = False, tile_size: int = 32, max_band_fraction: float = 0.15):
+        self.sparse = sparse
+        self.tile_size = max(8, tile_size)
+        self.max_band_fraction = max_band_fraction
+        self.buffers = BufferPool()
+
+        # Griglia dei tile per forma del frame: limiti in pixel e area
+        self.grid_shape: Tuple[int, int] = (0, 0)
+        self.tile_rows = np.zeros(1, dtype=np.intp)
+        self.tile_cols = np.zeros(1, dtype=np.intp)
+        self.tile_full = np.zeros((0, 0), dtype=np.int64)
+        self.neighbourhood = np.ones((3, 3), dtype=np.uint8)
+
+        # Stats
+        self.frames_composited = 0
+        self.dense_frames = 0
+        self.band_fraction = 1.0
+        self.average_band_fraction = 0.0
+
+    def composite(self, frame: np.ndarray, background: np.ndarray, mask: np.ndarray,
+                  feather: Tuple[int, float], out: Optional[np.ndarray] = None,
+                  rows: Optional[slice] = None) -> np.ndarray:
+        """frame e background BGR uint8 della stessa forma; mask uint8 0-255 alla risoluzione del frame
+
+        feather: (kernel, sigma) del Gaussian sul solo canale alpha.
+        rows: righe dell'input da comporre (default tutte); out: destinazione di quelle righe
+        (default un buffer del ring interno).
+        """
+        height, width = frame.shape[:2]
+        alpha = self.buffers.get('alpha', (height, width))
+        kernel, sigma = feather
+        interior = rows if rows is not None else slice(0, height)
+
+        output = out if out is not None else self.buffers.ring('composite', frame.shape)
+        tiles = self._classify(mask, kernel // 2) if self.sparse else None
+        self.band_fraction = float(np.count_nonzero(tiles == TILE_BAND)) / tiles.size if tiles is not None else 1.0
+
+        if tiles is None or self.band_fraction > self.max_band_fraction:
+            self.dense_frames += 1
+            if interior.start == 0 and interior.stop == height:
+                cv2.GaussianBlur(mask, (kernel, kernel), sigma, dst=alpha)
+            else:
+                self._feather(mask, alpha, (interior, slice(0, width)), kernel, sigma)
+            self._blend(frame, background, alpha, output, (interior, slice(0, width)), interior.start)
+        else:
+            np.copyto(output, background[interior])
+            for row, columns in enumerate(tiles):
+                # Tile limitati alle righe richieste (quelli solo nell'alone si saltano)
+                tile_rows = slice(max(self.tile_rows[row], interior.start), min(self.tile_rows[row + 1], interior.stop))
+                if tile_rows.start >= tile_rows.stop:
+                    continue
+                for kind, start, end in self._runs(columns):
+                    region = (tile_rows, slice(self.tile_cols[start], self.tile_cols[end]))
+                    if kind == TILE_FOREGROUND:
+                        np.copyto(output[self._shift(region, interior.start)], frame[region])
+                    elif kind == TILE_BAND:
+                        self._feather(mask, alpha, region, kernel, sigma)
+                        self._blend(frame, background, alpha, output, region, interior.start)
+
+        self.frames_composited += 1
+        self.average_band_fraction = self.band_fraction if self.frames_composited == 1 \
+            else 0.95 * self.average_band_fraction + 0.05 * self.band_fraction
+        return output
+
+    def _feather(self, mask: np.ndarray, alpha: np.ndarray, region: Tuple[slice, slice],
+                 kernel: int, sigma: float):
+        """Sfumatura della sola regione: blur su una finestra allargata del raggio, poi ritaglio
+        
+        Il margine dà al Gaussian gli stessi vicini del blur a frame intero (risultato identico).
+        """
+        rows, columns = region
+        radius = kernel // 2
+        height, width = mask.shape
+        top, bottom = max(0, rows.start - radius), min(height, rows.stop + radius)
+        left, right = max(0, columns.start - radius), min(width, columns.stop + radius)
+
+        scratch = self.buffers.get('alpha_scratch', mask.shape)[top:bottom, left:right]
+        cv2.GaussianBlur(mask[top:bottom, left:right], (kernel, kernel), sigma, dst=scratch)
+        np.copyto(alpha[region], scratch[rows.start - top:rows.stop - top, columns.start - left:columns.stop - left])
+
+    @staticmethod
+    def _shift(region: Tuple[slice, slice], offset: int) -> Tuple[slice, slice]:
+        """Regione dell'input -> regione dell'output che inizia alla riga offset"""
+        rows, columns = region
+        return slice(rows.start - offset, rows.stop - offset), columns
+
+    def _blend(self, frame: np.ndarray, background: np.ndarray, alpha: np.ndarray,
+               output: np.ndarray, region: Tuple[slice, slice], offset: int = 0):
+        """Blend 8 bit nella regione (viste sui buffer a frame intero, nessuna allocazione)"""
+        alpha_3ch = self.buffers.get('alpha_3ch', frame.shape)[region]
+        cv2.merge((alpha[region],) * 3, dst=alpha_3ch)
+        inverse_3ch = self.buffers.get('inverse_3ch', frame.shape)[region]
+        cv2.bitwise_not(alpha_3ch, dst=inverse_3ch)
+
+        foreground = self.buffers.get('foreground', frame.shape)[region]
+        cv2.multiply(frame[region], alpha_3ch, dst=foreground, scale=1.0 / 255.0)
+        backdrop = self.buffers.get('backdrop', frame.shape)[region]
+        cv2.multiply(background[region], inverse_3ch, dst=backdrop, scale=1.0 / 255.0)
+        cv2.add(foreground, backdrop, dst=output[self._shift(region, offset)])
+
+    def _classify(self, mask: np.ndarray, radius: int) -> np.ndarray:
+        """Classe di ogni tile dopo la sfumatura: sfondo puro, banda o persona pura
+        
+        Somme esatte con l'immagine integrale; un tile resta puro solo se lo sono anche
+        i vicini, perché la sfumatura di raggio radius legge fino a loro.
+        """
+        height, width = mask.shape
+        if self.grid_shape != (height, width):
+            self.grid_shape = (height, width)
+            # Ultimo tile di riga/colonna eventualmente parziale
+            self.tile_rows = np.unique(np.minimum(np.arange(0, height + self.tile_size, self.tile_size), height))
+            self.tile_cols = np.unique(np.minimum(np.arange(0, width + self.tile_size, self.tile_size), width))
+            self.tile_full = np.outer(np.diff(self.tile_rows), np.diff(self.tile_cols)).astype(np.int64) * 255
+
+        integral = cv2.integral(mask, sum=self.buffers.get('integral', (height + 1, width + 1), np.int32))
+        corners = integral[np.ix_(self.tile_rows, self.tile_cols)].astype(np.int64)
+        sums = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+
+        background = (sums == 0).astype(np.uint8)
+        foreground = (sums == self.tile_full).astype(np.uint8)
+        if radius > 0:
+            # Erosione 3x3 sulla griglia: il bordo dell'immagine replica il tile stesso
+            background = cv2.erode(background, self.neighbourhood, borderType=cv2.BORDER_REPLICATE)
+            foreground = cv2.erode(foreground, self.neighbourhood, borderType=cv2.BORDER_REPLICATE)
+
+        tiles = np.full(sums.shape, TILE_BAND, dtype=np.uint8)
+        tiles[background == 1] = TILE_BACKGROUND
+        tiles[foreground == 1] = TILE_FOREGROUND
+        return tiles
+
+    @staticmethod
+    def _runs(columns: np.ndarray) -> List[Tuple[int, int, int]]:
+        """Run di tile consecutivi della stessa classe in una riga: (classe, inizio, fine)"""
+        changes = np.flatnonzero(columns[1:] != columns[:-1]) + 1
+        starts = [0] + changes.tolist()
+        ends = changes.tolist() + [len(columns)]
+        return [(int(columns[start]), start, end) for start, end in zip(starts, ends)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche compositor (frazione di tile fusi)"""
+        return {
+            'sparse': self.sparse,
+            'tile_size': self.tile_size,
+            'frames_composited': self.frames_composited,
+            'dense_frames': self.dense_frames,
+            'band_fraction': round(self.band_fraction, 4),
+            'average_band_fraction': round(self.average_band_fraction, 4),
+            'buffers': self.buffers.get_stats()
+        }
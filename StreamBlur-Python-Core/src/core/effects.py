@@ -3,9 +3,17 @@
 # =============================================================================
 
 import cv2
+import time
 import numpy as np
 from typing import Optional, Tuple
 from ..utils.config import StreamBlurConfig
+from .guided_filter import FastGuidedFilter
+from .compositor import AlphaCompositor
+from .pyramid_blur import PyramidBlur
+from .stripe_executor import StripeExecutor
+from .incremental_blur import IncrementalBlur
+from .background_store import BackgroundStore
+from .buffer_pool import BufferPool
 
 class EffectsProcessor:
     """Processore effetti per StreamBlur Pro"""
@@ -15,7 +23,7 @@ class EffectsProcessor:
         
         # Configurazione effetti con conversione sicura
         blur_intensity = config.get('effects.blur_intensity', 15)
-        self.blur_intensity = blur_intensity if isinstance(blur_intensity, int) else 15
+        self.blur_intensity = blur_intensity if isinstance(blur_intensity, (int, float)) else 15
         
         noise_reduction = config.get('effects.noise_reduction', False)
         self.noise_reduction = noise_reduction if isinstance(noise_reduction, bool) else False
@@ -25,24 +33,269 @@ class EffectsProcessor:
         self.intensity_multiplier = intensity_mult if isinstance(intensity_mult, (int, float)) else 1.8
         
         algorithm = config.get('blur.algorithm', 'optimized')
-        self.algorithm = algorithm if isinstance(algorithm, str) else 'optimized'
+        self.algorithm = algorithm if algorithm in ('pyramid', 'optimized', 'quality') else 'optimized'
+        
+        # Blur piramidale: costo quasi costante su tutto il range di intensità
+        self.pyramid_blur = PyramidBlur()
         
         use_gpu = config.get('blur.use_gpu_acceleration', True)
         self.use_gpu = use_gpu if isinstance(use_gpu, bool) else True
         
+        # Upsample della mask (arriva a risoluzione AI): 'guided' segue i bordi del frame, 'linear' no
+        upsampling = config.get('effects.mask_upsampling', 'linear')
+        self.mask_upsampling = upsampling if upsampling in ('guided', 'linear') else 'linear'
+        
+        guided_radius = config.get('effects.guided_radius', 2)
+        guided_radius = guided_radius if isinstance(guided_radius, int) else 2
+        
+        guided_eps = config.get('effects.guided_eps', 0.001)
+        guided_eps = guided_eps if isinstance(guided_eps, (int, float)) else 0.001
+        
+        self.guided_filter = FastGuidedFilter(guided_radius, guided_eps)
+        
+        # Blend con alpha uint8 a un canale (nessun temporaneo float a risoluzione frame)
+        sparse_compositing = config.get('effects.sparse_compositing', False)
+        sparse_compositing = sparse_compositing if isinstance(sparse_compositing, bool) else False
+        
+        composite_tile = config.get('effects.composite_tile', 32)
+        composite_tile = composite_tile if isinstance(composite_tile, int) else 32
+        
+        self.compositor = AlphaCompositor(sparse_compositing, composite_tile)
+        
+        # Esecuzione a strisce orizzontali su pool di thread (0/1 = thread del loop)
+        parallel_stripes = config.get('effects.parallel_stripes', 0)
+        self.parallel_stripes = parallel_stripes if isinstance(parallel_stripes, int) and parallel_stripes > 1 else 0
+        self.stripe_executor = StripeExecutor(self.parallel_stripes) if self.parallel_stripes else None
+        # Stato per striscia: ogni thread ha compositor e piramide propri
+        self.stripe_compositors = [AlphaCompositor(sparse_compositing, composite_tile)
+                                   for _ in range(self.parallel_stripes)]
+        self.stripe_pyramids = [PyramidBlur() for _ in range(self.parallel_stripes)]
+        self.buffers = BufferPool()
+        
+        # Blur incrementale per camere fisse: risfoca solo i tile cambiati
+        incremental_blur = config.get('effects.incremental_blur', False)
+        incremental_blur = incremental_blur if isinstance(incremental_blur, bool) else False
+        
+        incremental_threshold = config.get('effects.incremental_threshold', 10.0)
+        incremental_threshold = incremental_threshold if isinstance(incremental_threshold, (int, float)) else 10.0
+        
+        incremental_refresh = config.get('effects.incremental_refresh_frames', 60)
+        incremental_refresh = incremental_refresh if isinstance(incremental_refresh, int) else 60
+        
+        self.incremental_blur: Optional[IncrementalBlur] = IncrementalBlur(
+            composite_tile, incremental_threshold, incremental_refresh
+        ) if incremental_blur else None
+        self.region_pyramid = PyramidBlur()
+        self.incremental_key: Optional[Tuple] = None
+        
+        # Sostituzione sfondo: immagine pre-scalata in cache, stesso compositor del blur
+        background_mode = config.get('effects.background_mode', 'blur')
+        self.background_mode = background_mode if background_mode in ('blur', 'replace') else 'blur'
+        
+        background_image = config.get('effects.background_image', '')
+        background_image = background_image if isinstance(background_image, str) else ''
+        
+        background_cache_mb = config.get('effects.background_cache_mb', 256)
+        background_cache_mb = background_cache_mb if isinstance(background_cache_mb, (int, float)) else 256
+        
+        self.background_store = BackgroundStore(config.config_dir / 'backgrounds', background_cache_mb)
+        if background_image:
+            self.set_background_image(background_image)
+        
+        # Idle (nessuna persona): sfondo sfocato in cache, ricalcolato solo sui frame sonda
+        self.idle_frame: Optional[np.ndarray] = None
+        self.idle_blur_ms = 0.0
+        self.idle_frames_reused = 0
+        self.idle_cpu_saved_ms = 0.0
+        
     def apply_background_blur(self, frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
         """Applica blur ibrido - AI accurato + blur ottimizzato per intensità alta"""
         
-        # Normalizza mask (0-1 range)
-        mask_normalized = mask.astype(np.float32) / 255.0
+        # Mask a risoluzione AI: unico upsample alla risoluzione del frame
+        if mask.shape[:2] != frame.shape[:2]:
+            mask = self.upsample_mask(mask, frame)
+        
+        # Sostituzione: stesso compositor, sfondo già pronto (nessun blur)
+        replacement = self.replacement_background(frame)
+        if replacement is not None:
+            if self.stripe_executor is not None:
+                return self._apply_striped(frame, mask, replacement)
+            return self.compositor.composite(frame, replacement, mask, (5, 1.5))
+        
+        # La mask resta uint8 0-255: alpha per il compositor
+        if self.stripe_executor is not None:
+            return self._apply_striped(frame, mask)
+        elif self.algorithm == 'pyramid':
+            return self.compositor.composite(frame, self.blur_background(frame), mask, (5, 1.5))
+        elif self.algorithm == 'optimized':
+            return self._apply_optimized_blur(frame, mask)
+        else:
+            return self._apply_quality_blur(frame, mask)
+    
+    def upsample_mask(self, mask: np.ndarray, frame: np.ndarray) -> np.ndarray:
+        """Porta la mask uint8 alla risoluzione del frame (edge-aware se 'guided')"""
+        height, width = frame.shape[:2]
+        
+        mask_full = self.buffers.get('mask_full', (height, width))
+        
+        if self.mask_upsampling == 'linear':
+            return cv2.resize(mask, (width, height), dst=mask_full, interpolation=cv2.INTER_LINEAR)
+        
+        # Guide, mask float e risultato nei buffer del pool: nessuna allocazione a regime
+        guide = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.buffers.get('mask_guide', (height, width)))
+        mask_low = cv2.multiply(mask, 1.0, dst=self.buffers.get('mask_low', mask.shape, np.float32),
+                                scale=1.0 / 255.0, dtype=cv2.CV_32F)
+        upsampled = self.guided_filter.upsample(guide, mask_low)
+        # Clip in-place (convertScaleAbs prende il valore assoluto: i negativi non devono arrivarci)
+        np.clip(upsampled, 0.0, 1.0, out=upsampled)
+        return cv2.convertScaleAbs(upsampled, dst=mask_full, alpha=255.0)
+    
+    def apply_idle_blur(self, frame: np.ndarray, refresh: bool) -> np.ndarray:
+        """Frame interamente sfocato per la modalità idle
         
-        if self.algorithm == 'optimized':
-            return self._apply_optimized_blur(frame, mask_normalized)
+        refresh=False riusa lo sfondo in cache (nessun blur): solo i frame segmentati lo aggiornano.
+        In sostituzione nessuna persona significa solo l'immagine di sfondo.
+        """
+        replacement = self.replacement_background(frame)
+        if replacement is not None:
+            return replacement
+        
+        if refresh or self.idle_frame is None or self.idle_frame.shape != frame.shape:
+            start_time = time.time()
+            self.idle_frame = self.blur_background(frame)
+            self.idle_blur_ms = (time.time() - start_time) * 1000
         else:
-            return self._apply_quality_blur(frame, mask_normalized)
+            self.idle_frames_reused += 1
+            self.idle_cpu_saved_ms += self.idle_blur_ms
+        return self.idle_frame
+    
+    def replacement_background(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """Immagine di sfondo alla risoluzione del frame (sola lettura), None in modalità blur"""
+        if self.background_mode != 'replace':
+            return None
+        return self.background_store.get((frame.shape[1], frame.shape[0]))
+    
+    def blur_background(self, frame: np.ndarray) -> np.ndarray:
+        """Sfondo sfocato con l'algoritmo configurato (senza compositing)"""
+        if self._incremental_enabled():
+            # Cache valida solo per algoritmo e intensità con cui è stata calcolata
+            blur_key = (self.algorithm, self.blur_intensity, self.intensity_multiplier)
+            if blur_key != self.incremental_key:
+                self.incremental_key = blur_key
+                self.incremental_blur.reset()
+            frame_size = (frame.shape[1], frame.shape[0])
+            return self.incremental_blur.blur(frame, self._full_background,
+                                              lambda region: self._region_background(region, frame_size),
+                                              *self._blur_margin(frame_size))
+        return self._full_background(frame)
+    
+    def _incremental_enabled(self) -> bool:
+        """Blur incrementale solo dove conviene
+        
+        Con la piramide il margine dei tile sporchi (raggio del blur) copre quasi tutto il frame
+        già con poco movimento e le regioni costano più del frame intero: misurato nessun
+        risparmio (vedi doc, blur incrementale), quindi si sfoca sempre il frame completo.
+        """
+        return self.incremental_blur is not None and self.algorithm != 'pyramid'
+    
+    def _full_background(self, frame: np.ndarray) -> np.ndarray:
+        """Blur dell'intero frame (a strisce se abilitato)"""
+        if self.stripe_executor is not None:
+            return self._striped_background(frame)
+        elif self.algorithm == 'pyramid':
+            return self._pyramid_background(frame)
+        elif self.algorithm == 'optimized':
+            return self._optimized_background(frame)
+        return self._quality_background(frame)
+    
+    def _pyramid_background(self, frame: np.ndarray) -> np.ndarray:
+        """Sfondo sfocato con la piramide (intensità effettiva anche frazionaria)"""
+        effective_intensity = self.blur_intensity * self.intensity_multiplier
+        return self.pyramid_blur.blur(frame, PyramidBlur.sigma_for(effective_intensity))
+    
+    def _region_background(self, region: np.ndarray, frame_size: Tuple[int, int],
+                           pyramid: Optional[PyramidBlur] = None) -> np.ndarray:
+        """Blur di un ritaglio del frame (stessi livelli di piramide del frame intero)
+        
+        pyramid: istanza propria del chiamante se gira su un altro thread (buffer non condivisi).
+        """
+        if self.algorithm == 'pyramid':
+            effective_intensity = self.blur_intensity * self.intensity_multiplier
+            return (pyramid or self.region_pyramid).blur(region, PyramidBlur.sigma_for(effective_intensity),
+                                                         frame_size)
+        elif self.algorithm == 'optimized':
+            return self._optimized_background(region)
+        return self._quality_background(region)
+    
+    def _apply_striped(self, frame: np.ndarray, mask: np.ndarray,
+                       background: Optional[np.ndarray] = None) -> np.ndarray:
+        """Blur e compositing a strisce sul pool di thread, scritti direttamente nell'output
+        
+        Senza sfondo dato (e senza cache incrementale) ogni striscia sfoca la propria finestra
+        con l'alone in scratch e compone subito le sue righe: nessuno sfondo a frame intero.
+        """
+        feather = (3, 1) if self.algorithm == 'quality' else (5, 1.5)
+        output = self.buffers.ring('striped_composite', frame.shape)
+        frame_size = (frame.shape[1], frame.shape[0])
+        
+        if background is None and not self._incremental_enabled():
+            def blur_composite_stripe(index: int, y0: int, y1: int, a: int, b: int):
+                blurred = self._region_background(frame[a:b], frame_size, self.stripe_pyramids[index])
+                self.stripe_compositors[index].composite(frame[a:b], blurred, mask[a:b], feather,
+                                                         out=output[y0:y1], rows=slice(y0 - a, y1 - a))
+            
+            # Alone = raggio del blur (maggiore di quello della sfumatura)
+            overlap, align = self._blur_margin(frame_size)
+            self.stripe_executor.run('blur_composite', blur_composite_stripe, frame.shape[0],
+                                     max(overlap, feather[0] // 2), align)
+            return output
+        
+        if background is None:
+            background = self.blur_background(frame)
+        
+        def composite_stripe(index: int, y0: int, y1: int, a: int, b: int):
+            self.stripe_compositors[index].composite(frame[a:b], background[a:b], mask[a:b], feather,
+                                                     out=output[y0:y1], rows=slice(y0 - a, y1 - a))
+        
+        # Sovrapposizione = raggio della sfumatura dell'alpha
+        self.stripe_executor.run('composite', composite_stripe, frame.shape[0], feather[0] // 2)
+        return output
+    
+    def _striped_background(self, frame: np.ndarray) -> np.ndarray:
+        """Sfondo sfocato a strisce: ogni striscia legge il raggio del blur oltre i propri bordi"""
+        frame_size = (frame.shape[1], frame.shape[0])
+        background = self.buffers.ring('striped_background', frame.shape, size=2)
+        overlap, align = self._blur_margin(frame_size)
+        
+        def blur_stripe(index: int, y0: int, y1: int, a: int, b: int):
+            # L'upsample finale della piramide ha bisogno delle righe dell'alone: risultato in
+            # scratch e copia delle sole righe interne (solo per cache incrementale e idle)
+            blurred = self._region_background(frame[a:b], frame_size, self.stripe_pyramids[index])
+            np.copyto(background[y0:y1], blurred[y0 - a:y1 - a])
+        
+        self.stripe_executor.run('blur', blur_stripe, frame.shape[0], overlap, align)
+        return background
+    
+    def _blur_margin(self, frame_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Raggio totale dei filtri (sovrapposizione di strisce e regioni) e allineamento richiesto"""
+        effective_intensity = self.blur_intensity * self.intensity_multiplier
+        if self.algorithm == 'pyramid':
+            return self.pyramid_blur.stripe_margin(PyramidBlur.sigma_for(effective_intensity), frame_size)
+        elif self.algorithm == 'optimized':
+            # Somma dei raggi della cascata (anche a metà risoluzione) con margine
+            return int(effective_intensity) + 8, 2
+        # Gaussiano di raggio blur_intensity + median fino a 15 px
+        return int(self.blur_intensity) + 8, 1
     
     def _apply_optimized_blur(self, frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
         """Blur ottimizzato per intensità alta con prestazioni buone"""
+        blurred_bg = self.blur_background(frame)
+        
+        # Componi con bordo sfumato (blur soft solo sul canale alpha)
+        return self.compositor.composite(frame, blurred_bg, mask, (5, 1.5))
+    
+    def _optimized_background(self, frame: np.ndarray) -> np.ndarray:
+        """Sfondo sfocato con la cascata ottimizzata (intensità effettiva)"""
         
         # Calcola intensità effettiva con moltiplicatore
         effective_intensity = int(self.blur_intensity * self.intensity_multiplier)
@@ -92,19 +345,20 @@ class EffectsProcessor:
             if final_kernel % 2 == 0:
                 final_kernel += 1
             blurred_bg = cv2.GaussianBlur(blurred_bg, (final_kernel, final_kernel), 0)
-
-        # Applica mask con blur soft per transizioni smooth
-        mask_3ch = np.stack([mask] * 3, axis=-1)
-        mask_blurred = cv2.GaussianBlur(mask_3ch, (5, 5), 1.5)
         
-        # Componi risultato finale
-        result = frame * mask_blurred + blurred_bg * (1 - mask_blurred)
-        return result.astype(np.uint8)
+        return blurred_bg
     
     def _apply_quality_blur(self, frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
         """Blur di qualità massima (per confronto)"""
+        blurred_bg = self.blur_background(frame)
+
+        # Componi con bordo sfumato (blur soft solo sul canale alpha)
+        return self.compositor.composite(frame, blurred_bg, mask, (3, 1))
+    
+    def _quality_background(self, frame: np.ndarray) -> np.ndarray:
+        """Sfondo sfocato di qualità (gaussiano + median per intensità alta)"""
         # Implementazione blur di qualità (più lenta)
-        kernel_size = max(3, self.blur_intensity * 2 + 1)
+        kernel_size = max(3, int(self.blur_intensity) * 2 + 1)
         if kernel_size % 2 == 0:
             kernel_size += 1
         
@@ -115,14 +369,8 @@ class EffectsProcessor:
             if kernel_size_bokeh % 2 == 0:
                 kernel_size_bokeh += 1
             blurred_bg = cv2.medianBlur(blurred_bg, kernel_size_bokeh)
-
-        # Mask a 3 canali con blur per transizioni smooth
-        mask_3ch = np.stack([mask] * 3, axis=-1)
-        mask_blurred = cv2.GaussianBlur(mask_3ch, (3, 3), 1)
-
-        # Componi risultato finale
-        result = frame * mask_blurred + blurred_bg * (1 - mask_blurred)
-        return result.astype(np.uint8)
+        
+        return blurred_bg
     
     def apply_noise_reduction(self, frame: np.ndarray) -> np.ndarray:
         """Applica riduzione rumore (opzionale)"""
@@ -132,11 +380,31 @@ class EffectsProcessor:
         # Bilateral filter per riduzione rumore veloce
         return cv2.bilateralFilter(frame, 5, 50, 50)
     
-    def set_blur_intensity(self, intensity: int):
-        """Imposta intensità blur"""
+    def set_blur_intensity(self, intensity: float):
+        """Imposta intensità blur (1-25, frazionaria con l'algoritmo 'pyramid')"""
         self.blur_intensity = max(1, min(25, intensity))
         self.config.set('effects.blur_intensity', intensity)
     
+    def set_background_mode(self, mode: str):
+        """Imposta modalità sfondo: 'blur' o 'replace' (immagine)"""
+        if mode not in ('blur', 'replace'):
+            return
+        self.background_mode = mode
+        self.config.set('effects.background_mode', mode)
+    
+    def set_background_image(self, path: str) -> bool:
+        """Seleziona l'immagine di sfondo e la prepara alla risoluzione camera (fuori dal frame loop)"""
+        camera_width = self.config.get('video.camera_width', 1280)
+        camera_height = self.config.get('video.camera_height', 720)
+        sizes = [(camera_width, camera_height)] \
+            if isinstance(camera_width, int) and isinstance(camera_height, int) else []
+        
+        if not self.background_store.select(path, sizes):
+            return False
+        self.config.set('effects.background_image', path)
+        print(f"🖼️ Sfondo di sostituzione: {path}")
+        return True
+    
     def set_noise_reduction(self, enabled: bool):
         """Abilita/disabilita noise reduction"""
         self.noise_reduction = enabled
@@ -146,5 +414,19 @@ class EffectsProcessor:
         """Ottieni statistiche effetti"""
         return {
             'blur_intensity': self.blur_intensity,
-            'noise_reduction': self.noise_reduction
+            'algorithm': self.algorithm,
+            'background_mode': self.background_mode,
+            'background_store': self.background_store.get_stats(),
+            'pyramid': self.pyramid_blur.get_stats() if self.algorithm == 'pyramid' else None,
+            'noise_reduction': self.noise_reduction,
+            'idle_frames_reused': self.idle_frames_reused,
+            'idle_cpu_saved_ms': round(self.idle_cpu_saved_ms, 1),
+            'compositor': self.compositor.get_stats(),
+            'stripes': self.stripe_executor.get_stats() if self.stripe_executor else None,
+            'incremental_blur': self.incremental_blur.get_stats() if self._incremental_enabled() else None
         }
+    
+    def cleanup(self):
+        """Ferma il pool dei thread a strisce"""
+        if self.stripe_executor:
+            self.stripe_executor.close()
@@ -0,0 +1,87 @@
+# =============================================================================
+# File 19: src/core/guided_filter.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import Tuple, Dict, List
+
+
+class FastGuidedFilter:
+    """Guided filter (He et al.) con box filter: costo O(1) per pixel qualunque sia il raggio
+
+    I risultati sono scritti in buffer interni riusati tra le chiamate: restano validi
+    fino alla chiamata successiva sulla stessa istanza.
+    """
+
+    def __init__(self, radius: int = 2, eps: float = 1e-3):
+        self.radius = max(1, radius)
+        self.eps = eps
+        self.kernel = (2 * self.radius + 1, 2 * self.radius + 1)
+
+        # Buffer float32 per forma: 5 per i coefficienti, 3 per l'output a piena risoluzione
+        self._buffers: Dict[Tuple[str, Tuple[int, ...]], List[np.ndarray]] = {}
+        self._guide_resized: Dict[Tuple[int, ...], np.ndarray] = {}
+
+    def _get_buffers(self, kind: str, shape: Tuple[int, ...], count: int) -> List[np.ndarray]:
+        """Buffer float32 preallocati per (uso, forma)"""
+        key = (kind, shape)
+        buffers = self._buffers.get(key)
+        if buffers is None:
+            # Cambio risoluzione: i buffer della forma precedente non servono più
+            self._buffers = {k: v for k, v in self._buffers.items() if k[0] != kind}
+            buffers = [np.empty(shape, dtype=np.float32) for _ in range(count)]
+            self._buffers[key] = buffers
+        return buffers
+
+    def _box(self, image: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """Media su finestra (2r+1)x(2r+1) con immagine integrale interna a OpenCV"""
+        return cv2.boxFilter(image, -1, self.kernel, dst=dst, borderType=cv2.BORDER_REFLECT)
+
+    def _coefficients(self, guide: np.ndarray, src: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Coefficienti lineari locali (a, b) tali che src ≈ a * guide + b"""
+        mean_i, mean_p, corr_ip, corr_ii, tmp = self._get_buffers('coefficients', guide.shape, 5)
+
+        self._box(guide, mean_i)
+        self._box(src, mean_p)
+        self._box(np.multiply(guide, src, out=corr_ip), corr_ip)
+        self._box(np.multiply(guide, guide, out=corr_ii), corr_ii)
+
+        # var_i + eps e cov_ip, in-place
+        var_i = np.subtract(corr_ii, np.multiply(mean_i, mean_i, out=tmp), out=corr_ii)
+        var_i += self.eps
+        cov_ip = np.subtract(corr_ip, np.multiply(mean_i, mean_p, out=tmp), out=corr_ip)
+
+        a = np.divide(cov_ip, var_i, out=cov_ip)
+        b = np.subtract(mean_p, np.multiply(a, mean_i, out=tmp), out=mean_p)
+        return self._box(a, mean_i), self._box(b, corr_ii)
+
+    def filter(self, guide: np.ndarray, src: np.ndarray) -> np.ndarray:
+        """Filtra src (float32 0-1) seguendo i bordi di guide (grigio float32 0-1), stessa risoluzione"""
+        mean_a, mean_b = self._coefficients(guide, src)
+        _, _, _, _, output = self._get_buffers('coefficients', guide.shape, 5)
+        np.multiply(mean_a, guide, out=output)
+        output += mean_b
+        return output
+
+    def upsample(self, guide_full: np.ndarray, src_low: np.ndarray) -> np.ndarray:
+        """Fast guided upsampling: coefficienti a bassa risoluzione applicati al guide uint8 pieno"""
+        low_size = (src_low.shape[1], src_low.shape[0])
+        full_size = (guide_full.shape[1], guide_full.shape[0])
+
+        # Resize nel tipo del guide (uint8: un dst float32 verrebbe ignorato), poi float 0-1
+        guide_low, = self._get_buffers('guide', src_low.shape, 1)
+        guide_resized = self._guide_resized.get(src_low.shape)
+        if guide_resized is None:
+            guide_resized = np.empty(src_low.shape, dtype=guide_full.dtype)
+            self._guide_resized = {src_low.shape: guide_resized}
+        cv2.resize(guide_full, low_size, dst=guide_resized, interpolation=cv2.INTER_LINEAR)
+        cv2.multiply(guide_resized, 1.0, dst=guide_low, scale=1.0 / 255.0, dtype=cv2.CV_32F)
+        mean_a, mean_b = self._coefficients(guide_low, src_low)
+
+        # Unico passaggio a piena risoluzione: due resize e un multiply-add su un canale
+        full_a, full_b, result = self._get_buffers('full', guide_full.shape[:2], 3)
+        cv2.resize(mean_a, full_size, dst=full_a, interpolation=cv2.INTER_LINEAR)
+        cv2.resize(mean_b, full_size, dst=full_b, interpolation=cv2.INTER_LINEAR)
+        cv2.multiply(guide_full, full_a, dst=result, scale=1.0 / 255.0, dtype=cv2.CV_32F)
+        return cv2.add(result, full_b, dst=result)
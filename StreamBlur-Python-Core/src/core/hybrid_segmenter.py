@@ -0,0 +1,175 @@
+# =============================================================================
+# File 29: src/core/hybrid_segmenter.py
+# =============================================================================
+
+import time
+import cv2
+import numpy as np
+from typing import Callable, Optional, Tuple, Dict, Any
+
+from .segmentation_worker import SegmentationWorker
+
+
+class HybridSegmenter:
+    """Segmentazione a due livelli: modello veloce su ogni frame, accurato ogni N frame
+
+    La mask accurata corregge quella veloce solo nella banda incerta attorno al bordo
+    (probabilità veloce tra band_low e band_high, dilatata di band_radius): lontano dal bordo
+    i due modelli concordano e il veloce è già corretto. Il peso della correzione cala con
+    l'età della mask accurata, così un soggetto in movimento non eredita un bordo vecchio.
+    In modalità background l'accurato gira su un worker dedicato e non blocca mai il frame.
+    """
+
+    def __init__(self, accurate_fn: Callable[[np.ndarray], Optional[np.ndarray]], interval: int = 5,
+                 background: bool = True, band_low: float = 0.1, band_high: float = 0.9,
+                 band_radius: int = 4):
+        self.accurate_fn = accurate_fn
+        self.interval = max(1, interval)
+        self.background = background
+        self.band_low = band_low
+        self.band_high = band_high
+        self.band_radius = max(1, band_radius)
+
+        # Worker per l'accurato (stesso slot "ultimo frame" del worker principale)
+        self.worker: Optional[SegmentationWorker] = None
+
+        # Ultima mask accurata (buffer proprio: l'output del backend può essere riusato)
+        self.accurate_mask: Optional[np.ndarray] = None
+        self.frame_index = 0
+        self.accurate_index = 0
+        self.last_result_index = 0
+
+        # Buffer: input copiati per il worker (ring) e calcolo della banda
+        self.inputs: list = []
+        self.next_input = 0
+        self.band: Optional[np.ndarray] = None
+        self.weight: Optional[np.ndarray] = None
+        self.delta: Optional[np.ndarray] = None
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * self.band_radius + 1,) * 2)
+
+        # Stats
+        self.accurate_runs = 0
+        self.accurate_ms = 0.0
+        self.corrected_frames = 0
+        self.band_coverage = 0.0
+
+    def apply(self, mask: np.ndarray, ai_frame: np.ndarray, fresh: bool) -> np.ndarray:
+        """Un frame: lancia l'accurato se è il suo turno e corregge in-place la mask veloce
+        
+        fresh = False per mask non prodotte dal modello su questo frame (propagate dal flow).
+        """
+        self.frame_index += 1
+        if fresh and self.due():
+            self.submit(ai_frame, self.frame_index, mask.shape[:2])
+        return self.correct(mask, self.frame_index)
+
+    def due(self) -> bool:
+        """True se il frame corrente deve passare anche dal modello accurato"""
+        return self.frame_index - self.accurate_index >= self.interval or self.accurate_index == 0
+
+    def submit(self, ai_frame: np.ndarray, frame_index: int, mask_shape: Tuple[int, int]):
+        """Lancia il modello accurato sul frame (in linea o sul worker)"""
+        self.accurate_index = frame_index
+
+        if not self.background:
+            self._store(self._run_accurate(ai_frame, mask_shape), frame_index)
+            return
+
+        if self.worker is None:
+            self.worker = SegmentationWorker(self._run_accurate)
+        if not self.worker.is_running:
+            self.worker.start()
+
+        # Il buffer AI del processore viene riscritto al prossimo frame: copia in un ring proprio
+        if len(self.inputs) != 3 or self.inputs[0].shape != ai_frame.shape:
+            self.inputs = [np.empty_like(ai_frame) for _ in range(3)]
+        frame_copy = self.inputs[self.next_input]
+        self.next_input = (self.next_input + 1) % len(self.inputs)
+        np.copyto(frame_copy, ai_frame)
+        self.worker.submit(frame_copy, mask_shape, frame_index)
+
+    def _run_accurate(self, ai_frame: np.ndarray, mask_shape: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Inferenza accurata alla forma della mask veloce (float32 0-1)"""
+        start_time = time.perf_counter()
+        mask = self.accurate_fn(ai_frame)
+        if mask is None:
+            return None
+        if mask.shape[:2] != mask_shape:
+            mask = cv2.resize(mask.astype(np.float32, copy=False), (mask_shape[1], mask_shape[0]))
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        self.accurate_ms = 0.9 * self.accurate_ms + 0.1 * elapsed_ms if self.accurate_runs else elapsed_ms
+        self.accurate_runs += 1
+        # Copia propria: il backend può riusare il suo buffer di output alla prossima inferenza
+        return np.array(mask, dtype=np.float32)
+
+    def _store(self, mask: Optional[np.ndarray], frame_index: int):
+        if mask is None:
+            return
+        if self.accurate_mask is None or self.accurate_mask.shape != mask.shape:
+            self.accurate_mask = np.empty(mask.shape, dtype=np.float32)
+        np.copyto(self.accurate_mask, mask)
+        self.last_result_index = frame_index
+
+    def correct(self, mask: np.ndarray, frame_index: int) -> np.ndarray:
+        """Corregge in-place la mask veloce (float32 0-1) nella banda incerta"""
+        if self.worker is not None:
+            result = self.worker.latest()
+            if result is not None and result.frame_index != self.last_result_index:
+                self._store(result.mask, result.frame_index)
+
+        accurate = self.accurate_mask
+        if accurate is None or accurate.shape != mask.shape:
+            return mask
+
+        # Fiducia lineare nell'età: 1 sul frame stesso, 0 dopo 2 intervalli
+        age = frame_index - self.last_result_index
+        confidence = max(0.0, 1.0 - age / (2.0 * self.interval))
+        if confidence <= 0.0:
+            return mask
+
+        if self.band is None or self.band.shape != mask.shape:
+            self.band = np.empty(mask.shape, dtype=np.uint8)
+            self.weight = np.empty(mask.shape, dtype=np.float32)
+            self.delta = np.empty(mask.shape, dtype=np.float32)
+
+        # Banda incerta della mask veloce, dilatata e sfumata per non creare cuciture
+        cv2.inRange(mask, self.band_low, self.band_high, dst=self.band)
+        cv2.dilate(self.band, self.kernel, dst=self.band)
+        cv2.GaussianBlur(self.band, (0, 0), self.band_radius / 2, dst=self.band)
+        self.band_coverage = cv2.countNonZero(self.band) / self.band.size
+
+        # mask += peso * (accurata - veloce)
+        cv2.multiply(self.band, confidence / 255.0, dst=self.weight, dtype=cv2.CV_32F)
+        cv2.subtract(accurate, mask, dst=self.delta)
+        cv2.multiply(self.delta, self.weight, dst=self.delta)
+        cv2.add(mask, self.delta, dst=mask)
+
+        self.corrected_frames += 1
+        return mask
+
+    def reset(self):
+        """Dimentica la mask accurata (cambio modello, risoluzione o restart)"""
+        self.accurate_mask = None
+        self.frame_index = 0
+        self.accurate_index = 0
+        self.last_result_index = 0
+
+    def stop(self):
+        """Ferma il worker dell'accurato"""
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+        self.reset()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche modalità ibrida"""
+        return {
+            'interval': self.interval,
+            'background': self.background,
+            'accurate_runs': self.accurate_runs,
+            'accurate_ms': round(self.accurate_ms, 2),
+            'corrected_frames': self.corrected_frames,
+            'band_coverage': round(self.band_coverage, 4),
+            'worker': self.worker.get_stats() if self.worker else None
+        }
@@ -0,0 +1,170 @@
+# =============================================================================
+# File 34: src/core/incremental_blur.py
+# =============================================================================
+
+import time
+import cv2
+import numpy as np
+from typing import Callable, List, Optional, Tuple, Dict, Any
+
+from .buffer_pool import BufferPool
+
+Rect = Tuple[int, int, int, int]  # x0, y0, x1, y1 in pixel del frame
+
+
+class IncrementalBlur:
+    """Sfondo sfocato incrementale per camere fisse: si risfocano solo i tile cambiati
+
+    Ogni frame è confrontato (differenza in grigio per pixel) con il frame di riferimento,
+    cioè quello da cui è stato sfocato ogni pixel della cache. Un tile è sporco se almeno
+    min_pixels pixel superano la soglia (conteggi esatti con cv2.integral): il rumore del
+    sensore resta sotto soglia, un bordo che si sposta di un pixel no. I tile sporchi,
+    dilatati del raggio del blur, formano regioni (componenti connesse sulla griglia);
+    ogni regione viene risfocata leggendo il raggio oltre i propri bordi e scritta nella
+    cache insieme al nuovo riferimento. Un refresh completo ogni refresh_interval frame,
+    o con troppi tile sporchi, riallinea tutto.
+    """
+
+    def __init__(self, tile_size: int = 32, threshold: float = 10.0, refresh_interval: int = 60,
+                 max_dirty_ratio: float = 0.5, min_pixels: int = 4):
+        self.tile_size = max(8, tile_size)
+        self.threshold = threshold
+        self.refresh_interval = max(1, refresh_interval)
+        self.max_dirty_ratio = max_dirty_ratio
+        self.min_pixels = max(1, min_pixels)
+        self.buffers = BufferPool()
+
+        # Cache: sfondo sfocato e frame da cui è stato calcolato
+        self.background: Optional[np.ndarray] = None
+        self.reference: Optional[np.ndarray] = None
+        self.frames_since_refresh = 0
+
+        # Griglia dei tile per forma del frame (ultimo tile di riga/colonna eventualmente parziale)
+        self.grid_shape: Tuple[int, int] = (0, 0)
+        self.tile_rows = np.zeros(1, dtype=np.intp)
+        self.tile_cols = np.zeros(1, dtype=np.intp)
+
+        # Stats
+        self.dirty_ratio = 1.0
+        self.average_dirty_ratio = 0.0
+        self.regions = 0
+        self.full_refreshes = 0
+        self.partial_frames = 0
+        self.full_blur_ms = 0.0
+        self.cpu_saved_ms = 0.0
+
+    def blur(self, frame: np.ndarray, full_blur: Callable[[np.ndarray], np.ndarray],
+             region_blur: Callable[[np.ndarray], np.ndarray], margin: int, align: int = 1) -> np.ndarray:
+        """Sfondo sfocato del frame; la cache restituita viene aggiornata in-place ai frame successivi
+
+        full_blur(frame) e region_blur(ritaglio) sfocano con l'algoritmo corrente;
+        margin/align: raggio totale del blur e allineamento richiesto dalle regioni.
+        """
+        start_time = time.perf_counter()
+        height, width = frame.shape[:2]
+
+        if self._needs_refresh(frame):
+            return self._refresh(frame, full_blur, start_time)
+
+        dirty = self._dirty_tiles(frame)
+        self.dirty_ratio = float(np.count_nonzero(dirty)) / dirty.size
+        if self.dirty_ratio > self.max_dirty_ratio:
+            return self._refresh(frame, full_blur, start_time)
+
+        self.frames_since_refresh += 1
+        self.partial_frames += 1
+
+        rects = self._regions(dirty, margin)
+        for x0, y0, x1, y1 in rects:
+            # Lettura allargata del raggio e allineata (griglia della piramide come a frame intero)
+            left, top = max(0, (x0 - margin) // align * align), max(0, (y0 - margin) // align * align)
+            right = min(width, -(-(x1 + margin) // align) * align)
+            bottom = min(height, -(-(y1 + margin) // align) * align)
+            blurred = region_blur(frame[top:bottom, left:right])
+            np.copyto(self.background[y0:y1, x0:x1], blurred[y0 - top:y1 - top, x0 - left:x1 - left])
+            # La regione risfocata ha un nuovo riferimento
+            np.copyto(self.reference[y0:y1, x0:x1], frame[y0:y1, x0:x1])
+
+        self.regions = len(rects)
+        self._record(start_time, partial=True)
+        return self.background
+
+    def _needs_refresh(self, frame: np.ndarray) -> bool:
+        return self.background is None or self.background.shape != frame.shape or \
+            self.frames_since_refresh >= self.refresh_interval
+
+    def _dirty_tiles(self, frame: np.ndarray) -> np.ndarray:
+        """Tile con almeno min_pixels pixel cambiati oltre soglia rispetto al riferimento"""
+        height, width = frame.shape[:2]
+        if self.grid_shape != (height, width):
+            self.grid_shape = (height, width)
+            self.tile_rows = np.unique(np.minimum(np.arange(0, height + self.tile_size, self.tile_size), height))
+            self.tile_cols = np.unique(np.minimum(np.arange(0, width + self.tile_size, self.tile_size), width))
+
+        difference = cv2.absdiff(frame, self.reference, dst=self.buffers.get('difference', frame.shape))
+        gray = cv2.cvtColor(difference, cv2.COLOR_BGR2GRAY, dst=self.buffers.get('difference_gray', (height, width)))
+        cv2.threshold(gray, self.threshold, 1, cv2.THRESH_BINARY, dst=gray)
+
+        # Pixel cambiati per tile: somme esatte dall'immagine integrale
+        integral = cv2.integral(gray, sum=self.buffers.get('integral', (height + 1, width + 1), np.int32))
+        corners = integral[np.ix_(self.tile_rows, self.tile_cols)]
+        counts = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+        return counts >= self.min_pixels
+
+    def _refresh(self, frame: np.ndarray, full_blur: Callable[[np.ndarray], np.ndarray],
+                 start_time: float) -> np.ndarray:
+        """Blur completo: nuova cache e nuovo riferimento per tutti i tile"""
+        blurred = full_blur(frame)
+        if self.background is None or self.background.shape != frame.shape:
+            self.background = np.empty_like(frame)
+        np.copyto(self.background, blurred)
+        if self.reference is None or self.reference.shape != frame.shape:
+            self.reference = np.empty_like(frame)
+        np.copyto(self.reference, frame)
+
+        self.frames_since_refresh = 0
+        self.full_refreshes += 1
+        self.dirty_ratio = 1.0
+        self.regions = 1
+        self._record(start_time, partial=False)
+        return self.background
+
+    def _regions(self, dirty: np.ndarray, margin: int) -> List[Rect]:
+        """Rettangoli da risfocare: tile sporchi dilatati del raggio, uno per componente connessa"""
+        if not dirty.any():
+            return []
+
+        margin_tiles = -(-margin // self.tile_size)
+        kernel = np.ones((2 * margin_tiles + 1, 2 * margin_tiles + 1), dtype=np.uint8)
+        grown = cv2.dilate(dirty.astype(np.uint8), kernel)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+        return [(int(self.tile_cols[x]), int(self.tile_rows[y]), int(self.tile_cols[x + w]), int(self.tile_rows[y + h]))
+                for x, y, w, h, _ in stats[1:count]]
+
+    def _record(self, start_time: float, partial: bool):
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        if partial:
+            self.cpu_saved_ms += max(0.0, self.full_blur_ms - elapsed_ms)
+        else:
+            self.full_blur_ms = elapsed_ms if self.full_refreshes == 1 else 0.9 * self.full_blur_ms + 0.1 * elapsed_ms
+        total = self.full_refreshes + self.partial_frames
+        self.average_dirty_ratio = self.dirty_ratio if total == 1 \
+            else 0.95 * self.average_dirty_ratio + 0.05 * self.dirty_ratio
+
+    def reset(self):
+        """Forza un refresh completo al prossimo frame"""
+        self.background = None
+        self.reference = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche blur incrementale (rapporto di tile sporchi)"""
+        return {
+            'dirty_ratio': round(self.dirty_ratio, 4),
+            'average_dirty_ratio': round(self.average_dirty_ratio, 4),
+            'regions': self.regions,
+            'full_refreshes': self.full_refreshes,
+            'partial_frames': self.partial_frames,
+            'full_blur_ms': round(self.full_blur_ms, 2),
+            'cpu_saved_ms': round(self.cpu_saved_ms, 1)
+        }
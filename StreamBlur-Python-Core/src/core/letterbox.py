@@ -0,0 +1,114 @@
+# =============================================================================
+# File 28: src/core/letterbox.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import Dict, Tuple, Any
+
+Size = Tuple[int, int]  # (width, height)
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+
+class LetterboxMapper:
+    """Input AI con aspect ratio preservato (bande di riempimento) e mask riportata al frame
+
+    Entrambe le direzioni sono un unico cv2.remap su mappe precalcolate (fixed-point,
+    cv2.convertMaps) e tenute in cache per coppia di risoluzioni: un cambio di camera o
+    di qualità AI ricostruisce le mappe al primo frame con le nuove dimensioni.
+    """
+
+    def __init__(self, fill_value: int = 0, max_entries: int = 8):
+        self.fill_value = fill_value
+        self.max_entries = max_entries
+
+        # Cache: (frame_size, ai_size) -> mappe frame->AI; (frame_size, ai_size, mask_size) -> mappe AI->mask
+        self.forward_maps: Dict[Tuple[Size, Size], Tuple[np.ndarray, np.ndarray]] = {}
+        self.inverse_maps: Dict[Tuple[Size, Size, Size], Tuple[np.ndarray, np.ndarray]] = {}
+
+        # Stats
+        self.content_rect: Rect = (0, 0, 0, 0)
+        self.rebuilds = 0
+
+    @staticmethod
+    def content(frame_size: Size, ai_size: Size) -> Rect:
+        """Area del frame dentro l'input AI (il resto sono bande)"""
+        scale = min(ai_size[0] / frame_size[0], ai_size[1] / frame_size[1])
+        width = min(ai_size[0], max(1, int(round(frame_size[0] * scale))))
+        height = min(ai_size[1], max(1, int(round(frame_size[1] * scale))))
+        return ((ai_size[0] - width) // 2, (ai_size[1] - height) // 2, width, height)
+
+    def is_identity(self, frame_size: Size, ai_size: Size) -> bool:
+        """True se il frame ha lo stesso aspect dell'input AI: nessuna banda da togliere"""
+        _, _, width, height = self.content(frame_size, ai_size)
+        return (width, height) == ai_size
+
+    def _store(self, cache: Dict, key, map_x: np.ndarray, map_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if len(cache) >= self.max_entries:
+            cache.clear()
+        maps = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+        cache[key] = maps
+        self.rebuilds += 1
+        return maps
+
+    def _forward(self, frame_size: Size, ai_size: Size) -> Tuple[np.ndarray, np.ndarray]:
+        """Mappe pixel AI -> pixel frame (stessa convenzione centro-pixel di cv2.resize)"""
+        key = (frame_size, ai_size)
+        maps = self.forward_maps.get(key)
+        if maps is not None:
+            return maps
+
+        x, y, width, height = self.content(frame_size, ai_size)
+        columns = (np.arange(ai_size[0], dtype=np.float32) - x + 0.5) * (frame_size[0] / width) - 0.5
+        rows = (np.arange(ai_size[1], dtype=np.float32) - y + 0.5) * (frame_size[1] / height) - 0.5
+
+        # Bande: coordinate fuori dal frame -> fill_value (BORDER_CONSTANT)
+        column_index = np.arange(ai_size[0])
+        row_index = np.arange(ai_size[1])
+        columns[(column_index < x) | (column_index >= x + width)] = -frame_size[0]
+        rows[(row_index < y) | (row_index >= y + height)] = -frame_size[1]
+
+        map_x, map_y = np.meshgrid(columns, rows)
+        return self._store(self.forward_maps, key, map_x, map_y)
+
+    def _inverse(self, frame_size: Size, ai_size: Size, mask_size: Size) -> Tuple[np.ndarray, np.ndarray]:
+        """Mappe pixel mask (dominio del frame) -> pixel dell'area utile nell'output AI"""
+        key = (frame_size, ai_size, mask_size)
+        maps = self.inverse_maps.get(key)
+        if maps is not None:
+            return maps
+
+        x, y, width, height = self.content(frame_size, ai_size)
+        columns = x + (np.arange(mask_size[0], dtype=np.float32) + 0.5) * (width / mask_size[0]) - 0.5
+        rows = y + (np.arange(mask_size[1], dtype=np.float32) + 0.5) * (height / mask_size[1]) - 0.5
+
+        map_x, map_y = np.meshgrid(columns, rows)
+        return self._store(self.inverse_maps, key, map_x, map_y)
+
+    def to_ai(self, frame: np.ndarray, ai_size: Size, dst: np.ndarray) -> np.ndarray:
+        """Frame camera -> input AI con bande (resize e padding in un solo remap)"""
+        frame_size = (frame.shape[1], frame.shape[0])
+        self.content_rect = self.content(frame_size, ai_size)
+        map1, map2 = self._forward(frame_size, ai_size)
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR, dst=dst,
+                         borderMode=cv2.BORDER_CONSTANT, borderValue=(self.fill_value,) * 3)
+
+    def from_ai(self, mask: np.ndarray, frame_size: Size, mask_size: Size, dst: np.ndarray) -> np.ndarray:
+        """Mask nel dominio dell'input AI -> mask sull'intero frame alla risoluzione mask_size"""
+        ai_size = (mask.shape[1], mask.shape[0])
+        map1, map2 = self._inverse(frame_size, ai_size, mask_size)
+        return cv2.remap(mask, map1, map2, cv2.INTER_LINEAR, dst=dst, borderMode=cv2.BORDER_REPLICATE)
+
+    def clear(self):
+        """Svuota la cache delle mappe"""
+        self.forward_maps.clear()
+        self.inverse_maps.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche letterbox"""
+        x, y, width, height = self.content_rect
+        return {
+            'content': f"{width}x{height}+{x}+{y}",
+            'cached_maps': len(self.forward_maps) + len(self.inverse_maps),
+            'rebuilds': self.rebuilds
+        }
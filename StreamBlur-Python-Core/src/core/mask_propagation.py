@@ -0,0 +1,133 @@
+# =============================================================================
+# File 17: src/core/mask_propagation.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Dict, Any
+
+
+class FlowMaskPropagator:
+    """Propagazione della mask tra keyframe con optical flow denso (DIS) a risoluzione AI"""
+
+    def __init__(self, max_interval: int = 3, min_interval: int = 1,
+                 motion_low: float = 0.3, motion_high: float = 2.0):
+        self.max_interval = max(1, max_interval)
+        self.min_interval = max(1, min(min_interval, self.max_interval))
+        self.motion_low = motion_low
+        self.motion_high = motion_high
+
+        # Intervallo keyframe corrente (adattato al movimento misurato)
+        self.interval = self.max_interval
+        self.frames_since_keyframe = 0
+
+        # DIS ultrafast: pochi ms a 512x288
+        self.flow_engine = cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST)
+
+        # Stato: ultimo frame grigio e ultima mask (keyframe o propagata)
+        self.prev_gray: Optional[np.ndarray] = None
+        self.prev_mask: Optional[np.ndarray] = None
+
+        # Griglia di coordinate cache per dimensione e buffer riusati (flow, mappa, mask)
+        self._grid: Optional[np.ndarray] = None
+        self._grid_size: Optional[Tuple[int, int]] = None
+        self._flow: Optional[np.ndarray] = None
+        self._map: Optional[np.ndarray] = None
+        self._magnitude: Optional[np.ndarray] = None
+        self._masks = []
+        self._next_mask = 0
+
+        # Stats
+        self.keyframes = 0
+        self.propagated_frames = 0
+        self.last_motion = 0.0
+
+    def needs_keyframe(self, gray: np.ndarray) -> bool:
+        """True se questo frame deve passare dal modello di segmentazione"""
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            return True
+        return self.frames_since_keyframe + 1 >= self.interval
+
+    def set_keyframe(self, gray: np.ndarray, mask: np.ndarray):
+        """Registra il risultato del modello come nuovo keyframe"""
+        self.prev_gray = self._store_gray(gray)
+        self.prev_mask = self._next_mask_buffer(mask.shape, mask.dtype)
+        np.copyto(self.prev_mask, mask)
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+
+    def propagate(self, gray: np.ndarray) -> np.ndarray:
+        """Deforma l'ultima mask sul frame corrente seguendo il flow"""
+        # Flow all'indietro (corrente -> precedente): per ogni pixel dove campionare la mask
+        grid = self._coordinate_grid(gray.shape)
+        flow = self.flow_engine.calc(gray, self.prev_gray, self._flow)
+        self._flow = flow
+        sample_map = cv2.add(grid, flow, dst=self._map)
+        warped = cv2.remap(self.prev_mask, sample_map, None, cv2.INTER_LINEAR,
+                           dst=self._next_mask_buffer(self.prev_mask.shape, self.prev_mask.dtype),
+                           borderMode=cv2.BORDER_REPLICATE)
+
+        self._adapt_interval(flow)
+
+        self.prev_gray = self._store_gray(gray)
+        self.prev_mask = warped
+        self.frames_since_keyframe += 1
+        self.propagated_frames += 1
+        return warped
+
+    def _coordinate_grid(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Griglia (x, y) float32 per cv2.remap, ricostruita solo se cambia la dimensione"""
+        height, width = shape[:2]
+        if self._grid_size != (width, height):
+            xs, ys = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+            self._grid = np.dstack((xs, ys))
+            self._grid_size = (width, height)
+            self._flow = np.zeros_like(self._grid)
+            self._map = np.empty_like(self._grid)
+            self._magnitude = np.empty((height, width), dtype=np.float32)
+        return self._grid
+
+    def _store_gray(self, gray: np.ndarray) -> np.ndarray:
+        """Copia il frame grigio nel buffer interno (l'input può essere un buffer riusato dal chiamante)"""
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            return gray.copy()
+        np.copyto(self.prev_gray, gray)
+        return self.prev_gray
+
+    def _next_mask_buffer(self, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """Doppio buffer mask: la mask propagata precedente resta valida mentre si calcola la nuova"""
+        if not self._masks or self._masks[0].shape != shape or self._masks[0].dtype != dtype:
+            self._masks = [np.empty(shape, dtype=dtype) for _ in range(2)]
+        buffer = self._masks[self._next_mask]
+        self._next_mask = (self._next_mask + 1) % 2
+        return buffer
+
+    def _adapt_interval(self, flow: np.ndarray):
+        """Movimento alto -> keyframe più frequenti; scena calma -> intervallo più lungo"""
+        # |flow| per pixel senza copie dei due canali (cv2.magnitude li renderebbe contigui)
+        magnitude = np.einsum('ijk,ijk->ij', flow, flow, out=self._magnitude)
+        np.sqrt(magnitude, out=magnitude)
+        self.last_motion = float(cv2.mean(magnitude)[0])
+
+        if self.last_motion > self.motion_high:
+            self.interval = max(self.min_interval, self.interval - 1)
+        elif self.last_motion < self.motion_low:
+            self.interval = min(self.max_interval, self.interval + 1)
+
+    def reset(self):
+        """Forza un keyframe sul prossimo frame"""
+        self.prev_gray = None
+        self.prev_mask = None
+        self.frames_since_keyframe = 0
+        self.interval = self.max_interval
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche propagazione"""
+        total = self.keyframes + self.propagated_frames
+        return {
+            'interval': self.interval,
+            'keyframes': self.keyframes,
+            'propagated_frames': self.propagated_frames,
+            'keyframe_ratio': self.keyframes / max(total, 1),
+            'mean_flow_px': round(self.last_motion, 2)
+        }
@@ -0,0 +1,286 @@
+# =============================================================================
+# File 22: src/core/model_pool.py
+# =============================================================================
+
+import time
+import cv2
+import numpy as np
+from threading import Thread, Lock, Event
+from typing import Callable, Optional, Tuple, Dict, Any, Iterable, List
+
+from .segmentation_backends import SegmentationBackend
+
+Size = Tuple[int, int]  # (ai_width, ai_height)
+
+
+def synthetic_frame(width: int, height: int) -> np.ndarray:
+    """Frame BGR sintetico per il warm-up: gradiente con una sagoma chiara al centro"""
+    gradient = np.linspace(40, 200, width, dtype=np.float32)
+    frame = cv2.merge([np.tile(gradient, (height, 1)).astype(np.uint8)] * 3)
+    cv2.ellipse(frame, (width // 2, height * 2 // 3), (width // 6, height // 2), 0, 0, 360, (210, 190, 180), -1)
+    cv2.circle(frame, (width // 2, height // 4), max(1, height // 7), (170, 150, 140), -1)
+    return frame
+
+
+class ModelPool:
+    """Pool di segmentatori tenuti caldi: il cambio modello è uno swap di puntatore al confine di frame
+
+    I modelli vengono creati e scaldati (warmup_iterations inferenze su frame sintetico alla
+    risoluzione AI di destinazione) su un thread in background; il thread di inferenza chiama
+    acquire() all'inizio di ogni frame e passa a modello e risoluzione richiesti solo quando
+    sono pronti. Per un cambio di sola risoluzione viene preparata una nuova istanza del
+    modello attivo. Nessun segmentatore viene chiuso o scaldato mentre un frame lo usa.
+    """
+
+    def __init__(self, factory: Callable[[int], Optional[SegmentationBackend]],
+                 preload: Iterable[int] = (0, 1), warmup_iterations: int = 3):
+        self.factory = factory
+        self.preload = tuple(preload)
+        self.warmup_iterations = max(1, warmup_iterations)
+
+        # Modelli pronti per model_selection, con la risoluzione a cui sono stati scaldati
+        self.lock = Lock()
+        self.models: Dict[int, SegmentationBackend] = {}
+        self.warm_sizes: Dict[int, Size] = {}
+        self.busy: set = set()
+        self.active_selection: Optional[int] = None
+        self.active_size: Optional[Size] = None
+
+        # Richiesta in attesa e istanze sostitutive del modello attivo (nuova risoluzione)
+        self.pending: Optional[Tuple[int, Size]] = None
+        self.requested_at = 0.0
+        self.replacements: Dict[int, Tuple[SegmentationBackend, Size]] = {}
+        self.retired: List[SegmentationBackend] = []
+
+        # Preparazione in background
+        self.thread: Optional[Thread] = None
+        self.wakeup = Event()
+        self.is_running = False
+        self.failed: Dict[int, str] = {}
+
+        # Stats
+        self.switches = 0
+        self.last_switch_ms = 0.0
+        self.max_switch_ms = 0.0
+        self.prepare_ms: Dict[int, float] = {}
+        self.warmups: Dict[int, Dict[str, Any]] = {}
+
+    def start(self, model_selection: int, size: Size) -> bool:
+        """Crea e scalda il modello iniziale (bloccante) e avvia la preparazione degli altri"""
+        backend = self._create(model_selection, size)
+        if backend is None:
+            return False
+
+        with self.lock:
+            self.models[model_selection] = backend
+            self.warm_sizes[model_selection] = size
+            self.active_selection = model_selection
+            self.active_size = size
+
+        self.is_running = True
+        self.thread = Thread(target=self._prepare_loop, daemon=True)
+        self.thread.start()
+        self.wakeup.set()
+        return True
+
+    def _create(self, model_selection: int, size: Size) -> Optional[SegmentationBackend]:
+        """Crea un modello e lo scalda alla risoluzione indicata"""
+        start_time = time.perf_counter()
+        backend = self.factory(model_selection)
+        if backend is None:
+            return None
+
+        self._warmup(model_selection, backend, size)
+        self.prepare_ms[model_selection] = (time.perf_counter() - start_time) * 1000
+        return backend
+
+    def _warmup(self, model_selection: int, backend: SegmentationBackend, size: Size):
+        """Inferenze di warm-up: la prima paga l'inizializzazione del grafo (cold start)"""
+        frame = synthetic_frame(*size)
+        if backend.color_order == 'RGB':
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        timings = []
+        for _ in range(self.warmup_iterations):
+            start_time = time.perf_counter()
+            backend.segment(frame)
+            timings.append((time.perf_counter() - start_time) * 1000)
+
+        self.warmups[model_selection] = {
+            'size': f"{size[0]}x{size[1]}",
+            'iterations': len(timings),
+            'first_ms': round(timings[0], 2),
+            'cold_start_ms': round(backend.cold_latency_ms, 2),
+            'warm_ms': round(min(timings[1:]) if len(timings) > 1 else timings[0], 2)
+        }
+
+    def _next_job(self) -> Optional[Tuple[str, int, Size]]:
+        """Prossimo lavoro del thread di preparazione (sotto lock)"""
+        if self.pending is not None:
+            selection, size = self.pending
+            if selection not in self.failed:
+                if selection not in self.models:
+                    return ('create', selection, size)
+                if self.warm_sizes[selection] != size:
+                    if selection != self.active_selection:
+                        if selection in self.busy:
+                            return None  # In prestito (modalità ibrida): riscaldato al rilascio
+                        return ('rewarm', selection, size)
+                    replacement = self.replacements.get(selection)
+                    if replacement is None or replacement[1] != size:
+                        return ('replace', selection, size)
+
+        for selection in self.preload:
+            if selection not in self.models and selection not in self.failed:
+                return ('create', selection, self.active_size)
+        return None
+
+    def _prepare_loop(self):
+        """Thread di preparazione: crea, scalda e sostituisce modelli; chiude quelli ritirati"""
+        while self.is_running:
+            self.wakeup.wait()
+            self.wakeup.clear()
+
+            while self.is_running:
+                with self.lock:
+                    retired, self.retired = self.retired, []
+                    job = self._next_job()
+                    if job is not None and job[0] == 'rewarm':
+                        self.busy.add(job[1])
+
+                for backend in retired:
+                    backend.close()
+                if job is None:
+                    break
+
+                kind, selection, size = job
+                if kind == 'rewarm':
+                    self._warmup(selection, self.models[selection], size)
+                    with self.lock:
+                        self.warm_sizes[selection] = size
+                        self.busy.discard(selection)
+                    continue
+
+                backend = self._create(selection, size)
+                with self.lock:
+                    if backend is None:
+                        self.failed[selection] = 'initialize fallito'
+                        if self.pending is not None and self.pending[0] == selection:
+                            self.pending = None
+                        print(f"❌ Modello {selection} non disponibile - resta attivo il modello {self.active_selection}")
+                    elif not self.is_running:
+                        self.retired.append(backend)
+                    elif kind == 'replace':
+                        old = self.replacements.get(selection)
+                        if old is not None:
+                            self.retired.append(old[0])
+                        self.replacements[selection] = (backend, size)
+                    else:
+                        self.models[selection] = backend
+                        self.warm_sizes[selection] = size
+                        print(f"🔥 Modello {selection} pronto in {self.prepare_ms[selection]:.0f}ms")
+
+            with self.lock:
+                leftovers, self.retired = self.retired, []
+            for backend in leftovers:
+                backend.close()
+
+    def request(self, model_selection: int, size: Size):
+        """Richiede modello e risoluzione: non blocca, lo swap avviene al prossimo acquire()"""
+        with self.lock:
+            if (model_selection, size) == (self.active_selection, self.active_size):
+                self.pending = None
+                return
+            self.pending = (model_selection, size)
+            self.requested_at = time.perf_counter()
+            # Un nuovo tentativo esplicito riprova anche i modelli falliti
+            self.failed.pop(model_selection, None)
+        self.wakeup.set()
+
+    def acquire(self) -> Tuple[Optional[SegmentationBackend], Optional[Size], Optional[float]]:
+        """Modello e risoluzione per il frame corrente; latenza dello swap (secondi) se appena avvenuto"""
+        with self.lock:
+            if self.pending is not None:
+                selection, size = self.pending
+                replacement = self.replacements.get(selection)
+
+                if selection == self.active_selection and replacement is not None and replacement[1] == size:
+                    # Nuova istanza scaldata alla nuova risoluzione: la vecchia va ritirata
+                    self.retired.append(self.models[selection])
+                    self.models[selection], self.warm_sizes[selection] = replacement
+                    del self.replacements[selection]
+                    self.wakeup.set()
+                elif selection not in self.models or selection in self.busy or self.warm_sizes[selection] != size:
+                    return self.models.get(self.active_selection), self.active_size, None
+
+                self.active_selection, self.active_size = selection, size
+                self.pending = None
+
+                switch_latency = time.perf_counter() - self.requested_at
+                self.switches += 1
+                self.last_switch_ms = switch_latency * 1000
+                self.max_switch_ms = max(self.max_switch_ms, self.last_switch_ms)
+                return self.models[selection], size, switch_latency
+
+            return self.models.get(self.active_selection), self.active_size, None
+
+    def borrow(self, model_selection: int) -> Optional[SegmentationBackend]:
+        """Prende in prestito un modello caldo non attivo (None se assente, attivo o occupato)
+        
+        Finché non viene restituito con release() il pool non lo riscalda né lo rende attivo.
+        """
+        with self.lock:
+            if model_selection == self.active_selection or model_selection in self.busy:
+                return None
+            backend = self.models.get(model_selection)
+            if backend is not None:
+                self.busy.add(model_selection)
+            return backend
+
+    def release(self, model_selection: int):
+        """Restituisce un modello preso con borrow()"""
+        with self.lock:
+            self.busy.discard(model_selection)
+        self.wakeup.set()
+
+    def is_warm(self) -> bool:
+        """True se il modello attivo è scaldato alla risoluzione attiva e non ci sono cambi in attesa"""
+        with self.lock:
+            return self.active_selection in self.models and self.pending is None and \
+                self.warm_sizes.get(self.active_selection) == self.active_size
+
+    def close(self):
+        """Ferma la preparazione e chiude tutti i modelli (il thread di inferenza deve essere fermo)"""
+        self.is_running = False
+        self.wakeup.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=30.0)
+        self.thread = None
+
+        with self.lock:
+            backends = list(self.models.values()) + [backend for backend, _ in self.replacements.values()]
+            backends += self.retired
+            self.models.clear()
+            self.replacements.clear()
+            self.retired = []
+            self.active_selection = None
+            self.pending = None
+
+        for backend in backends:
+            backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche model pool"""
+        with self.lock:
+            return {
+                'active': self.active_selection,
+                'active_size': f"{self.active_size[0]}x{self.active_size[1]}" if self.active_size else None,
+                'pending': self.pending[0] if self.pending else None,
+                'warm_models': sorted(self.models),
+                'failed_models': sorted(self.failed),
+                'switches': self.switches,
+                'last_switch_ms': round(self.last_switch_ms, 2),
+                'max_switch_ms': round(self.max_switch_ms, 2),
+                'prepare_ms': {sel: round(ms, 1) for sel, ms in self.prepare_ms.items()},
+                'warmup': dict(self.warmups)
+            }
@@ -0,0 +1,78 @@
+# =============================================================================
+# File 16: src/core/motion_gate.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Dict, Any
+
+
+class MotionGate:
+    """Rilevatore di cambiamento a bassa risoluzione per saltare l'inferenza su scene statiche"""
+
+    def __init__(self, threshold: float = 3.0, tiles: Tuple[int, int] = (16, 9),
+                 max_skip: int = 10, tile_pixels: int = 4):
+        self.threshold = threshold
+        self.tiles = tiles
+        self.max_skip = max(0, max_skip)
+
+        # Immagine di confronto: tiles * tile_pixels (es. 64x36)
+        self.probe_size = (tiles[0] * tile_pixels, tiles[1] * tile_pixels)
+
+        # Riferimento = frame dell'ultima inferenza (evita deriva lenta)
+        self.reference: Optional[np.ndarray] = None
+        self.frames_since_refresh = 0
+        self.last_score = 0.0
+
+        # Stats
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self.forced_refreshes = 0
+
+    def should_infer(self, gray: np.ndarray) -> bool:
+        """True se la scena è cambiata (o serve un refresh forzato) rispetto all'ultima inferenza"""
+        self.frames_checked += 1
+        probe = cv2.resize(gray, self.probe_size, interpolation=cv2.INTER_AREA)
+
+        if self.reference is None:
+            self._accept(probe)
+            return True
+
+        # Differenza media assoluta per tile
+        diff = cv2.absdiff(probe, self.reference)
+        tile_mad = cv2.resize(diff, self.tiles, interpolation=cv2.INTER_AREA)
+        self.last_score = float(tile_mad.max())
+
+        if self.last_score > self.threshold:
+            self._accept(probe)
+            return True
+
+        if self.frames_since_refresh >= self.max_skip:
+            self.forced_refreshes += 1
+            self._accept(probe)
+            return True
+
+        self.frames_since_refresh += 1
+        self.frames_skipped += 1
+        return False
+
+    def _accept(self, probe: np.ndarray):
+        """Il frame corrente diventa il nuovo riferimento"""
+        self.reference = probe
+        self.frames_since_refresh = 0
+
+    def reset(self):
+        """Forza l'inferenza sul prossimo frame"""
+        self.reference = None
+        self.frames_since_refresh = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche motion gate"""
+        return {
+            'threshold': self.threshold,
+            'frames_checked': self.frames_checked,
+            'frames_skipped': self.frames_skipped,
+            'skip_ratio': self.frames_skipped / max(self.frames_checked, 1),
+            'forced_refreshes': self.forced_refreshes,
+            'last_score': round(self.last_score, 2)
+        }
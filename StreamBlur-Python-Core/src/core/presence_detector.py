@@ -0,0 +1,91 @@
+# =============================================================================
+# File 30: src/core/presence_detector.py
+# =============================================================================
+
+import time
+import cv2
+import numpy as np
+from typing import Optional, Dict, Any
+
+
+class PresenceDetector:
+    """Presenza della persona dalla copertura della mask (nessuna inferenza aggiuntiva)
+
+    Se la copertura resta sotto min_coverage per absence_seconds la pipeline entra in idle:
+    l'inferenza scende a un frame sonda ogni tanto e il compositor riusa uno sfondo
+    sfocato in cache. La prima mask con la persona fa uscire subito dall'idle.
+    """
+
+    def __init__(self, min_coverage: float = 0.01, absence_seconds: float = 5.0):
+        self.min_coverage = min_coverage
+        self.absence_seconds = max(0.0, absence_seconds)
+
+        self.is_idle = False
+        self.coverage = 0.0
+        self.last_seen: Optional[float] = None
+        self.idle_since = 0.0
+
+        # Stats
+        self.idle_entries = 0
+        self.idle_time = 0.0
+        self.idle_frames = 0
+        self.probes = 0
+        self.cpu_saved_ms = 0.0
+
+    def update(self, mask: np.ndarray, now: Optional[float] = None) -> bool:
+        """Aggiorna la presenza con la mask del frame; True se la persona è in scena"""
+        now = time.time() if now is None else now
+        if self.last_seen is None:
+            self.last_seen = now
+
+        # Copertura media della mask (uint8 0-255 o float 0-1): costo trascurabile a risoluzione AI
+        scale = 255.0 if mask.dtype == np.uint8 else 1.0
+        self.coverage = cv2.mean(mask)[0] / scale
+        present = self.coverage >= self.min_coverage
+
+        if present:
+            self.last_seen = now
+            if self.is_idle:
+                self.is_idle = False
+                self.idle_time += now - self.idle_since
+                print(f"👤 Persona rientrata: inferenza a piena frequenza (idle {now - self.idle_since:.1f}s)")
+        elif not self.is_idle and now - self.last_seen >= self.absence_seconds:
+            self.is_idle = True
+            self.idle_since = now
+            self.idle_entries += 1
+            print(f"💤 Nessuna persona da {self.absence_seconds:.1f}s: modalità idle")
+        return present
+
+    def record_idle_frame(self, saved_ms: float):
+        """Frame servito in idle senza inferenza"""
+        self.idle_frames += 1
+        self.cpu_saved_ms += max(0.0, saved_ms)
+
+    def record_probe(self):
+        """Frame sonda: inferenza completa per verificare il rientro"""
+        self.probes += 1
+
+    def idle_seconds(self, now: Optional[float] = None) -> float:
+        """Tempo totale trascorso in idle (incluso il periodo corrente)"""
+        now = time.time() if now is None else now
+        return self.idle_time + (now - self.idle_since if self.is_idle else 0.0)
+
+    def reset(self):
+        """Torna allo stato presente (restart): il timer di assenza riparte"""
+        if self.is_idle:
+            self.idle_time += time.time() - self.idle_since
+        self.is_idle = False
+        self.last_seen = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche presenza/idle"""
+        return {
+            'idle': self.is_idle,
+            'coverage': round(self.coverage, 4),
+            'absence_seconds': self.absence_seconds,
+            'idle_entries': self.idle_entries,
+            'idle_seconds': round(self.idle_seconds(), 1),
+            'idle_frames': self.idle_frames,
+            'probes': self.probes,
+            'cpu_saved_ms': round(self.cpu_saved_ms, 1)
+        }
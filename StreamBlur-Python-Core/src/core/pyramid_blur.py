@@ -0,0 +1,136 @@
+# =============================================================================
+# File 32: src/core/pyramid_blur.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple, Dict, Any
+
+from .buffer_pool import BufferPool
+
+# Sigma a risoluzione frame per unità di intensità effettiva (blur_intensity * intensity_multiplier),
+# tarato sull'aspetto della cascata 'optimized'
+SIGMA_PER_INTENSITY = 0.23
+
+
+class PyramidBlur:
+    """Blur dello sfondo a costo quasi costante: riduci, sfoca con kernel fisso, ingrandisci
+
+    Il livello L della piramide è il frame ridotto L volte di 2x (INTER_AREA) e sfocato con
+    un Gaussian 5x5 fisso: il costo non dipende dall'intensità. Il sigma equivalente di
+    ogni livello è misurato una volta sulla risposta all'impulso (tabella in cache).
+    Un sigma intermedio fonde i due livelli adiacenti alla risoluzione del più grande,
+    poi un solo resize lineare torna al frame: muovere lo slider cambia il peso della
+    fusione o il livello, mai la dimensione del kernel.
+    Sotto il sigma del livello 1 si fonde con il frame intero sfocato 3x3 (il blur minimo della
+    cascata 'optimized'): senza questo pavimento le intensità basse lasciavano il bordo netto.
+    """
+
+    # Tabella sigma per livello (indice 0 = frame nitido), comune a tutte le istanze
+    _level_sigmas: List[float] = []
+
+    def __init__(self, base_sigma: float = 1.0, min_level_size: int = 16):
+        self.base_sigma = base_sigma
+        self.min_level_size = min_level_size
+        self.buffers = BufferPool()
+
+        if not PyramidBlur._level_sigmas:
+            PyramidBlur._level_sigmas = self._calibrate(base_sigma)
+
+        # Stats
+        self.sigma = 0.0
+        self.level = 0
+        self.weight = 0.0
+
+    @staticmethod
+    def sigma_for(effective_intensity: float) -> float:
+        """Sigma a risoluzione frame per un'intensità effettiva (frazionaria)"""
+        return max(0.0, effective_intensity * SIGMA_PER_INTENSITY)
+
+    @classmethod
+    def _calibrate(cls, base_sigma: float, size: int = 512, levels: int = 5) -> List[float]:
+        """Sigma equivalente di ogni livello: stessa catena di blur() applicata a un impulso"""
+        impulse = np.zeros((size, size), dtype=np.float32)
+        impulse[size // 2, size // 2] = 1.0
+        positions = np.arange(size, dtype=np.float64) - size // 2
+
+        sigmas = [0.0]
+        level = impulse
+        for _ in range(levels):
+            level = cv2.resize(level, (level.shape[1] // 2, level.shape[0] // 2), interpolation=cv2.INTER_AREA)
+            response = cv2.resize(cv2.GaussianBlur(level, (5, 5), base_sigma), (size, size),
+                                  interpolation=cv2.INTER_LINEAR).astype(np.float64)
+            profile = response.sum(axis=0)
+            profile /= profile.sum()
+            sigmas.append(float(np.sqrt((profile * positions ** 2).sum())))
+        return sigmas
+
+    def _select(self, sigma: float, max_level: int) -> Tuple[int, float]:
+        """Livello inferiore e peso del superiore per il sigma richiesto"""
+        table = self._level_sigmas[:max_level + 1]
+        for level in range(len(table) - 1):
+            if sigma < table[level + 1]:
+                return level, (sigma - table[level]) / (table[level + 1] - table[level])
+        return len(table) - 2, 1.0
+
+    def _max_level(self, width: int, height: int) -> int:
+        return min(len(self._level_sigmas) - 1,
+                   max(1, int(np.log2(max(1, min(height, width) // self.min_level_size)))))
+
+    def stripe_margin(self, sigma: float, frame_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Sovrapposizione e allineamento per sfocare il frame a strisce con lo stesso risultato
+
+        L'allineamento alla riduzione del livello superiore tiene la griglia di ogni striscia
+        coincidente con quella del frame intero.
+        """
+        level, _ = self._select(sigma, self._max_level(*frame_size))
+        align = 2 ** (level + 1)
+        return int(np.ceil(3 * self._level_sigmas[level + 1])) + 2 * align, align
+
+    def blur(self, frame: np.ndarray, sigma: float, frame_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Frame sfocato con il sigma richiesto (buffer in ring: resta valido per il frame successivo)
+
+        frame_size: dimensione del frame intero se frame è una striscia (stessi livelli del frame).
+        """
+        height, width = frame.shape[:2]
+        self.sigma = sigma
+        self.level, self.weight = self._select(sigma, self._max_level(*(frame_size or (width, height))))
+
+        # Piramide fino al livello superiore: riduzioni INTER_AREA in buffer per livello
+        levels = [frame]
+        for index in range(1, self.level + 2):
+            previous = levels[-1]
+            size = (previous.shape[1] // 2, previous.shape[0] // 2)
+            levels.append(cv2.resize(previous, size, interpolation=cv2.INTER_AREA,
+                                     dst=self.buffers.get(f'level_{index}', (size[1], size[0], 3))))
+
+        upper = levels[self.level + 1]
+        upper = cv2.GaussianBlur(upper, (5, 5), self.base_sigma,
+                                 dst=self.buffers.get('blur_upper', upper.shape))
+        output = self.buffers.ring('pyramid_out', frame.shape, size=2)
+
+        if self.level == 0:
+            # Sigma piccolo: fusione con il frame 3x3 a risoluzione piena (peso invariato)
+            base = cv2.GaussianBlur(frame, (3, 3), 0, dst=self.buffers.get('blur_base', frame.shape))
+            cv2.resize(upper, (width, height), dst=output, interpolation=cv2.INTER_LINEAR)
+            return cv2.addWeighted(base, 1.0 - self.weight, output, self.weight, 0, dst=output)
+
+        # Fusione dei due livelli alla risoluzione del livello inferiore, poi un solo upsample
+        lower = levels[self.level]
+        lower_size = (lower.shape[1], lower.shape[0])
+        blurred_lower = cv2.GaussianBlur(lower, (5, 5), self.base_sigma,
+                                         dst=self.buffers.get('blur_lower', lower.shape))
+        upsampled = cv2.resize(upper, lower_size, interpolation=cv2.INTER_LINEAR,
+                               dst=self.buffers.get('blur_upsampled', lower.shape))
+        mixed = cv2.addWeighted(blurred_lower, 1.0 - self.weight, upsampled, self.weight, 0,
+                                dst=self.buffers.get('blur_mixed', lower.shape))
+        return cv2.resize(mixed, (width, height), dst=output, interpolation=cv2.INTER_LINEAR)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche blur piramidale"""
+        return {
+            'sigma': round(self.sigma, 2),
+            'level': self.level,
+            'weight': round(self.weight, 3),
+            'level_sigmas': [round(sigma, 2) for sigma in self._level_sigmas]
+        }
@@ -0,0 +1,152 @@
+# =============================================================================
+# File 23: src/core/quality_controller.py
+# =============================================================================
+
+import time
+from typing import Optional, Tuple, List, Dict, Any
+
+# Livelli di qualità AI crescenti: (model_selection, ai_width, ai_height)
+QUALITY_LADDER: List[Tuple[int, int, int]] = [
+    (0, 192, 108),
+    (0, 256, 144),   # = preset 'low'
+    (0, 320, 180),
+    (0, 384, 216),   # = preset 'medium'
+    (0, 448, 252),
+    (1, 448, 252),
+    (1, 512, 288),   # = preset 'high'
+]
+
+
+class AdaptiveQualityController:
+    """Controller ad anello chiuso: sceglie il livello AI dal p95 del processing rispetto al budget frame
+
+    - scende subito se il p95 supera high_ratio del budget o la CPU di sistema è satura
+    - sale solo dopo up_evaluations valutazioni consecutive sotto low_ratio del budget
+    - dopo ogni cambio attende settle_samples nuovi campioni misurati al nuovo livello
+    - un livello appena abbandonato per sovraccarico resta bloccato per backoff secondi,
+      raddoppiati a ogni nuovo fallimento (max max_backoff)
+    La banda tra low_ratio e high_ratio è l'isteresi che evita l'oscillazione tra due livelli.
+    """
+
+    def __init__(self, fps: float = 30.0, start_level: int = 3, high_ratio: float = 0.85,
+                 low_ratio: float = 0.5, cpu_high: float = 90.0, up_evaluations: int = 3,
+                 settle_samples: int = 20, interval: float = 1.0, backoff: float = 10.0,
+                 max_backoff: float = 120.0):
+        self.frame_budget_ms = 1000.0 / max(1.0, fps)
+        self.level = min(max(0, start_level), len(QUALITY_LADDER) - 1)
+        self.high_ratio = high_ratio
+        self.low_ratio = low_ratio
+        self.cpu_high = cpu_high
+        self.up_evaluations = max(1, up_evaluations)
+        self.settle_samples = max(1, settle_samples)
+        self.interval = interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        # Backoff per livello: livello -> (bloccato fino a, durata del prossimo blocco)
+        self.blocked: Dict[int, Tuple[float, float]] = {}
+
+        # Stato del controllo
+        self.last_evaluation = 0.0
+        self.samples_at_change = 0
+        self.below_count = 0
+
+        # Ultima decisione (esposta nelle stats)
+        self.decision = 'hold'
+        self.reason = 'avvio'
+        self.p95_ms = 0.0
+        self.system_cpu = 0.0
+        self.external_cpu = 0.0
+        self.changes = 0
+
+    def current(self) -> Tuple[int, int, int]:
+        """Livello corrente come (model_selection, ai_width, ai_height)"""
+        return QUALITY_LADDER[self.level]
+
+    def due(self) -> bool:
+        """True se è passato l'intervallo minimo dall'ultima valutazione"""
+        return time.time() - self.last_evaluation >= self.interval
+
+    def evaluate(self, p95_ms: float, samples_total: int, system_cpu: float,
+                 own_cpu: float) -> Optional[Tuple[int, int, int]]:
+        """Valuta le misure; restituisce il nuovo livello se va cambiato, altrimenti None
+
+        samples_total è il contatore di campioni del PerformanceMonitor: solo i campioni
+        registrati dopo l'ultimo cambio descrivono il livello corrente.
+        """
+        self.last_evaluation = time.time()
+        self.p95_ms = p95_ms
+        self.system_cpu = system_cpu
+        self.external_cpu = max(0.0, system_cpu - own_cpu)
+
+        if samples_total - self.samples_at_change < self.settle_samples:
+            self._decide('hold', 'misura del nuovo livello in corso')
+            return None
+
+        budget = self.frame_budget_ms
+        overload = None
+        if p95_ms > budget * self.high_ratio:
+            overload = f"p95 {p95_ms:.1f}ms oltre {self.high_ratio:.0%} del budget {budget:.1f}ms"
+        elif system_cpu > self.cpu_high:
+            overload = f"CPU sistema {system_cpu:.0f}% (altri processi {self.external_cpu:.0f}%)"
+
+        if overload:
+            if self.level == 0:
+                self._decide('hold', f"livello minimo, {overload}")
+                return None
+            self._block(self.level)
+            return self._step(-1, samples_total, overload)
+
+        # Salita solo con margine su tempo e CPU (altri processi compresi)
+        if p95_ms < budget * self.low_ratio and system_cpu < self.cpu_high - 20:
+            self.below_count += 1
+            if self.level == len(QUALITY_LADDER) - 1:
+                self._decide('hold', 'qualità massima')
+                return None
+            blocked_until = self.blocked.get(self.level + 1, (0.0, 0.0))[0]
+            if blocked_until > self.last_evaluation:
+                self._decide('hold', f"livello {self.level + 1} in backoff per {blocked_until - self.last_evaluation:.0f}s")
+                return None
+            if self.below_count >= self.up_evaluations:
+                return self._step(+1, samples_total, f"p95 {p95_ms:.1f}ms sotto {self.low_ratio:.0%} del budget {budget:.1f}ms")
+            self._decide('hold', f"margine {self.below_count}/{self.up_evaluations}")
+            return None
+
+        self.below_count = 0
+        self._decide('hold', 'nel budget')
+        return None
+
+    def _block(self, level: int):
+        """Blocca la risalita a un livello che ha appena sforato il budget"""
+        _, duration = self.blocked.get(level, (0.0, self.backoff))
+        self.blocked[level] = (time.time() + duration, min(self.max_backoff, duration * 2))
+
+    def _step(self, direction: int, samples_total: int, reason: str) -> Tuple[int, int, int]:
+        """Cambia livello e riparte con la misura"""
+        self.level += direction
+        self.samples_at_change = samples_total
+        self.below_count = 0
+        self.changes += 1
+        self._decide('up' if direction > 0 else 'down', reason)
+        return self.current()
+
+    def _decide(self, decision: str, reason: str):
+        self.decision = decision
+        self.reason = reason
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche controller qualità"""
+        model_selection, width, height = self.current()
+        return {
+            'level': self.level,
+            'levels': len(QUALITY_LADDER),
+            'resolution': f"{width}x{height}",
+            'model': 'accurate' if model_selection else 'fast',
+            'decision': self.decision,
+            'reason': self.reason,
+            'p95_ms': round(self.p95_ms, 2),
+            'budget_ms': round(self.frame_budget_ms, 2),
+            'system_cpu': round(self.system_cpu, 1),
+            'external_cpu': round(self.external_cpu, 1),
+            'changes': self.changes
+        }
@@ -0,0 +1,159 @@
+# =============================================================================
+# File 18: src/core/roi_tracker.py
+# =============================================================================
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Dict, Any
+
+Roi = Tuple[int, int, int, int]  # x, y, w, h in pixel del frame
+
+
+class PersonROITracker:
+    """Traccia il bounding box della persona dalla mask precedente per ritagliare l'input AI"""
+
+    def __init__(self, padding: float = 0.15, full_frame_interval: int = 30,
+                 min_coverage: float = 0.005, max_area_ratio: float = 0.8):
+        self.padding = padding
+        self.full_frame_interval = max(1, full_frame_interval)
+        self.min_coverage = min_coverage
+        self.max_area_ratio = max_area_ratio
+
+        # Bounding box normalizzato (x0, y0, x1, y1) in [0, 1] dall'ultima mask
+        self.bbox: Optional[Tuple[float, float, float, float]] = None
+        self.force_full_frame = True
+        self.frames_since_full = 0
+        self.current_roi: Optional[Roi] = None
+        self.frame_size = (1, 1)
+
+        # Dimensione della mask sonda per il calcolo del bounding box
+        self.probe_size = (128, 72)
+
+        # Stats
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.reacquisitions = 0
+
+    def next_roi(self, frame_width: int, frame_height: int, ai_size: Tuple[int, int]) -> Optional[Roi]:
+        """Regione da segmentare nel prossimo frame (None = frame intero)"""
+        self.current_roi = None
+        self.frame_size = (frame_width, frame_height)
+
+        if self.force_full_frame or self.bbox is None or self.frames_since_full >= self.full_frame_interval:
+            self.full_frames += 1
+            self.frames_since_full = 0
+            self.force_full_frame = False
+            return None
+
+        x0, y0, x1, y1 = self.bbox
+        box_w = (x1 - x0) * frame_width
+        box_h = (y1 - y0) * frame_height
+        center_x = (x0 + x1) / 2 * frame_width
+        center_y = (y0 + y1) / 2 * frame_height
+
+        # Padding e stesso aspect ratio dell'input AI (nessuna distorsione nel resize)
+        box_w *= 1 + 2 * self.padding
+        box_h *= 1 + 2 * self.padding
+        ai_aspect = ai_size[0] / ai_size[1]
+        if box_w / max(box_h, 1) < ai_aspect:
+            box_w = box_h * ai_aspect
+        else:
+            box_h = box_w / ai_aspect
+
+        box_w = min(box_w, frame_width)
+        box_h = min(box_h, frame_height)
+
+        # Ritaglio quasi a tutto frame: nessun guadagno, meglio il frame intero
+        if box_w * box_h > self.max_area_ratio * frame_width * frame_height:
+            self.frames_since_full += 1
+            self.full_frames += 1
+            return None
+
+        x = int(np.clip(center_x - box_w / 2, 0, frame_width - box_w))
+        y = int(np.clip(center_y - box_h / 2, 0, frame_height - box_h))
+
+        self.current_roi = (x, y, int(box_w), int(box_h))
+        self.frames_since_full += 1
+        self.roi_frames += 1
+        return self.current_roi
+
+    def paste(self, crop_mask: np.ndarray, roi: Roi, frame_size: Tuple[int, int],
+              canvas_size: Tuple[int, int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Incolla la mask del ritaglio in una mask a frame intero di dimensione canvas_size
+
+        out: canvas preallocato (canvas_height x canvas_width, dtype della mask) da riusare.
+        """
+        frame_width, frame_height = frame_size
+        canvas_width, canvas_height = canvas_size
+        scale_x = canvas_width / frame_width
+        scale_y = canvas_height / frame_height
+
+        x, y, w, h = roi
+        cx0 = int(round(x * scale_x))
+        cy0 = int(round(y * scale_y))
+        cx1 = min(canvas_width, int(round((x + w) * scale_x)))
+        cy1 = min(canvas_height, int(round((y + h) * scale_y)))
+
+        if out is None or out.shape != (canvas_height, canvas_width) or out.dtype != crop_mask.dtype:
+            out = np.empty((canvas_height, canvas_width), dtype=crop_mask.dtype)
+        out.fill(0)
+        cv2.resize(crop_mask, (cx1 - cx0, cy1 - cy0), dst=out[cy0:cy1, cx0:cx1])
+        return out
+
+    def update(self, mask: np.ndarray):
+        """Aggiorna il bounding box dalla mask a frame intero appena calcolata"""
+        probe = cv2.resize(mask, self.probe_size, interpolation=cv2.INTER_AREA)
+        threshold = 127 if probe.dtype == np.uint8 else 0.5
+        points = cv2.findNonZero((probe > threshold).astype(np.uint8))
+
+        probe_w, probe_h = self.probe_size
+        if points is None or len(points) < self.min_coverage * probe_w * probe_h:
+            # Persona persa: riacquisizione a frame intero
+            if self.bbox is not None:
+                self.reacquisitions += 1
+            self.bbox = None
+            self.force_full_frame = True
+            return
+
+        bx, by, bw, bh = cv2.boundingRect(points)
+        self.bbox = (bx / probe_w, by / probe_h, (bx + bw) / probe_w, (by + bh) / probe_h)
+
+        # Persona che tocca il bordo del ritaglio (ma non del frame): sta uscendo
+        if self.current_roi is not None and self._touches_roi_border():
+            self.reacquisitions += 1
+            self.force_full_frame = True
+
+    def _touches_roi_border(self) -> bool:
+        """True se il bounding box tocca un bordo del ritaglio interno al frame"""
+        frame_width, frame_height = self.frame_size
+        x, y, w, h = self.current_roi
+        rx0, ry0 = x / frame_width, y / frame_height
+        rx1, ry1 = (x + w) / frame_width, (y + h) / frame_height
+        bx0, by0, bx1, by1 = self.bbox
+
+        # Tolleranza di un pixel della mask sonda
+        mx = 1.0 / self.probe_size[0]
+        my = 1.0 / self.probe_size[1]
+
+        return ((rx0 > mx and bx0 <= rx0 + mx) or
+                (ry0 > my and by0 <= ry0 + my) or
+                (rx1 < 1 - mx and bx1 >= rx1 - mx) or
+                (ry1 < 1 - my and by1 >= ry1 - my))
+
+    def reset(self):
+        """Torna al frame intero"""
+        self.bbox = None
+        self.force_full_frame = True
+        self.frames_since_full = 0
+        self.current_roi = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche ROI tracker"""
+        total = self.roi_frames + self.full_frames
+        return {
+            'roi': self.current_roi,
+            'roi_ratio': self.roi_frames / max(total, 1),
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'reacquisitions': self.reacquisitions
+        }
@@ -0,0 +1,275 @@
+# =============================================================================
+# File 21: src/core/segmentation_backends.py
+# =============================================================================
+
+import os
+import time
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Dict, Any, Type, List
+
+from ..utils.config import StreamBlurConfig
+
+
+class SegmentationBackend:
+    """Interfaccia di un backend di segmentazione persona/sfondo
+
+    Ogni backend dichiara dimensione input, ordine colori atteso e tipo di output,
+    e misura da sé la latenza a freddo (prima inferenza) e a regime.
+    """
+
+    name = 'base'
+    description = ''
+    color_order = 'RGB'         # 'RGB' o 'BGR'
+    output_type = 'float32'     # mask HxW float32 0-1 alla risoluzione dell'input
+    supports_batching = False
+
+    def __init__(self, config: StreamBlurConfig):
+        self.config = config
+        self.model_selection = 0
+        self.input_size: Optional[Tuple[int, int]] = None  # None = qualsiasi risoluzione
+
+        # Latenze misurate
+        self.cold_latency_ms = 0.0
+        self.warm_latency_ms = 0.0
+        self.inferences = 0
+
+    def initialize(self, model_selection: int) -> bool:
+        """Carica il modello; False se il backend non è disponibile"""
+        raise NotImplementedError
+
+    def process(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """Segmenta un'immagine (ordine colori self.color_order) e restituisce la mask"""
+        raise NotImplementedError
+
+    def set_num_threads(self, threads: int) -> bool:
+        """Thread di inferenza del backend; False se il runtime non espone il parametro"""
+        return False
+
+    def process_batch(self, images: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """Segmenta più immagini; i backend con supports_batching le eseguono in un'unica inferenza"""
+        return [self.process(image) for image in images]
+
+    def close(self):
+        """Rilascia le risorse del modello"""
+        pass
+
+    def segment(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """process() con misura della latenza (prima chiamata = cold start)"""
+        start_time = time.perf_counter()
+        mask = self.process(image)
+        self._record_latency((time.perf_counter() - start_time) * 1000)
+        return mask
+
+    def segment_batch(self, images: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """process_batch() con misura della latenza dell'intera chiamata"""
+        start_time = time.perf_counter()
+        masks = self.process_batch(images)
+        self._record_latency((time.perf_counter() - start_time) * 1000)
+        return masks
+
+    def _record_latency(self, elapsed_ms: float):
+        if self.inferences == 0:
+            self.cold_latency_ms = elapsed_ms
+        elif self.inferences == 1:
+            self.warm_latency_ms = elapsed_ms
+        else:
+            self.warm_latency_ms = 0.9 * self.warm_latency_ms + 0.1 * elapsed_ms
+        self.inferences += 1
+
+    def describe(self) -> Dict[str, Any]:
+        """Metadati e latenze del backend"""
+        return {
+            'name': self.name,
+            'input_size': f"{self.input_size[0]}x{self.input_size[1]}" if self.input_size else 'any',
+            'color_order': self.color_order,
+            'output_type': self.output_type,
+            'model_selection': self.model_selection,
+            'cold_latency_ms': round(self.cold_latency_ms, 2),
+            'warm_latency_ms': round(self.warm_latency_ms, 2),
+            'inferences': self.inferences
+        }
+
+
+# Registro backend: nome -> classe
+SEGMENTATION_BACKENDS: Dict[str, Type[SegmentationBackend]] = {}
+
+
+def register_backend(backend_class: Type[SegmentationBackend]) -> Type[SegmentationBackend]:
+    """Decoratore: registra un backend con il suo nome"""
+    SEGMENTATION_BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+def create_backend(name: str, config: StreamBlurConfig) -> Optional[SegmentationBackend]:
+    """Istanzia un backend registrato (None se il nome non esiste)"""
+    backend_class = SEGMENTATION_BACKENDS.get(name)
+    if backend_class is None:
+        print(f"❌ Backend di segmentazione sconosciuto: {name}")
+        return None
+    return backend_class(config)
+
+
+def available_backends() -> Dict[str, str]:
+    """Nomi e descrizioni dei backend registrati"""
+    return {name: backend_class.description for name, backend_class in SEGMENTATION_BACKENDS.items()}
+
+
+@register_backend
+class MediaPipeBackend(SegmentationBackend):
+    """MediaPipe selfie segmentation (0 = general 256x256, 1 = landscape 256x144)"""
+
+    name = 'mediapipe'
+    description = 'MediaPipe Selfie Segmentation (TFLite)'
+    color_order = 'RGB'
+
+    MODEL_INPUT_SIZES = {0: (256, 256), 1: (256, 144)}
+
+    def __init__(self, config: StreamBlurConfig):
+        super().__init__(config)
+        self.segmentation = None
+
+    def initialize(self, model_selection: int) -> bool:
+        try:
+            import mediapipe as mp
+        except ImportError:
+            print("❌ Errore: MediaPipe non installato")
+            return False
+
+        # mp.solutions esiste solo fino a mediapipe 0.10.14
+        selfie_segmentation = getattr(getattr(mp, 'solutions', None), 'selfie_segmentation', None)
+        if not selfie_segmentation:
+            print("❌ Errore: MediaPipe selfie_segmentation non disponibile")
+            return False
+
+        self.model_selection = model_selection
+        self.input_size = self.MODEL_INPUT_SIZES.get(model_selection)
+        self.segmentation = selfie_segmentation.SelfieSegmentation(model_selection=model_selection)
+        return True
+
+    def process(self, image: np.ndarray) -> Optional[np.ndarray]:
+        results = self.segmentation.process(image)
+        return results.segmentation_mask
+
+    def set_num_threads(self, threads: int) -> bool:
+        # SelfieSegmentation non espone i thread dell'interprete TFLite: in-process non si
+        # controllano, solo con inference_mode 'subprocess' (core del processo figlio)
+        return False
+
+    def close(self):
+        if self.segmentation:
+            self.segmentation.close()
+            self.segmentation = None
+
+
+@register_backend
+class OpenCVDNNBackend(SegmentationBackend):
+    """Modello ONNX locale eseguito con cv2.dnn (nessuna dipendenza oltre OpenCV)"""
+
+    name = 'opencv_dnn'
+    description = 'Modello ONNX locale via OpenCV DNN'
+    supports_batching = True
+
+    def __init__(self, config: StreamBlurConfig):
+        super().__init__(config)
+        self.net = None
+
+        model_path = config.get('ai.onnx_model_path', '')
+        self.model_path = os.path.expanduser(model_path) if isinstance(model_path, str) else ''
+
+        input_size = config.get('ai.onnx_input_size', [256, 256])
+        self.model_input_size = tuple(input_size) if isinstance(input_size, (list, tuple)) and len(input_size) == 2 \
+            else (256, 256)
+
+        color_order = config.get('ai.onnx_color_order', 'RGB')
+        self.color_order = color_order if color_order in ('RGB', 'BGR') else 'RGB'
+
+        scale = config.get('ai.onnx_scale', 1.0 / 255.0)
+        self.scale = scale if isinstance(scale, (int, float)) else 1.0 / 255.0
+
+        # Post-processing output: 'probability' (già 0-1), 'sigmoid' (logit), 'softmax' (2+ classi)
+        output = config.get('ai.onnx_output', 'probability')
+        self.output_mode = output if output in ('probability', 'sigmoid', 'softmax') else 'probability'
+
+        person_channel = config.get('ai.onnx_person_channel', 1)
+        self.person_channel = person_channel if isinstance(person_channel, int) else 1
+
+    def initialize(self, model_selection: int) -> bool:
+        if not self.model_path or not os.path.isfile(self.model_path):
+            print(f"❌ Modello ONNX non trovato: {self.model_path or '(ai.onnx_model_path vuoto)'}")
+            return False
+
+        try:
+            self.net = cv2.dnn.readNet(self.model_path)
+        except cv2.error as e:
+            print(f"❌ Errore caricamento modello ONNX: {e}")
+            return False
+
+        self.model_selection = model_selection
+        self.input_size = self.model_input_size
+        return True
+
+    def set_num_threads(self, threads: int) -> bool:
+        # cv2.dnn usa il pool di OpenCV: in-process è condiviso con il compositing
+        cv2.setNumThreads(threads)
+        return cv2.getNumThreads() == threads
+
+    def process(self, image: np.ndarray) -> Optional[np.ndarray]:
+        blob = cv2.dnn.blobFromImage(image, self.scale, self.input_size, swapRB=False, crop=False)
+        self.net.setInput(blob)
+        return self._postprocess(self.net.forward()[0], image.shape[:2])
+
+    def process_batch(self, images: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        # Un solo forward NCHW per tutto il batch
+        blob = cv2.dnn.blobFromImages(images, self.scale, self.input_size, swapRB=False, crop=False)
+        self.net.setInput(blob)
+        outputs = self.net.forward()
+        return [self._postprocess(output, image.shape[:2]) for output, image in zip(outputs, images)]
+
+    def _postprocess(self, output: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        """Output di un elemento del batch -> mask float32 0-1 alla risoluzione dell'input"""
+        output = np.squeeze(output)
+
+        # CxHxW o HxWxC: seleziona il canale persona
+        if output.ndim == 3:
+            channels_first = output.shape[0] < output.shape[-1]
+            logits = output if channels_first else np.moveaxis(output, -1, 0)
+            if self.output_mode == 'softmax':
+                logits = np.exp(logits - logits.max(axis=0, keepdims=True))
+                output = logits[self.person_channel] / logits.sum(axis=0)
+            else:
+                output = logits[min(self.person_channel, logits.shape[0] - 1)]
+
+        if self.output_mode == 'sigmoid':
+            output = 1.0 / (1.0 + np.exp(-output))
+
+        height, width = shape
+        return cv2.resize(output.astype(np.float32), (width, height))
+
+    def close(self):
+        self.net = None
+
+
+@register_backend
+class ThresholdBackend(SegmentationBackend):
+    """Backend fittizio per test e benchmark senza modelli: soglia di luminanza"""
+
+    name = 'threshold'
+    description = 'Soglia di luminanza (test/benchmark, nessun modello)'
+    color_order = 'BGR'
+
+    def __init__(self, config: StreamBlurConfig):
+        super().__init__(config)
+        level = config.get('ai.threshold_level', 0)
+        # 0 = soglia automatica (Otsu)
+        self.level = level if isinstance(level, int) else 0
+
+    def initialize(self, model_selection: int) -> bool:
+        self.model_selection = model_selection
+        return True
+
+    def process(self, image: np.ndarray) -> Optional[np.ndarray]:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        flags = cv2.THRESH_BINARY | (cv2.THRESH_OTSU if self.level <= 0 else 0)
+        _, mask = cv2.threshold(gray, self.level, 1, flags)
+        return mask.astype(np.float32)
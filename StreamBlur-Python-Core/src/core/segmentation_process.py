@@ -0,0 +1,348 @@
+# =============================================================================
+# File 15: src/core/segmentation_process.py
+# =============================================================================
+
+import time
+import numpy as np
+import multiprocessing as mproc
+from multiprocessing import shared_memory
+from collections import deque
+from typing import Optional, Dict, Any, Set
+
+from ..utils.config import StreamBlurConfig
+from ..utils.thread_budget import ThreadBudgetManager
+from .segmentation_backends import SegmentationBackend, create_backend
+
+# perf_counter usa un clock di sistema (CLOCK_MONOTONIC / QPC): i timestamp
+# di processo padre e figlio sono confrontabili per misurare i singoli hop.
+
+
+def _attach_ring(in_name: str, out_name: str, ring_size: int, width: int, height: int):
+    """Collega il ring di shared memory e restituisce le viste numpy"""
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    frames = np.ndarray((ring_size, height, width, 3), dtype=np.uint8, buffer=shm_in.buf)
+    masks = np.ndarray((ring_size, height, width), dtype=np.float32, buffer=shm_out.buf)
+    return shm_in, shm_out, frames, masks
+
+
+def _segmentation_child(conn, backend_name: str, config: StreamBlurConfig, model_selection: int,
+                        in_name: str, out_name: str, ring_size: int, width: int, height: int):
+    """Entry point del processo figlio: il backend gira fuori dal GIL del processo principale"""
+    # Il figlio è tutto inferenza: pool OpenCV = inference_threads, core dello stadio 'inference'
+    ThreadBudgetManager(config).configure_process('inference')
+    
+    try:
+        backend = create_backend(backend_name, config)
+        if backend is None or not backend.initialize(model_selection):
+            conn.send(('error', f"backend '{backend_name}' non disponibile"))
+            return
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+
+    shm_in, shm_out, frames, masks = _attach_ring(in_name, out_name, ring_size, width, height)
+    conn.send(('ready', backend.describe()))
+
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+
+            if message[0] == 'ring':
+                # Risoluzione AI cambiata: ricollega il nuovo ring
+                del frames, masks
+                shm_in.close()
+                shm_out.close()
+                _, in_name, out_name, width, height = message
+                shm_in, shm_out, frames, masks = _attach_ring(in_name, out_name, ring_size, width, height)
+                conn.send(('ready', backend.describe()))
+                continue
+
+            _, slot, sequence, sent_at = message
+            received_at = time.perf_counter()
+
+            mask = backend.segment(frames[slot])
+            if mask is not None:
+                np.copyto(masks[slot], mask)
+
+            # Il numero di sequenza permette al padre di scartare le risposte arrivate dopo un timeout
+            conn.send(('mask', slot, sequence, mask is not None, sent_at, received_at, time.perf_counter()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        backend.close()
+        del frames, masks
+        shm_in.close()
+        shm_out.close()
+
+
+class SharedMemorySegmenter(SegmentationBackend):
+    """Esegue un backend in processo figlio con frame e mask su ring di shared memory
+
+    Ogni richiesta porta un numero di sequenza che il figlio rimanda indietro. Dopo un
+    timeout la risposta tardiva viene scartata alla chiamata successiva, e lo slot resta
+    occupato finché non arriva: il padre non sovrascrive un frame che il figlio sta leggendo.
+    """
+
+    name = 'subprocess'
+    description = 'Backend in processo separato (shared memory)'
+
+    def __init__(self, config: StreamBlurConfig, backend_name: str, width: int, height: int,
+                 ring_size: int = 3, timeout: float = 2.0):
+        super().__init__(config)
+        self.backend_name = backend_name
+        self.remote_info: Dict[str, Any] = {}
+        self.width = width
+        self.height = height
+        self.ring_size = max(2, ring_size)
+        self.timeout = timeout
+
+        # Processo figlio e canale di controllo (solo indici slot e timestamp)
+        self.process_handle = None
+        self.conn = None
+
+        # Ring preallocato
+        self.shm_in: Optional[shared_memory.SharedMemory] = None
+        self.shm_out: Optional[shared_memory.SharedMemory] = None
+        self.frames: Optional[np.ndarray] = None
+        self.masks: Optional[np.ndarray] = None
+        self.next_slot = 0
+        self.sequence = 0
+        self.pending_slots: Set[int] = set()
+
+        # Latenze per hop (secondi)
+        self.write_times = deque(maxlen=100)
+        self.request_times = deque(maxlen=100)
+        self.inference_times = deque(maxlen=100)
+        self.response_times = deque(maxlen=100)
+        self.frames_processed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.stale_replies = 0
+
+    def initialize(self, model_selection: int) -> bool:
+        """Alloca il ring e avvia il processo figlio con il backend richiesto"""
+        self.model_selection = model_selection
+        try:
+            self._allocate_ring(self.width, self.height)
+
+            # spawn: sicuro con i thread già attivi (camera, uvicorn) e uguale su Windows
+            ctx = mproc.get_context('spawn')
+            parent_conn, child_conn = ctx.Pipe()
+            process_handle = ctx.Process(
+                target=_segmentation_child,
+                args=(child_conn, self.backend_name, self.config, self.model_selection,
+                      self.shm_in.name, self.shm_out.name, self.ring_size, self.width, self.height),
+                daemon=True
+            )
+            process_handle.start()
+            self.process_handle = process_handle
+            self.conn = parent_conn
+
+            if not self._wait_ready(timeout=30.0):
+                self.close()
+                return False
+            return True
+
+        except Exception as e:
+            print(f"❌ Errore avvio processo AI: {e}")
+            self.close()
+            return False
+
+    def _allocate_ring(self, width: int, height: int):
+        """Crea i segmenti di shared memory per frame (uint8) e mask (float32)"""
+        frame_bytes = self.ring_size * height * width * 3
+        mask_bytes = self.ring_size * height * width * 4
+
+        self.shm_in = shared_memory.SharedMemory(create=True, size=frame_bytes)
+        self.shm_out = shared_memory.SharedMemory(create=True, size=mask_bytes)
+        self.frames = np.ndarray((self.ring_size, height, width, 3), dtype=np.uint8, buffer=self.shm_in.buf)
+        self.masks = np.ndarray((self.ring_size, height, width), dtype=np.float32, buffer=self.shm_out.buf)
+        self.width = width
+        self.height = height
+        self.next_slot = 0
+        self.pending_slots.clear()
+
+    def _release_ring(self):
+        """Rilascia i segmenti di shared memory"""
+        self.frames = None
+        self.masks = None
+        for shm in (self.shm_in, self.shm_out):
+            if shm is not None:
+                try:
+                    shm.close()
+                    shm.unlink()
+                except Exception:
+                    pass
+        self.shm_in = None
+        self.shm_out = None
+
+    def _wait_ready(self, timeout: float) -> bool:
+        """Attende conferma dal processo figlio (scartando le mask tardive ancora nel pipe)"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            if not self.conn.poll(max(0.0, deadline - time.perf_counter())):
+                print("❌ Processo AI non risponde")
+                return False
+
+            message = self.conn.recv()
+            if message[0] != 'mask':
+                break
+            self.stale_replies += 1
+
+        if message[0] != 'ready':
+            print(f"❌ Errore processo AI: {message[1]}")
+            return False
+
+        # Metadati del backend remoto (ordine colori, input size)
+        self.remote_info = message[1]
+        self.color_order = self.remote_info.get('color_order', 'RGB')
+        return True
+
+    def _resize_ring(self, width: int, height: int) -> bool:
+        """Rialloca il ring per una nuova risoluzione AI"""
+        old_in, old_out = self.shm_in, self.shm_out
+        self.frames = None
+        self.masks = None
+
+        self._allocate_ring(width, height)
+        self.conn.send(('ring', self.shm_in.name, self.shm_out.name, width, height))
+        ready = self._wait_ready(timeout=self.timeout)
+
+        # Il figlio ha già staccato i vecchi segmenti
+        for shm in (old_in, old_out):
+            shm.close()
+            shm.unlink()
+        return ready
+
+    def process(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """Segmenta un frame nel processo figlio
+
+        La mask restituita è una vista sul ring: resta valida per ring_size chiamate.
+        """
+        if self.conn is None:
+            return None
+
+        try:
+            height, width = image.shape[:2]
+            if (width, height) != (self.width, self.height):
+                if not self._resize_ring(width, height):
+                    return None
+
+            # Risposte tardive di richieste scadute: liberano il loro slot
+            while self.conn.poll(0):
+                self._accept(self.conn.recv(), None)
+
+            slot = self._free_slot()
+            if slot is None:
+                # Tutti gli slot attendono ancora il figlio: nessun frame sovrascritto
+                self.errors += 1
+                return None
+
+            self.sequence += 1
+            sequence = self.sequence
+            write_start = time.perf_counter()
+            np.copyto(self.frames[slot], image)
+            sent_at = time.perf_counter()
+            self.pending_slots.add(slot)
+            self.conn.send(('frame', slot, sequence, sent_at))
+
+            deadline = sent_at + self.timeout
+            while True:
+                if not self.conn.poll(max(0.0, deadline - time.perf_counter())):
+                    self.errors += 1
+                    self.timeouts += 1
+                    print("⚠️ Timeout processo AI")
+                    return None
+
+                reply = self._accept(self.conn.recv(), sequence)
+                if reply is not None:
+                    break
+
+            _, slot, _, has_mask, sent_at, received_at, done_at = reply
+            returned_at = time.perf_counter()
+
+            self.write_times.append(sent_at - write_start)
+            self.request_times.append(received_at - sent_at)
+            self.inference_times.append(done_at - received_at)
+            self.response_times.append(returned_at - done_at)
+            self.frames_processed += 1
+
+            return self.masks[slot] if has_mask else None
+
+        except (EOFError, BrokenPipeError, OSError) as e:
+            self.errors += 1
+            print(f"⚠️ Processo AI terminato: {e}")
+            self.conn = None
+            return None
+
+    def _free_slot(self) -> Optional[int]:
+        """Prossimo slot del ring senza richieste in corso"""
+        for offset in range(self.ring_size):
+            slot = (self.next_slot + offset) % self.ring_size
+            if slot not in self.pending_slots:
+                self.next_slot = (slot + 1) % self.ring_size
+                return slot
+        return None
+
+    def _accept(self, message, sequence: Optional[int]):
+        """Libera lo slot della risposta; la restituisce solo se è quella della richiesta attesa"""
+        self.pending_slots.discard(message[1])
+        if message[2] == sequence:
+            return message
+        self.stale_replies += 1
+        return None
+
+    def close(self):
+        """Ferma il processo figlio e libera la shared memory"""
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except Exception:
+                pass
+
+        if self.process_handle is not None:
+            self.process_handle.join(timeout=2.0)
+            if self.process_handle.is_alive():
+                self.process_handle.terminate()
+            self.process_handle = None
+
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+        self._release_ring()
+
+    def set_num_threads(self, threads: int) -> bool:
+        # Il processo figlio applica threads.inference_threads all'avvio (configure_process)
+        return self.conn is not None
+
+    def describe(self) -> Dict[str, Any]:
+        """Metadati del backend remoto con latenza end-to-end misurata dal processo padre"""
+        info = super().describe()
+        info.update({key: self.remote_info[key] for key in ('name', 'input_size', 'output_type')
+                     if key in self.remote_info})
+        info['process'] = 'subprocess'
+        return info
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latenze medie per hop del trasferimento IPC"""
+        def avg_ms(values):
+            return round(sum(values) / len(values) * 1000, 3) if values else 0.0
+
+        return {
+            'ring_size': self.ring_size,
+            'resolution': f"{self.width}x{self.height}",
+            'frames_processed': self.frames_processed,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'stale_replies': self.stale_replies,
+            'write_ms': avg_ms(self.write_times),
+            'request_hop_ms': avg_ms(self.request_times),
+            'inference_ms': avg_ms(self.inference_times),
+            'response_hop_ms': avg_ms(self.response_times),
+            'transfer_total_ms': round(avg_ms(self.write_times) + avg_ms(self.request_times)
+                                       + avg_ms(self.response_times), 3)
+        }
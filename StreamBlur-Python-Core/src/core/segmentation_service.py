@@ -0,0 +1,329 @@
+# =============================================================================
+# File 25: src/core/segmentation_service.py
+# =============================================================================
+
+import time
+import numpy as np
+from collections import deque
+from threading import Thread, Lock, Condition, Event
+from typing import Optional, Dict, Any, List
+
+from ..utils.config import StreamBlurConfig
+from ..utils.thread_budget import get_thread_budget
+from .segmentation_backends import SegmentationBackend, create_backend
+
+
+class _Request:
+    """Frame di uno stream in attesa di inferenza"""
+
+    __slots__ = ('stream_id', 'model_selection', 'image', 'submitted_at', 'deadline',
+                 'started_at', 'mask', 'done')
+
+    def __init__(self, stream_id: str, model_selection: int, image: np.ndarray, deadline: float):
+        self.stream_id = stream_id
+        self.model_selection = model_selection
+        self.image = image
+        self.submitted_at = time.perf_counter()
+        self.deadline = deadline
+        self.started_at = 0.0
+        self.mask: Optional[np.ndarray] = None
+        self.done = Event()
+
+
+class _StreamStats:
+    """Contatori per stream: throughput, latenza end-to-end e attesa in coda"""
+
+    def __init__(self, fps: float):
+        self.frame_budget = 1.0 / max(1.0, fps)
+        self.proxies = 0
+        self.started_at = time.perf_counter()
+        self.frames = 0
+        self.timeouts = 0
+        self.deadline_misses = 0
+        self.latencies = deque(maxlen=100)
+        self.queue_delays = deque(maxlen=100)
+        self.batch_sizes = deque(maxlen=100)
+
+
+class ServiceStreamBackend(SegmentationBackend):
+    """Backend di uno stream: inoltra i frame al servizio condiviso e attende la propria mask
+
+    Si usa come un backend qualsiasi (AIProcessor, ModelPool): pre e post-processing,
+    filtri temporali e stato restano per stream, il grafo del modello è condiviso.
+    """
+
+    name = 'service'
+    description = 'Servizio di segmentazione condiviso tra più camere'
+
+    def __init__(self, service: 'SegmentationService', stream_id: str, timeout: float):
+        super().__init__(service.config)
+        self.service = service
+        self.stream_id = stream_id
+        self.timeout = timeout
+
+    def initialize(self, model_selection: int) -> bool:
+        backend = self.service.backend_for(model_selection)
+        if backend is None:
+            return False
+        self.model_selection = model_selection
+        self.color_order = backend.color_order
+        self.input_size = backend.input_size
+        return True
+
+    def process(self, image: np.ndarray) -> Optional[np.ndarray]:
+        return self.service.submit(self.stream_id, self.model_selection, image, self.timeout)
+
+    def close(self):
+        self.service.detach(self.stream_id)
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info['shared_backend'] = self.service.backend_name
+        info['stream_id'] = self.stream_id
+        return info
+
+
+class SegmentationService:
+    """Segmentazione condivisa per più camere in un solo processo
+
+    Un backend per model_selection serve tutti gli stream. Lo scheduler esegue per primo
+    il frame con la deadline più vicina (EDF: invio + budget del frame dello stream); se il
+    backend supporta il batching raggruppa in un'unica inferenza i frame di stream diversi
+    con stesso modello e risoluzione. Ogni stream ha al massimo un frame in coda (il worker
+    dell'AIProcessor attende la propria mask), quindi nessuno stream può affamare gli altri.
+
+    Uso: un AIProcessor per camera, tutti costruiti con lo stesso servizio e stream_id diversi.
+    """
+
+    def __init__(self, config: StreamBlurConfig, backend_name: Optional[str] = None):
+        self.config = config
+
+        if backend_name is None:
+            backend_name = config.get('ai.backend', 'mediapipe')
+        self.backend_name = backend_name if isinstance(backend_name, str) else 'mediapipe'
+
+        max_batch = config.get('ai.service_max_batch', 4)
+        self.max_batch = max_batch if isinstance(max_batch, int) and max_batch > 0 else 4
+
+        # Attesa massima per completare un batch, solo se la deadline più vicina lo consente
+        batch_window = config.get('ai.service_batch_window_ms', 2.0)
+        self.batch_window = (batch_window if isinstance(batch_window, (int, float)) else 2.0) / 1000
+
+        # Backend condivisi per model_selection (usati solo dal thread scheduler dopo la creazione)
+        self.backends_lock = Lock()
+        self.backends: Dict[int, SegmentationBackend] = {}
+
+        # Coda richieste e stream registrati
+        self.condition = Condition()
+        self.queue: List[_Request] = []
+        self.streams: Dict[str, _StreamStats] = {}
+
+        # Threading
+        self.is_running = False
+        self.thread: Optional[Thread] = None
+
+        # Stats
+        self.batches = 0
+        self.batched_frames = 0
+
+    def start(self):
+        """Avvia thread scheduler"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.thread = Thread(target=self._scheduler_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Ferma lo scheduler (le richieste in coda ricevono None) e chiude i backend"""
+        with self.condition:
+            self.is_running = False
+            pending, self.queue = self.queue, []
+            self.condition.notify_all()
+        for request in pending:
+            request.done.set()
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+        with self.backends_lock:
+            backends = list(self.backends.values())
+            self.backends.clear()
+        for backend in backends:
+            backend.close()
+
+    def backend_for(self, model_selection: int) -> Optional[SegmentationBackend]:
+        """Backend condiviso per un modello, creato al primo stream che lo richiede"""
+        with self.backends_lock:
+            backend = self.backends.get(model_selection)
+            if backend is None:
+                backend = create_backend(self.backend_name, self.config)
+                if backend is None or not backend.initialize(model_selection):
+                    return None
+                get_thread_budget().apply_inference(backend)
+                self.backends[model_selection] = backend
+                print(f"🧠 Servizio AI: modello {model_selection} condiviso ({self.backend_name})")
+            return backend
+
+    def attach(self, stream_id: str, model_selection: int, fps: float = 30.0,
+               timeout: float = 2.0) -> Optional[ServiceStreamBackend]:
+        """Backend per uno stream (None se il modello non è disponibile)"""
+        proxy = ServiceStreamBackend(self, stream_id, timeout)
+        if not proxy.initialize(model_selection):
+            return None
+
+        with self.condition:
+            stats = self.streams.get(stream_id)
+            if stats is None:
+                stats = self.streams[stream_id] = _StreamStats(fps)
+            stats.proxies += 1
+
+        self.start()
+        return proxy
+
+    def detach(self, stream_id: str):
+        """Rilascia un backend di stream; lo stream sparisce quando non ne ha più"""
+        with self.condition:
+            stats = self.streams.get(stream_id)
+            if stats is None:
+                return
+            stats.proxies -= 1
+            if stats.proxies <= 0:
+                del self.streams[stream_id]
+
+    def submit(self, stream_id: str, model_selection: int, image: np.ndarray,
+               timeout: float) -> Optional[np.ndarray]:
+        """Accoda un frame e attende la sua mask (chiamato dal worker dello stream)"""
+        with self.condition:
+            stats = self.streams.get(stream_id)
+            if stats is None or not self.is_running:
+                return None
+            request = _Request(stream_id, model_selection, image, time.perf_counter() + stats.frame_budget)
+            self.queue.append(request)
+            self.condition.notify_all()
+
+        if not request.done.wait(timeout):
+            with self.condition:
+                if request in self.queue:
+                    self.queue.remove(request)
+                stats.timeouts += 1
+            return None
+        return request.mask
+
+    def _next_batch(self) -> List[_Request]:
+        """Richieste con la deadline più vicina e i frame compatibili per un'unica inferenza (sotto lock)"""
+        self.queue.sort(key=lambda request: request.deadline)
+        head = self.queue[0]
+
+        backend = self.backends.get(head.model_selection)
+        if backend is None or not backend.supports_batching:
+            return [self.queue.pop(0)]
+
+        batch = [request for request in self.queue
+                 if request.model_selection == head.model_selection and request.image.shape == head.image.shape]
+        batch = batch[:self.max_batch]
+        for request in batch:
+            self.queue.remove(request)
+        return batch
+
+    def _batch_ready(self) -> bool:
+        """True se conviene eseguire subito: batch pieno o nessun margine sulla deadline (sotto lock)"""
+        head = min(self.queue, key=lambda request: request.deadline)
+        backend = self.backends.get(head.model_selection)
+        if backend is None or not backend.supports_batching:
+            return True
+
+        waiting = len(self.queue)
+        if waiting >= min(self.max_batch, len(self.streams)):
+            return True
+        # Attendi altri stream solo se il frame più urgente ha margine
+        return head.deadline - time.perf_counter() < self.batch_window * 2 or \
+            time.perf_counter() - head.submitted_at >= self.batch_window
+
+    def _scheduler_loop(self):
+        """Loop scheduler (thread separato): EDF con batching opportunistico"""
+        get_thread_budget().pin_current_thread('inference')
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or not self.is_running)
+                if not self.is_running:
+                    break
+                if not self._batch_ready():
+                    self.condition.wait(self.batch_window)
+                    if not self.queue:
+                        continue
+                batch = self._next_batch()
+
+            started_at = time.perf_counter()
+            for request in batch:
+                request.started_at = started_at
+
+            masks: List[Optional[np.ndarray]] = [None] * len(batch)
+            try:
+                backend = self.backends[batch[0].model_selection]
+                if len(batch) == 1:
+                    masks = [backend.segment(batch[0].image)]
+                else:
+                    masks = backend.segment_batch([request.image for request in batch])
+            except Exception as e:
+                print(f"⚠️ Errore servizio AI: {e}")
+
+            finished_at = time.perf_counter()
+            with self.condition:
+                self.batches += 1
+                self.batched_frames += len(batch)
+                for request, mask in zip(batch, masks):
+                    request.mask = mask
+                    stats = self.streams.get(request.stream_id)
+                    if stats is not None:
+                        stats.frames += 1
+                        stats.latencies.append(finished_at - request.submitted_at)
+                        stats.queue_delays.append(request.started_at - request.submitted_at)
+                        stats.batch_sizes.append(len(batch))
+                        if finished_at > request.deadline:
+                            stats.deadline_misses += 1
+
+            for request in batch:
+                request.done.set()
+
+    def get_stream_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Throughput, latenza e attesa in coda per stream"""
+        def avg_ms(values):
+            return round(sum(values) / len(values) * 1000, 2) if values else 0.0
+
+        now = time.perf_counter()
+        with self.condition:
+            return {
+                stream_id: {
+                    'fps': round(stats.frames / max(1e-6, now - stats.started_at), 1),
+                    'frames': stats.frames,
+                    'budget_ms': round(stats.frame_budget * 1000, 2),
+                    'latency_ms': avg_ms(stats.latencies),
+                    'max_latency_ms': round(max(stats.latencies, default=0.0) * 1000, 2),
+                    'queue_ms': avg_ms(stats.queue_delays),
+                    'avg_batch': round(sum(stats.batch_sizes) / len(stats.batch_sizes), 2) if stats.batch_sizes else 0.0,
+                    'deadline_misses': stats.deadline_misses,
+                    'timeouts': stats.timeouts
+                }
+                for stream_id, stats in self.streams.items()
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche servizio di segmentazione"""
+        with self.backends_lock:
+            backends = {selection: backend.describe() for selection, backend in self.backends.items()}
+        with self.condition:
+            queued = len(self.queue)
+            batches, batched_frames = self.batches, self.batched_frames
+
+        return {
+            'backend': self.backend_name,
+            'models': backends,
+            'is_running': self.is_running,
+            'queued': queued,
+            'batches': batches,
+            'avg_batch': round(batched_frames / batches, 2) if batches else 0.0,
+            'streams': self.get_stream_stats()
+        }
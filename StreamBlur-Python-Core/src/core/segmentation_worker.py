@@ -0,0 +1,128 @@
+# =============================================================================
+# File 14: src/core/segmentation_worker.py
+# =============================================================================
+
+import time
+import numpy as np
+from threading import Thread, Condition
+from typing import Callable, Optional, Tuple, NamedTuple, Dict, Any
+
+from ..utils.thread_budget import get_thread_budget
+
+
+class MaskResult(NamedTuple):
+    """Mask pubblicata dal worker con i riferimenti al frame sorgente"""
+    mask: np.ndarray
+    frame_index: int
+    timestamp: float
+    completed_at: float
+
+
+class SegmentationWorker:
+    """Worker di inferenza: segmenta sempre il frame più recente e pubblica l'ultima mask"""
+
+    def __init__(self, infer_fn: Callable[[np.ndarray, Tuple[int, int]], Optional[np.ndarray]]):
+        self.infer_fn = infer_fn
+
+        # Slot "ultimo frame" (sovrascritto) e slot "ultima mask"
+        self.condition = Condition()
+        self._pending: Optional[Tuple[np.ndarray, Tuple[int, int], int, float]] = None
+        self._latest: Optional[MaskResult] = None
+
+        # Threading
+        self.is_running = False
+        self.thread: Optional[Thread] = None
+
+        # Stats
+        self.frames_submitted = 0
+        self.frames_skipped = 0
+        self.inferences_completed = 0
+        self.masks_published = 0
+        self.completed_index = 0  # frame_index dell'ultima inferenza terminata (anche senza mask)
+
+    def start(self):
+        """Avvia thread di inferenza"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.thread = Thread(target=self._worker_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Ferma thread di inferenza"""
+        with self.condition:
+            self.is_running = False
+            self._pending = None
+            self.condition.notify_all()
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+    def submit(self, frame: np.ndarray, output_size: Tuple[int, int], frame_index: int):
+        """Pubblica un nuovo frame: se il precedente non è ancora partito viene scartato"""
+        with self.condition:
+            if self._pending is not None:
+                self.frames_skipped += 1
+            self._pending = (frame, output_size, frame_index, time.time())
+            self.frames_submitted += 1
+            self.condition.notify_all()
+
+    def latest(self) -> Optional[MaskResult]:
+        """Ultima mask disponibile (None se non ancora calcolata)"""
+        with self.condition:
+            return self._latest
+
+    def wait_for_inference(self, completed: int, timeout: float) -> bool:
+        """Attende che il numero di inferenze completate raggiunga 'completed'"""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.inferences_completed >= completed or not self.is_running,
+                timeout=timeout
+            ) and self.inferences_completed >= completed
+
+    def wait_for_frame(self, frame_index: int, timeout: float) -> bool:
+        """Attende al massimo timeout secondi che l'inferenza del frame frame_index sia terminata"""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.completed_index >= frame_index or not self.is_running,
+                timeout=timeout
+            ) and self.completed_index >= frame_index
+
+    def _worker_loop(self):
+        """Loop inferenza (thread separato)"""
+        get_thread_budget().pin_current_thread('inference')
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self._pending is not None or not self.is_running)
+                if not self.is_running:
+                    break
+                frame, output_size, frame_index, timestamp = self._pending
+                self._pending = None
+
+            mask = None
+            try:
+                mask = self.infer_fn(frame, output_size)
+            except Exception as e:
+                print(f"⚠️ Errore worker AI: {e}")
+                time.sleep(0.01)
+
+            with self.condition:
+                if mask is not None:
+                    self._latest = MaskResult(mask, frame_index, timestamp, time.time())
+                    self.masks_published += 1
+                self.inferences_completed += 1
+                self.completed_index = frame_index
+                self.condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche worker"""
+        with self.condition:
+            return {
+                'is_running': self.is_running,
+                'frames_submitted': self.frames_submitted,
+                'frames_skipped': self.frames_skipped,
+                'inferences_completed': self.inferences_completed,
+                'masks_published': self.masks_published
+            }
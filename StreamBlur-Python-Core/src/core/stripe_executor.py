@@ -0,0 +1,87 @@
+# =============================================================================
+# File 33: src/core/stripe_executor.py
+# =============================================================================
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, Dict, Any
+
+from ..utils.thread_budget import get_thread_budget
+
+# (y0, y1, a, b): righe di competenza della striscia e righe lette (con sovrapposizione)
+Stripe = Tuple[int, int, int, int]
+
+
+class StripeExecutor:
+    """Esegue uno stadio su strisce orizzontali del frame con un pool di thread persistente
+
+    Ogni striscia legge le righe [a, b) (sovrapposizione pari al raggio del filtro) e
+    scrive solo le proprie righe [y0, y1) nell'output preallocato del chiamante: le
+    strisce non si toccano e OpenCV/NumPy rilasciano il GIL durante il calcolo.
+    L'ultima striscia gira sul thread chiamante, che altrimenti resterebbe in attesa.
+    """
+
+    def __init__(self, stripes: int, stage: str = 'compositing'):
+        self.stripes = max(1, stripes)
+        self.stage = stage
+        self.pool: Optional[ThreadPoolExecutor] = None
+
+        # Stats per nome dello stadio
+        self.runs = 0
+        self.stage_ms: Dict[str, float] = {}
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        if self.pool is None:
+            # I thread del pool appartengono allo stesso stadio del loop che li usa
+            self.pool = ThreadPoolExecutor(max_workers=max(1, self.stripes - 1), thread_name_prefix='stripe',
+                                           initializer=get_thread_budget().pin_current_thread,
+                                           initargs=(self.stage,))
+        return self.pool
+
+    def bounds(self, height: int, overlap: int, align: int = 1) -> List[Stripe]:
+        """Strisce di altezza quasi uguale; inizio e sovrapposizione multipli di align"""
+        align = max(1, align)
+        overlap = -(-max(0, overlap) // align) * align
+        edges = [min(height, (height * index // self.stripes) // align * align) for index in range(self.stripes)]
+        edges.append(height)
+
+        stripes = []
+        for y0, y1 in zip(edges[:-1], edges[1:]):
+            if y1 > y0:
+                stripes.append((y0, y1, max(0, y0 - overlap), min(height, y1 + overlap)))
+        return stripes
+
+    def run(self, name: str, function: Callable[[int, int, int, int, int], None],
+            height: int, overlap: int, align: int = 1):
+        """function(indice, y0, y1, a, b) per ogni striscia; ritorna quando sono finite tutte"""
+        start_time = time.perf_counter()
+        stripes = self.bounds(height, overlap, align)
+
+        if len(stripes) == 1:
+            function(0, *stripes[0])
+        else:
+            pool = self._ensure_pool()
+            futures = [pool.submit(function, index, *stripe) for index, stripe in enumerate(stripes[:-1])]
+            function(len(stripes) - 1, *stripes[-1])
+            for future in futures:
+                # Rilancia nel chiamante eventuali errori delle strisce
+                future.result()
+
+        self.runs += 1
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        previous = self.stage_ms.get(name)
+        self.stage_ms[name] = elapsed_ms if previous is None else 0.9 * previous + 0.1 * elapsed_ms
+
+    def close(self):
+        """Ferma il pool (ricreato al prossimo run)"""
+        if self.pool:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche esecuzione a strisce"""
+        return {
+            'stripes': self.stripes,
+            'runs': self.runs,
+            'stage_ms': {name: round(value, 2) for name, value in self.stage_ms.items()}
+        }
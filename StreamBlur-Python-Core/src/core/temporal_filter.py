@@ -0,0 +1,121 @@
+# =============================================================================
+# File 20: src/core/temporal_filter.py
+# =============================================================================
+
+import math
+import cv2
+import numpy as np
+from typing import Optional, Dict, Any
+
+
+class TemporalMaskFilter:
+    """Filtro temporale della mask con accumulatori float preallocati (costo costante, zero allocazioni)
+
+    - 'ema': media esponenziale, peso del frame nuovo = 1 - strength
+    - 'one_euro': EMA con alpha per pixel che cresce con la velocità (stile one-euro filter):
+      stabile sui bordi fermi, senza scia sui movimenti rapidi
+    """
+
+    MODES = ('ema', 'one_euro')
+
+    def __init__(self, mode: str = 'ema', strength: float = 0.5,
+                 beta: float = 0.05, output_buffers: int = 3):
+        self.mode = mode if mode in self.MODES else 'ema'
+        self.beta = beta
+        self.output_buffers = max(2, output_buffers)
+        self.set_strength(strength)
+
+        # Buffer preallocati (ricreati solo se cambia la risoluzione mask)
+        self.shape: Optional[tuple] = None
+        self._accumulator: Optional[np.ndarray] = None
+        self._velocity: Optional[np.ndarray] = None
+        self._sample: Optional[np.ndarray] = None
+        self._alpha: Optional[np.ndarray] = None
+        self._outputs = []
+        self._next_output = 0
+
+        self.frames_filtered = 0
+        self.resets = 0
+
+    def set_strength(self, strength: float):
+        """Forza del filtro 0-1 (0 = nessun filtro, 1 = mask congelata)"""
+        self.strength = min(0.95, max(0.0, float(strength)))
+        self.alpha = 1.0 - self.strength
+
+        # one-euro: cutoff minimo (in cicli/frame) che dà alpha = 1 - strength a velocità zero
+        self.min_cutoff = self.alpha / (2 * math.pi * max(1e-6, 1.0 - self.alpha))
+
+    def _allocate(self, shape: tuple):
+        """Alloca accumulatori e ring di output per una risoluzione mask"""
+        self.shape = shape
+        self._accumulator = np.zeros(shape, dtype=np.float32)
+        self._velocity = np.zeros(shape, dtype=np.float32)
+        self._sample = np.zeros(shape, dtype=np.float32)
+        self._alpha = np.zeros(shape, dtype=np.float32)
+        # Ring di output: la mask pubblicata resta valida mentre il worker calcola le successive
+        self._outputs = [np.zeros(shape, dtype=np.uint8) for _ in range(self.output_buffers)]
+        self._next_output = 0
+        self.frames_filtered = 0
+
+    def apply(self, mask: np.ndarray) -> np.ndarray:
+        """Filtra una mask uint8; restituisce un buffer uint8 del ring di output"""
+        if mask.shape != self.shape:
+            self._allocate(mask.shape)
+
+        output = self._outputs[self._next_output]
+        self._next_output = (self._next_output + 1) % self.output_buffers
+
+        if self.frames_filtered == 0:
+            # Primo frame dopo reset: inizializza lo stato senza lag
+            np.copyto(self._accumulator, mask)
+            self._velocity.fill(0.0)
+        elif self.mode == 'ema':
+            cv2.accumulateWeighted(mask, self._accumulator, self.alpha)
+        else:
+            self._apply_one_euro(mask)
+
+        self.frames_filtered += 1
+        return cv2.convertScaleAbs(self._accumulator, dst=output)
+
+    def _apply_one_euro(self, mask: np.ndarray):
+        """Aggiornamento in-place: alpha per pixel da cutoff = min_cutoff + beta * |velocità|"""
+        sample, velocity, alpha = self._sample, self._velocity, self._alpha
+
+        # Differenza dal valore filtrato (livelli mask per frame)
+        np.copyto(sample, mask)
+        np.subtract(sample, self._accumulator, out=sample)
+
+        # Velocità smussata con alpha fisso (cutoff derivata = 1 ciclo/frame)
+        cv2.accumulateWeighted(sample, velocity, 0.86)
+
+        # alpha = 2π·fc / (2π·fc + 1) con Te = 1 frame
+        np.abs(velocity, out=alpha)
+        alpha *= self.beta
+        alpha += self.min_cutoff
+        alpha *= 2 * math.pi
+        self._ratio(alpha)
+
+        # acc += alpha * (x - acc)
+        np.multiply(sample, alpha, out=sample)
+        self._accumulator += sample
+
+    @staticmethod
+    def _ratio(values: np.ndarray):
+        """values <- values / (values + 1), in-place"""
+        np.reciprocal(values, out=values)
+        values += 1.0
+        np.reciprocal(values, out=values)
+
+    def reset(self):
+        """Azzera lo stato: il prossimo frame riparte senza storia (es. cambio modello)"""
+        self.frames_filtered = 0
+        self.resets += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni statistiche filtro temporale"""
+        return {
+            'mode': self.mode,
+            'strength': self.strength,
+            'frames_filtered': self.frames_filtered,
+            'resets': self.resets
+        }
@@ -12,6 +12,7 @@ from typing import Optional, Dict, Any
 
 from ..utils.config import StreamBlurConfig
 from ..utils.performance import PerformanceMonitor
+from ..utils.thread_budget import get_thread_budget
 
 class VirtualCameraManager:
     """Gestione Virtual Camera per StreamBlur Pro"""
@@ -126,6 +127,7 @@ class VirtualCameraManager:
     def _output_loop(self):
         """Loop output Virtual Camera (thread separato)"""
         print("📺 Thread Virtual Camera avviato...")
+        get_thread_budget().pin_current_thread('output')
         
         while self.is_running:
             try:
@@ -25,6 +25,7 @@ try:
     # Prova import relativi (se eseguito come modulo)
     from .utils.config import StreamBlurConfig
     from .utils.performance import PerformanceMonitor
+    from .utils.thread_budget import configure_thread_budget, get_thread_budget
     from .core.camera import CameraManager
     from .core.ai_processor import AIProcessor
     from .core.effects import EffectsProcessor
@@ -34,6 +35,7 @@ except ImportError:
     # Fallback a import assoluti (se eseguito direttamente)
     from utils.config import StreamBlurConfig
     from utils.performance import PerformanceMonitor
+    from utils.thread_budget import configure_thread_budget, get_thread_budget
     from core.camera import CameraManager
     from core.ai_processor import AIProcessor
     from core.effects import EffectsProcessor
@@ -67,6 +69,9 @@ class StreamBlurProApp:
         self.config = StreamBlurConfig()
         self.performance = PerformanceMonitor()
         
+        # Budget thread CPU (pool OpenCV, thread AI, affinity per stadio)
+        self.thread_budget = configure_thread_budget(self.config)
+        
         # Inizializza moduli core
         self.camera = CameraManager(self.config, self.performance)
         self.ai_processor = AIProcessor(self.config, self.performance)
@@ -176,6 +181,7 @@ class StreamBlurProApp:
     def _processing_loop(self):
         """Loop principale processing (thread separato)"""
         print("🔄 Loop processing avviato...")
+        get_thread_budget().pin_current_thread('compositing')
         
         while self.is_processing:
             start_time = time.time()
@@ -195,8 +201,12 @@ class StreamBlurProApp:
                 mask = self.ai_processor.process_frame(processed_frame, output_size)
                 
                 if mask is not None:
-                    # Applica blur allo sfondo
-                    final_frame = self.effects.apply_background_blur(processed_frame, mask)
+                    # Applica blur allo sfondo (in idle: sfondo in cache, aggiornato sui frame sonda)
+                    if self.ai_processor.is_idle():
+                        final_frame = self.effects.apply_idle_blur(processed_frame,
+                                                                   refresh=not self.ai_processor.idle_skipped)
+                    else:
+                        final_frame = self.effects.apply_background_blur(processed_frame, mask)
                     
                     # Invia alla virtual camera
                     self.virtual_camera.send_frame(final_frame)
@@ -266,6 +276,14 @@ class StreamBlurProApp:
         """Imposta noise reduction"""
         self.effects.set_noise_reduction(enabled)
     
+    def set_background_mode(self, mode: str):
+        """Imposta modalità sfondo (blur/replace)"""
+        self.effects.set_background_mode(mode)
+    
+    def set_background_image(self, path: str) -> bool:
+        """Imposta immagine di sfondo per la sostituzione"""
+        return self.effects.set_background_image(path)
+    
     def get_stats(self) -> dict:
         """Ottieni statistiche complete applicazione"""
         perf_stats = self.performance.get_stats()
@@ -299,6 +317,7 @@ class StreamBlurProApp:
         # Cleanup moduli
         self.camera.cleanup()
         self.ai_processor.cleanup()
+        self.effects.cleanup()
         self.virtual_camera.cleanup()
         
         # Chiudi preview se aperto
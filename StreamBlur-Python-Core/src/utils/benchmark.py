@@ -0,0 +1,587 @@
+# =============================================================================
+# File 27: src/utils/benchmark.py
+# =============================================================================
+
+"""
+Benchmark della pipeline StreamBlur su frame sintetici (nessuna camera necessaria)
+
+    python -m src.utils.benchmark threads [--frames 200] [--backend mediapipe] [--subprocess]
+    python -m src.utils.benchmark hybrid [--frames 120] [--interval 5]
+    python -m src.utils.benchmark compositor [--iterations 50]
+    python -m src.utils.benchmark blur [--iterations 20]
+    python -m src.utils.benchmark stripes [--iterations 20] [--max-stripes N]
+    python -m src.utils.benchmark incremental [--video clip.mp4] [--frames 300]
+    python -m src.utils.benchmark replace [--iterations 50]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from .config import StreamBlurConfig
+from .performance import PerformanceMonitor
+from .thread_budget import ThreadBudgetManager, configure_thread_budget, get_thread_budget
+
+
+# Cartella temporanea delle config del benchmark (eliminata all'uscita)
+_config_root: Optional[tempfile.TemporaryDirectory] = None
+
+
+def _bench_config() -> StreamBlurConfig:
+    """Config di default isolata: il benchmark non legge né salva ~/.streamblur_pro"""
+    global _config_root
+    if _config_root is None:
+        _config_root = tempfile.TemporaryDirectory(prefix='streamblur_benchmark_')
+    return StreamBlurConfig(Path(tempfile.mkdtemp(dir=_config_root.name)))
+
+
+def _synthetic_frames(count: int, width: int, height: int):
+    """Frame sintetici con la sagoma in movimento (il motion gate non può saltarli)"""
+    from ..core.model_pool import synthetic_frame
+
+    base = synthetic_frame(width, height)
+    for index in range(count):
+        yield np.roll(base, (index * 7) % width, axis=1)
+
+
+def _percentile_ms(values: List[float], percentile: float) -> float:
+    return round(float(np.percentile(values, percentile)) * 1000, 2) if values else 0.0
+
+
+def run_pipeline(config: StreamBlurConfig, frames: int) -> Dict[str, Any]:
+    """AI + compositing su frame sintetici alla risoluzione camera; throughput e p95 per frame"""
+    from ..core.ai_processor import AIProcessor
+    from ..core.effects import EffectsProcessor
+
+    width = config.get('video.camera_width', 1280)
+    height = config.get('video.camera_height', 720)
+
+    performance = PerformanceMonitor()
+    ai_processor = AIProcessor(config, performance)
+    effects = EffectsProcessor(config)
+    if not ai_processor.initialize():
+        return {'error': 'AI non disponibile'}
+
+    # Il thread chiamante fa da loop principale (stadio compositing)
+    get_thread_budget().pin_current_thread('compositing')
+
+    frame_times = []
+    start_time = time.perf_counter()
+    try:
+        for frame in _synthetic_frames(frames, width, height):
+            frame_start = time.perf_counter()
+            mask = ai_processor.process_frame(frame, (width, height))
+            if mask is not None:
+                effects.apply_background_blur(frame, mask)
+            frame_times.append(time.perf_counter() - frame_start)
+        elapsed = time.perf_counter() - start_time
+    finally:
+        ai_processor.cleanup()
+
+    # Primi frame esclusi: warm-up di worker e pool OpenCV
+    steady = frame_times[min(10, len(frame_times) // 5):]
+    return {
+        'fps': round(len(frame_times) / elapsed, 1),
+        'p50_ms': _percentile_ms(steady, 50),
+        'p95_ms': _percentile_ms(steady, 95),
+        'inference_ms': performance.get_stage_stats().get('inference', {}).get('average_ms', 0.0)
+    }
+
+
+def sweep_thread_budgets(frames: int = 200, backend: Optional[str] = None,
+                         subprocess: bool = False) -> List[Dict[str, Any]]:
+    """Prova combinazioni di thread OpenCV, thread AI e suddivisione dei core; ordina per p95"""
+    cores = ThreadBudgetManager().available_cores
+    thread_counts = sorted({1, 2, 4, len(cores) // 2, len(cores)} - {0})
+    thread_counts = [count for count in thread_counts if count <= len(cores)]
+
+    # Suddivisioni dei core (solo Linux con almeno 4 core); None = nessun pinning
+    splits: List[Optional[float]] = [None]
+    if hasattr(os, 'sched_setaffinity') and len(cores) >= 4:
+        splits += [0.25, 0.5]
+
+    # In-process i thread AI non sono un parametro indipendente (MediaPipe non li espone,
+    # cv2.dnn condivide il pool OpenCV): si variano solo nel processo figlio
+    inference_counts = thread_counts if subprocess else [0]
+    original_affinity = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else None
+
+    results = []
+    for split in splits:
+        for opencv_threads in thread_counts:
+            for inference_threads in inference_counts:
+                config = _bench_config()
+                if backend:
+                    config.config['ai']['backend'] = backend
+                config.config['ai']['inference_mode'] = 'subprocess' if subprocess else 'inprocess'
+                config.config['threads'] = {
+                    'opencv_threads': opencv_threads,
+                    'inference_threads': inference_threads,
+                    'pin_threads': split is not None,
+                    'core_sets': ThreadBudgetManager.auto_core_sets(cores, split) if split else {}
+                }
+
+                configure_thread_budget(config)
+                result = run_pipeline(config, frames)
+                if original_affinity is not None:
+                    os.sched_setaffinity(0, original_affinity)
+
+                result.update({
+                    'opencv_threads': opencv_threads,
+                    'inference_threads': inference_threads or 'default',
+                    'compositing_share': split or 'no pinning'
+                })
+                results.append(result)
+                print(f"   cv2={opencv_threads:>2} ai={str(result['inference_threads']):>7} "
+                      f"split={str(result['compositing_share']):>10} → {result.get('fps', 0):>6} fps, "
+                      f"p95 {result.get('p95_ms', 0)}ms")
+
+    results = [result for result in results if 'error' not in result]
+    results.sort(key=lambda result: (result['p95_ms'], -result['fps']))
+    return results
+
+
+def _segment_masks(config: StreamBlurConfig, frames: int) -> Dict[str, Any]:
+    """Solo segmentazione (sincrona) su frame sintetici: ms per frame e mask binarie prodotte"""
+    from ..core.ai_processor import AIProcessor
+
+    width = config.get('video.camera_width', 1280)
+    height = config.get('video.camera_height', 720)
+
+    ai_processor = AIProcessor(config, PerformanceMonitor())
+    if not ai_processor.initialize():
+        return {'error': 'AI non disponibile'}
+
+    masks = []
+    frame_times = []
+    try:
+        for frame in _synthetic_frames(frames, width, height):
+            frame_start = time.perf_counter()
+            mask = ai_processor.process_frame(frame, (width, height))
+            frame_times.append(time.perf_counter() - frame_start)
+            # La mask vive in un ring di buffer: copia binarizzata
+            masks.append(mask > 127 if mask is not None else None)
+        stats = ai_processor.get_stats().get('hybrid')
+    finally:
+        ai_processor.cleanup()
+
+    steady = frame_times[min(10, len(frame_times) // 5):]
+    return {'masks': masks, 'mean_ms': round(float(np.mean(steady)) * 1000, 2) if steady else 0.0,
+            'p95_ms': _percentile_ms(steady, 95), 'hybrid': stats}
+
+
+def _mean_iou(masks: List[Optional[np.ndarray]], reference: List[Optional[np.ndarray]]) -> float:
+    scores = []
+    for mask, expected in zip(masks, reference):
+        if mask is None or expected is None or mask.shape != expected.shape:
+            continue
+        union = np.count_nonzero(mask | expected)
+        scores.append(np.count_nonzero(mask & expected) / union if union else 1.0)
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def compare_hybrid(frames: int = 120, interval: int = 5, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Veloce, ibrido (in linea e su worker) e accurato su ogni frame: costo e IoU rispetto all'accurato"""
+    variants = [
+        ('accurate', {'performance_mode': False}),
+        ('fast', {'performance_mode': True}),
+        ('hybrid_inline', {'performance_mode': True, 'hybrid_mode': True, 'hybrid_background': False}),
+        ('hybrid_background', {'performance_mode': True, 'hybrid_mode': True, 'hybrid_background': True}),
+    ]
+
+    reference = None
+    results = []
+    for name, overrides in variants:
+        config = _bench_config()
+        # Stesso frame in ingresso, stessa mask attesa: niente worker, gate o filtri temporali
+        config.config['ai'].update({
+            'async_inference': False, 'motion_gate_enabled': False, 'keyframe_mode': False,
+            'roi_tracking': False, 'hybrid_interval': interval
+        })
+        config.config['ai'].update(overrides)
+        config.config['effects']['temporal_smoothing'] = False
+        if backend:
+            config.config['ai']['backend'] = backend
+
+        result = _segment_masks(config, frames)
+        if 'error' in result:
+            print(f"   {name:>17} → {result['error']}")
+            continue
+
+        masks = result.pop('masks')
+        if reference is None:
+            reference = masks
+        result.update({'variant': name, 'iou': _mean_iou(masks, reference)})
+        results.append(result)
+        print(f"   {name:>17} → {result['mean_ms']:>7}ms/frame (p95 {result['p95_ms']}ms), "
+              f"IoU vs accurato {result['iou']}")
+    return results
+
+
+def _float_composite(frame: np.ndarray, background: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Compositing float a 3 canali precedente all'AlphaCompositor (riferimento)"""
+    import cv2
+
+    mask_3ch = np.stack([mask.astype(np.float32) / 255.0] * 3, axis=-1)
+    mask_blurred = cv2.GaussianBlur(mask_3ch, (5, 5), 1.5)
+    return (frame * mask_blurred + background * (1 - mask_blurred)).astype(np.uint8)
+
+
+def compare_compositors(iterations: int = 50) -> List[Dict[str, Any]]:
+    """Compositor float vs alpha uint8 a 720p e 1080p: ms per frame e differenza massima/media"""
+    import cv2
+    from ..core.compositor import AlphaCompositor
+    from ..core.model_pool import synthetic_frame
+
+    results = []
+    for width, height in ((1280, 720), (1920, 1080)):
+        frame = synthetic_frame(width, height)
+        background = cv2.GaussianBlur(frame, (31, 31), 0)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.ellipse(mask, (width // 2, height * 2 // 3), (width // 6, height // 2), 0, 0, 360, 255, -1)
+        # Bordo morbido come quello di una mask reale upsamplata
+        mask = cv2.GaussianBlur(mask, (0, 0), 3)
+
+        dense = AlphaCompositor(sparse=False)
+        sparse = AlphaCompositor(sparse=True)
+        timings = {}
+        outputs = {}
+        for name, composite in (('float', lambda: _float_composite(frame, background, mask)),
+                                ('fixed_point', lambda: dense.composite(frame, background, mask, (5, 1.5))),
+                                ('sparse', lambda: sparse.composite(frame, background, mask, (5, 1.5)))):
+            # Copia: l'output dei compositor è un ring riusato dalle iterazioni successive
+            outputs[name] = composite().copy()
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                composite()
+            timings[name] = (time.perf_counter() - start_time) / iterations * 1000
+
+        difference = cv2.absdiff(outputs['float'], outputs['fixed_point'])
+        result = {
+            'resolution': f"{width}x{height}",
+            'float_ms': round(timings['float'], 2),
+            'fixed_point_ms': round(timings['fixed_point'], 2),
+            'sparse_ms': round(timings['sparse'], 2),
+            'speedup': round(timings['float'] / max(timings['fixed_point'], 1e-6), 2),
+            'max_diff': int(difference.max()),
+            'mean_diff': round(float(difference.mean()), 4),
+            # Il blend sparso deve coincidere con quello denso
+            'sparse_max_diff': int(cv2.absdiff(outputs['fixed_point'], outputs['sparse']).max()),
+            'band_fraction': sparse.get_stats()['band_fraction']
+        }
+        results.append(result)
+        print(f"   {result['resolution']:>9} → float {result['float_ms']}ms, fixed-point {result['fixed_point_ms']}ms "
+              f"(x{result['speedup']}), diff max {result['max_diff']} / media {result['mean_diff']}")
+        print(f"   {'':>9}   sparso {result['sparse_ms']}ms, tile fusi {result['band_fraction']:.1%}, "
+              f"diff vs denso {result['sparse_max_diff']}")
+    return results
+
+
+def blur_table(iterations: int = 20, intensities=(1, 5, 10, 12.5, 15, 20, 25)) -> List[Dict[str, Any]]:
+    """ms per frame dello sfondo sfocato per intensità, risoluzione e algoritmo"""
+    from ..core.effects import EffectsProcessor
+    from ..core.model_pool import synthetic_frame
+
+    results = []
+    for width, height in ((1280, 720), (1920, 1080)):
+        frame = synthetic_frame(width, height)
+        print(f"   {width}x{height}   " + "".join(f"{intensity:>8}" for intensity in intensities))
+        for algorithm in ('optimized', 'quality', 'pyramid'):
+            effects = EffectsProcessor(_bench_config())
+            effects.algorithm = algorithm
+            row = []
+            for intensity in intensities:
+                # Senza config.set: nessun salvataggio su file a ogni intensità
+                effects.blur_intensity = intensity if algorithm == 'pyramid' else int(intensity)
+                effects.blur_background(frame)
+                start_time = time.perf_counter()
+                for _ in range(iterations):
+                    effects.blur_background(frame)
+                elapsed_ms = (time.perf_counter() - start_time) / iterations * 1000
+                row.append(elapsed_ms)
+                results.append({'resolution': f"{width}x{height}", 'algorithm': algorithm,
+                                'intensity': intensity, 'ms': round(elapsed_ms, 2)})
+            print(f"   {algorithm:>9}   " + "".join(f"{elapsed_ms:>8.2f}" for elapsed_ms in row) +
+                  f"   (max/min x{max(row) / max(min(row), 1e-6):.1f})")
+    return results
+
+
+def stripe_scaling(iterations: int = 20, max_stripes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Blur + compositing a strisce da 1 a N thread: ms per frame e speedup a 720p e 1080p"""
+    import cv2
+    from ..core.effects import EffectsProcessor
+    from ..core.model_pool import synthetic_frame
+
+    cores = len(ThreadBudgetManager().available_cores)
+    max_stripes = max_stripes or cores
+    stripe_counts = sorted({1, 2, 4, 8, max_stripes} & set(range(1, max_stripes + 1)))
+
+    results = []
+    for width, height in ((1280, 720), (1920, 1080)):
+        frame = synthetic_frame(width, height)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.ellipse(mask, (width // 2, height * 2 // 3), (width // 6, height // 2), 0, 0, 360, 255, -1)
+
+        baseline = None
+        for stripes in stripe_counts:
+            config = _bench_config()
+            config.config['effects']['parallel_stripes'] = stripes
+            effects = EffectsProcessor(config)
+            try:
+                effects.apply_background_blur(frame, mask)
+                start_time = time.perf_counter()
+                for _ in range(iterations):
+                    effects.apply_background_blur(frame, mask)
+                elapsed_ms = (time.perf_counter() - start_time) / iterations * 1000
+            finally:
+                effects.cleanup()
+
+            baseline = baseline or elapsed_ms
+            result = {'resolution': f"{width}x{height}", 'stripes': stripes, 'ms': round(elapsed_ms, 2),
+                      'speedup': round(baseline / elapsed_ms, 2)}
+            results.append(result)
+            print(f"   {result['resolution']:>9} strisce={stripes:>2} → {result['ms']:>7}ms (x{result['speedup']})")
+    return results
+
+
+def _desk_clip(count: int, width: int = 1280, height: int = 720):
+    """Clip sintetica da scrivania: sfondo fisso con rumore del sensore e persona che si muove poco"""
+    import cv2
+    from ..core.model_pool import synthetic_frame
+
+    background = synthetic_frame(width, height)
+    rng = np.random.default_rng(0)
+    for index in range(count):
+        frame = background.copy()
+        sway = int(40 * np.sin(index / 15.0))
+        cv2.ellipse(frame, (width // 2 + sway, height * 2 // 3), (width // 8, height // 3), 0, 0, 360,
+                    (90, 120, 200), -1)
+        noise = rng.integers(-2, 3, frame.shape, dtype=np.int16)
+        yield cv2.add(frame, noise, dtype=cv2.CV_8U)
+
+
+def _video_clip(path: str, count: int):
+    """Frame di una clip registrata (es. setup da scrivania con camera fissa)"""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    try:
+        for _ in range(count):
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        capture.release()
+
+
+def compare_incremental(frames: int = 300, video: Optional[str] = None,
+                        algorithms=('optimized', 'quality', 'pyramid')) -> Dict[str, Any]:
+    """Blur completo vs incrementale sugli stessi frame, per algoritmo: ms per frame, tile sporchi, differenza
+
+    La cache incrementale è chiamata direttamente: si misura anche la piramide, per cui
+    EffectsProcessor la disattiva (nessun risparmio).
+    """
+    import cv2
+    from ..core.effects import EffectsProcessor
+
+    clip = list(_video_clip(video, frames) if video else _desk_clip(frames))
+    if not clip:
+        return {'error': f"Nessun frame da {video}"}
+
+    results = {}
+    for algorithm in algorithms:
+        config = _bench_config()
+        config.config['blur']['algorithm'] = algorithm
+        full = EffectsProcessor(config)
+        config.config['effects']['incremental_blur'] = True
+        incremental = EffectsProcessor(config)
+        cache = incremental.incremental_blur
+
+        full_times, incremental_times, differences, dirty_ratios = [], [], [], []
+        for frame in clip:
+            start_time = time.perf_counter()
+            expected = full.blur_background(frame).copy()
+            full_times.append(time.perf_counter() - start_time)
+
+            frame_size = (frame.shape[1], frame.shape[0])
+            start_time = time.perf_counter()
+            background = cache.blur(frame, incremental._full_background,
+                                    lambda region: incremental._region_background(region, frame_size),
+                                    *incremental._blur_margin(frame_size))
+            incremental_times.append(time.perf_counter() - start_time)
+
+            dirty_ratios.append(cache.dirty_ratio)
+            differences.append(cv2.absdiff(expected, background).max())
+
+        full_ms = float(np.mean(full_times)) * 1000
+        incremental_ms = float(np.mean(incremental_times)) * 1000
+        result = {
+            'frames': len(clip),
+            'full_ms': round(full_ms, 2),
+            'incremental_ms': round(incremental_ms, 2),
+            # Negativo: l'incrementale costa più del blur completo
+            'cpu_saved': round(1.0 - incremental_ms / max(full_ms, 1e-6), 3),
+            'mean_dirty_ratio': round(float(np.mean(dirty_ratios)), 4),
+            'max_diff': int(max(differences)),
+            'stats': cache.get_stats()
+        }
+        results[algorithm] = result
+        print(f"   {algorithm:>9}: completo {result['full_ms']}ms, incrementale {result['incremental_ms']}ms "
+              f"(risparmio {result['cpu_saved']:+.0%}), tile sporchi {result['mean_dirty_ratio']:.1%}, "
+              f"diff max {result['max_diff']}")
+    return results
+
+
+def compare_replacement(iterations: int = 50) -> Dict[str, Any]:
+    """Blur vs sostituzione sfondo a 720p: ms per frame, costo del cambio sfondo e della cache su disco"""
+    import cv2
+    from ..core.effects import EffectsProcessor
+    from ..core.background_store import BackgroundStore
+    from ..core.model_pool import synthetic_frame
+
+    width, height = 1280, 720
+    frame = synthetic_frame(width, height)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.ellipse(mask, (width // 2, height * 2 // 3), (width // 6, height // 2), 0, 0, 360, 255, -1)
+    mask = cv2.GaussianBlur(mask, (0, 0), 3)
+
+    config = _bench_config()
+    effects = EffectsProcessor(config)
+
+    def per_frame_ms() -> float:
+        effects.apply_background_blur(frame, mask)
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            effects.apply_background_blur(frame, mask)
+        return (time.perf_counter() - start_time) / iterations * 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Due sfondi con aspect diverso da quello del frame (ritaglio "cover")
+        paths = []
+        for index, size in enumerate(((1920, 1440), (800, 1200))):
+            path = os.path.join(directory, f"background_{index}.jpg")
+            cv2.imwrite(path, synthetic_frame(*size))
+            paths.append(path)
+
+        blur_ms = per_frame_ms()
+        effects.background_store = BackgroundStore(os.path.join(directory, 'cache'))
+        effects.background_mode = 'replace'
+
+        start_time = time.perf_counter()
+        effects.background_store.select(paths[0], [(width, height)])
+        first_load_ms = (time.perf_counter() - start_time) * 1000
+        effects.background_store.select(paths[1], [(width, height)])
+        replace_ms = per_frame_ms()
+
+        # Cambio tra sfondi già pronti: solo lookup
+        start_time = time.perf_counter()
+        for index in range(iterations):
+            effects.background_store.select(paths[index % 2], [(width, height)])
+        switch_ms = (time.perf_counter() - start_time) / iterations * 1000
+
+        # Riavvio: nuova istanza, stessi file .npy memory-mapped
+        store = BackgroundStore(os.path.join(directory, 'cache'))
+        start_time = time.perf_counter()
+        store.select(paths[0], [(width, height)])
+        disk_load_ms = (time.perf_counter() - start_time) * 1000
+        disk_stats = store.get_stats()
+        effects.background_store.clear_memory()
+        store.clear_memory()
+
+    result = {
+        'resolution': f"{width}x{height}",
+        'blur_ms': round(blur_ms, 2),
+        'replace_ms': round(replace_ms, 2),
+        'first_load_ms': round(first_load_ms, 2),
+        'disk_load_ms': round(disk_load_ms, 2),
+        'switch_ms': round(switch_ms, 3),
+        'disk_decodes': disk_stats['decodes']
+    }
+    print(f"   {result['resolution']} → blur {result['blur_ms']}ms, sostituzione {result['replace_ms']}ms per frame")
+    print(f"   primo caricamento {result['first_load_ms']}ms, da cache .npy {result['disk_load_ms']}ms "
+          f"({result['disk_decodes']} decode), cambio sfondo {result['switch_ms']}ms")
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark StreamBlur Pro')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    threads = commands.add_parser('threads', help='Sweep del budget thread CPU')
+    threads.add_argument('--frames', type=int, default=200)
+    threads.add_argument('--backend', default=None, help='Backend AI (default: config)')
+    threads.add_argument('--subprocess', action='store_true', help='Inferenza in processo figlio (sweep thread AI)')
+
+    hybrid = commands.add_parser('hybrid', help='Modalità ibrida: costo e IoU rispetto al modello accurato')
+    hybrid.add_argument('--frames', type=int, default=120)
+    hybrid.add_argument('--interval', type=int, default=5, help='Frame tra due inferenze accurate')
+    hybrid.add_argument('--backend', default=None, help='Backend AI (default: config)')
+
+    compositor = commands.add_parser('compositor', help='Compositor float vs alpha uint8 a 720p/1080p')
+    compositor.add_argument('--iterations', type=int, default=50)
+
+    blur = commands.add_parser('blur', help='ms per frame del blur per intensità e risoluzione')
+    blur.add_argument('--iterations', type=int, default=20)
+
+    stripes = commands.add_parser('stripes', help='Scaling di blur e compositing a strisce su 1..N thread')
+    stripes.add_argument('--iterations', type=int, default=20)
+    stripes.add_argument('--max-stripes', type=int, default=None, help='Default: core disponibili')
+
+    incremental = commands.add_parser('incremental', help='Blur completo vs incrementale (camera fissa)')
+    incremental.add_argument('--video', default=None, help='Clip registrata (default: clip sintetica)')
+    incremental.add_argument('--frames', type=int, default=300)
+
+    replace = commands.add_parser('replace', help='Blur vs sostituzione sfondo e costo del cambio immagine')
+    replace.add_argument('--iterations', type=int, default=50)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'threads':
+        print(f"🧵 Sweep budget thread su {len(ThreadBudgetManager().available_cores)} core...")
+        results = sweep_thread_budgets(args.frames, args.backend, args.subprocess)
+        if not results:
+            print("❌ Nessuna configurazione eseguita")
+            return 1
+
+        best = results[0]
+        print(f"🏆 Migliore: cv2={best['opencv_threads']} ai={best['inference_threads']} "
+              f"split={best['compositing_share']} → {best['fps']} fps, p95 {best['p95_ms']}ms")
+
+    elif args.command == 'hybrid':
+        print(f"🔀 Confronto modalità ibrida (accurato ogni {args.interval} frame)...")
+        if not compare_hybrid(args.frames, args.interval, args.backend):
+            print("❌ Nessuna variante eseguita")
+            return 1
+
+    elif args.command == 'compositor':
+        print(f"🎨 Microbenchmark compositor ({args.iterations} iterazioni)...")
+        compare_compositors(args.iterations)
+
+    elif args.command == 'blur':
+        print(f"🌫️ Tabella blur per intensità ({args.iterations} iterazioni, ms per frame)...")
+        blur_table(args.iterations)
+
+    elif args.command == 'stripes':
+        print(f"🧵 Scaling a strisce su {len(ThreadBudgetManager().available_cores)} core...")
+        stripe_scaling(args.iterations, args.max_stripes)
+
+    elif args.command == 'incremental':
+        print(f"🧱 Blur incrementale su {args.video or 'clip sintetica da scrivania'} ({args.frames} frame)...")
+        result = compare_incremental(args.frames, args.video)
+        if 'error' in result:
+            print(f"❌ {result['error']}")
+            return 1
+
+    elif args.command == 'replace':
+        print(f"🖼️ Sostituzione sfondo ({args.iterations} iterazioni)...")
+        compare_replacement(args.iterations)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,13 +5,14 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class StreamBlurConfig:
     """Gestione configurazione StreamBlur Pro"""
     
-    def __init__(self):
-        self.config_dir = Path.home() / ".streamblur_pro"
+    def __init__(self, config_dir: Optional[Path] = None):
+        # config_dir diversa dalla home: config isolata (benchmark, test)
+        self.config_dir = Path(config_dir) if config_dir else Path.home() / ".streamblur_pro"
         self.config_file = self.config_dir / "config.json"
         
         # Crea directory se non esiste
@@ -30,22 +31,88 @@ class StreamBlurConfig:
                 "blur_intensity": 15,
                 "edge_smoothing": True,
                 "temporal_smoothing": True,
-                "noise_reduction": False
+                "temporal_filter": "ema",  # ema/one_euro (one_euro: alpha adattivo alla velocità)
+                "temporal_strength": 0.5,  # 0 = nessun filtro, 0.95 = massimo
+                "temporal_beta": 0.05,  # Reattività one_euro ai movimenti
+                "noise_reduction": False,
+                "edge_refinement": "morphology",  # morphology/guided (refinement bordi mask)
+                "mask_upsampling": "linear",  # linear/guided (upsample mask nel compositor)
+                "guided_radius": 2,  # Raggio guided filter a risoluzione AI
+                "guided_eps": 0.001,
+                "sparse_compositing": False,  # Blend solo sui tile del bordo (conviene da 1080p con bordo sottile)
+                "composite_tile": 32,  # Lato tile (px frame) della classificazione persona/bordo/sfondo
+                "parallel_stripes": 0,  # Blur e compositing a strisce su N thread (0 = thread del loop)
+                "incremental_blur": False,  # Camera fissa: risfoca solo i tile cambiati dello sfondo
+                "incremental_threshold": 10.0,  # Differenza per pixel (livelli di grigio) oltre il rumore del sensore
+                "incremental_refresh_frames": 60,  # Blur completo forzato ogni N frame
+                "background_mode": "blur",  # blur/replace (immagine di sfondo al posto del blur)
+                "background_image": "",  # Immagine per replace (cache pre-scalata in ~/.streamblur_pro/backgrounds)
+                "background_cache_mb": 256  # Limite della cache sfondi su disco (i meno recenti vengono eliminati)
             },
             "ai": {
                 "performance_mode": False,  # False=accurato per scontorno preciso
                 "fast_inference": True,
-                "model_quality": "accurate"  # accurate/fast
+                "model_quality": "accurate",  # accurate/fast
+                "backend": "mediapipe",  # mediapipe/opencv_dnn/threshold (registro segmentation_backends)
+                "onnx_model_path": "",  # Modello ONNX per il backend opencv_dnn
+                "onnx_input_size": [256, 256],
+                "onnx_color_order": "RGB",
+                "onnx_scale": 0.00392156862745098,  # 1/255
+                "onnx_output": "probability",  # probability/sigmoid/softmax
+                "onnx_person_channel": 1,
+                "threshold_level": 0,  # Backend threshold: 0 = Otsu
+                "preload_models": True,  # Modelli veloce e accurato caldi: cambio senza stallo
+                "warmup_iterations": 3,  # Inferenze su frame sintetico prima dei frame reali
+                "adaptive_high_ratio": 0.85,  # Qualità auto: scende se p95 > 85% del budget frame
+                "adaptive_low_ratio": 0.5,  # Qualità auto: sale se p95 < 50% del budget frame
+                "adaptive_cpu_high": 90.0,  # Qualità auto: scende se la CPU di sistema supera questa soglia
+                "async_inference": False,  # Inferenza su worker, compositing a frame rate camera (sperimentale)
+                "first_mask_timeout": 1.0,  # Secondi di attesa della prima mask
+                "frame_deadline_ms": "auto",  # Attesa max della mask del frame ("auto" = ratio del budget, 0 = nessuna)
+                "frame_deadline_ratio": 0.6,  # Frazione del budget frame concessa all'inferenza
+                "inference_mode": "inprocess",  # inprocess/subprocess (backend in processo figlio)
+                "shared_memory_ring_size": 3,
+                "service_max_batch": 4,  # Servizio multi-camera: frame per inferenza batch
+                "service_batch_window_ms": 2.0,  # Attesa max per completare un batch
+                "motion_gate_enabled": False,  # Salta inferenza se la scena non cambia (sperimentale)
+                "motion_gate_threshold": 3.0,  # Differenza media per tile (livelli di grigio)
+                "motion_gate_tiles": [16, 9],
+                "motion_gate_max_skip": 10,  # Refresh forzato ogni N frame saltati
+                "presence_detection": False,  # Senza persona in scena: inferenza a frequenza sonda (sperimentale)
+                "presence_min_coverage": 0.01,  # Copertura mask minima per considerare la persona presente
+                "presence_absence_seconds": 5.0,  # Assenza prima di entrare in idle
+                "idle_probe_interval": 0.5,  # Secondi tra due frame sonda in idle (prima se la scena cambia)
+                "keyframe_mode": False,  # MediaPipe ogni K frame + propagazione optical flow
+                "keyframe_interval": 3,  # K massimo
+                "keyframe_min_interval": 1,  # K minimo con movimento forte
+                "keyframe_motion_low": 0.3,  # Flow medio (px AI) sotto cui K cresce
+                "keyframe_motion_high": 2.0,  # Flow medio (px AI) sopra cui K cala
+                "hybrid_mode": False,  # Veloce su ogni frame + accurato ogni N frame sul bordo incerto
+                "hybrid_interval": 5,  # N: frame tra due inferenze accurate
+                "hybrid_background": True,  # Accurato su worker dedicato (nessun picco sul frame)
+                "hybrid_band": [0.1, 0.9],  # Probabilità veloce considerata incerta
+                "hybrid_band_radius": 4,  # Dilatazione banda (px AI)
+                "letterbox": False,  # Input AI con aspect preservato (camere 4:3/verticali), mask riportata al frame
+                "roi_tracking": False,  # Inferenza sul ritaglio attorno alla persona
+                "roi_padding": 0.15,  # Margine attorno al bounding box (frazione)
+                "roi_full_frame_interval": 30,  # Passata a frame intero ogni N frame
+                "roi_canvas_scale": 2.0  # Risoluzione mask con ROI = AI x scala (dettaglio del ritaglio)
             },
             "blur": {
-                "algorithm": "optimized",  # optimized/quality
+                "algorithm": "optimized",  # optimized/quality/pyramid (pyramid: costo costante sull'intensità)
                 "intensity_multiplier": 1.8,  # Per blur più intenso
                 "use_gpu_acceleration": True
             },
             "performance": {
                 "buffer_size": 2,
-                "temporal_buffer_size": 2,
-                "edge_kernel_size": 3
+                "edge_kernel_size": 3,
+                "allocation_check": "off"  # off/measure/assert: temporanei per stadio via tracemalloc
+            },
+            "threads": {
+                "opencv_threads": 0,  # Pool OpenCV (0 = default, o core 'compositing' con pin_threads)
+                "inference_threads": 0,  # Thread backend AI / processo figlio (0 = default)
+                "pin_threads": False,  # Linux: ogni stadio fissato al proprio set di core
+                "core_sets": {}  # Stadio -> core, es. {"capture": [0], "inference": [4, 5, 6, 7]}; vuoto = automatico
             },
             "gui": {
                 "theme": "clam",
@@ -68,8 +135,13 @@ class StreamBlurConfig:
             try:
                 with open(self.config_file, 'r') as f:
                     config = json.load(f)
-                    # Merge con default per nuove opzioni
-                    return self._merge_configs(self.default_config, config)
+                # Chiavi di versioni precedenti convertite e salvate una volta sola
+                migrated = self._migrate_config(config)
+                # Merge con default per nuove opzioni
+                config = self._merge_configs(self.default_config, config)
+                if migrated:
+                    self._save_config(config)
+                return config
             except Exception as e:
                 print(f"⚠️ Errore caricamento config: {e}")
                 return self.default_config.copy()
@@ -78,6 +150,22 @@ class StreamBlurConfig:
             self._save_config(self.default_config)
             return self.default_config.copy()
     
+    def _migrate_config(self, loaded: Dict) -> bool:
+        """Converte le chiavi rimosse nel file caricato (True se qualcosa è cambiato)"""
+        performance = loaded.get('performance')
+        if not isinstance(performance, dict) or 'temporal_buffer_size' not in performance:
+            return False
+        
+        # Buffer delle ultime N mask sostituito dal filtro temporale: il vecchio smoothing
+        # interveniva solo da 3 mask in su, fondendo metà mask corrente e metà media precedente
+        buffer_size = performance.pop('temporal_buffer_size')
+        effects = loaded.setdefault('effects', {})
+        if isinstance(effects, dict) and 'temporal_strength' not in effects:
+            strength = 0.5 if isinstance(buffer_size, int) and buffer_size >= 3 else 0.0
+            effects['temporal_strength'] = strength
+            print(f"🔄 Config: performance.temporal_buffer_size={buffer_size} → effects.temporal_strength={strength}")
+        return True
+    
     def _merge_configs(self, default: Dict, loaded: Dict) -> Dict:
         """Merge configurazioni mantenendo nuove opzioni"""
         result = default.copy()
@@ -4,9 +4,10 @@
 
 import time
 import psutil
+import tracemalloc
 from threading import Lock
 from collections import deque
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 class PerformanceMonitor:
     """Monitor performance per StreamBlur Pro"""
@@ -24,12 +25,22 @@ class PerformanceMonitor:
         # Metriche processing time
         self.processing_times = deque(maxlen=history_size)
         self.current_processing_time = 0.0
+        self.processing_samples = 0  # Totale campioni registrati (anche oltre la history)
+        
+        # Tempi per stadio della pipeline (es. 'inference', 'refinement')
+        self.stage_times: Dict[str, deque] = {}
         
         # Metriche sistema
         self.cpu_usage = 0.0
+        self.process_cpu_usage = 0.0  # Solo StreamBlur, normalizzato sui core (0-100)
         self.memory_usage = 0.0
         self.gpu_usage = 0.0  # Se disponibile
         
+        self._process = psutil.Process()
+        
+        # Picco di memoria temporanea per stadio (bytes), solo con allocation check attivo
+        self.allocation_peaks: Dict[str, deque] = {}
+        
         # Stati
         self.is_monitoring = False
         
@@ -65,17 +76,92 @@ class PerformanceMonitor:
         with self.lock:
             self.current_processing_time = processing_time
             self.processing_times.append(processing_time)
+            self.processing_samples += 1
+    
+    def get_processing_percentile(self, percentile: float, last_n: Optional[int] = None) -> float:
+        """Percentile del tempo di processing (ms) sugli ultimi last_n campioni"""
+        with self.lock:
+            times = list(self.processing_times)
+        if last_n is not None:
+            times = times[-last_n:] if last_n > 0 else []
+        if not times:
+            return 0.0
+        
+        times.sort()
+        index = min(len(times) - 1, int(round(percentile / 100.0 * (len(times) - 1))))
+        return times[index] * 1000
+    
+    def record_stage_time(self, stage: str, stage_time: float):
+        """Registra tempo di uno stadio della pipeline"""
+        with self.lock:
+            if stage not in self.stage_times:
+                self.stage_times[stage] = deque(maxlen=self.history_size)
+            self.stage_times[stage].append(stage_time)
+    
+    def get_stage_stats(self) -> Dict:
+        """Tempi medi e massimi per stadio (ms)"""
+        with self.lock:
+            return {
+                stage: {
+                    'average_ms': sum(times) / len(times) * 1000,
+                    'max_ms': max(times) * 1000,
+                    'samples': len(times)
+                }
+                for stage, times in self.stage_times.items() if times
+            }
+    
+    def enable_allocation_tracking(self):
+        """Attiva tracemalloc (costoso: solo per la verifica allocazioni)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def start_allocation_window(self) -> int:
+        """Inizio finestra di misura: azzera il picco e restituisce la memoria tracciata corrente"""
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+    
+    def end_allocation_window(self, stage: str, start_bytes: int) -> int:
+        """Fine finestra: picco di memoria temporanea (bytes) allocata nello stadio
+        
+        tracemalloc è globale: con inferenza asincrona conta anche le allocazioni di altri thread.
+        """
+        transient = max(0, tracemalloc.get_traced_memory()[1] - start_bytes)
+        with self.lock:
+            if stage not in self.allocation_peaks:
+                self.allocation_peaks[stage] = deque(maxlen=self.history_size)
+            self.allocation_peaks[stage].append((time.time(), transient))
+        return transient
+    
+    def get_allocation_stats(self) -> Dict:
+        """Picco medio e massimo di memoria temporanea per stadio (KB/frame) e tasso (MB/s)"""
+        stats = {}
+        with self.lock:
+            for stage, samples in self.allocation_peaks.items():
+                if not samples:
+                    continue
+                peaks = [transient for _, transient in samples]
+                elapsed = samples[-1][0] - samples[0][0]
+                stats[stage] = {
+                    'average_kb': sum(peaks) / len(peaks) / 1024,
+                    'max_kb': max(peaks) / 1024,
+                    # Frame misurati nella finestra di history: il primo apre l'intervallo
+                    'mb_per_second': sum(peaks[1:]) / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+                }
+        return stats
     
     def update_system_metrics(self):
         """Aggiorna metriche sistema"""
         try:
             self.cpu_usage = psutil.cpu_percent(interval=None)
+            self.process_cpu_usage = self._process.cpu_percent(interval=None) / (psutil.cpu_count() or 1)
             self.memory_usage = psutil.virtual_memory().percent
         except Exception as e:
             print(f"⚠️ Errore metriche sistema: {e}")
     
     def get_stats(self) -> Dict:
         """Ottieni statistiche complete"""
+        stage_stats = self.get_stage_stats()
+        
         with self.lock:
             avg_fps = sum(self.fps_history) / len(self.fps_history) if self.fps_history else 0
             avg_processing = sum(self.processing_times) / len(self.processing_times) if self.processing_times else 0
@@ -95,9 +181,11 @@ class PerformanceMonitor:
                 },
                 'system': {
                     'cpu_percent': self.cpu_usage,
+                    'process_cpu_percent': self.process_cpu_usage,
                     'memory_percent': self.memory_usage,
                     'gpu_percent': self.gpu_usage
-                }
+                },
+                'stages': stage_stats
             }
     
     def get_performance_grade(self) -> str:
@@ -0,0 +1,171 @@
+# =============================================================================
+# File 26: src/utils/thread_budget.py
+# =============================================================================
+
+import os
+import threading
+import cv2
+from typing import Optional, Dict, List, Any
+
+from .config import StreamBlurConfig
+
+# Stadi della pipeline che possono avere un set di core dedicato
+THREAD_STAGES = ('capture', 'inference', 'compositing', 'output', 'api')
+
+
+class ThreadBudgetManager:
+    """Budget di thread CPU per l'intera pipeline (sezione 'threads' della config)
+
+    - opencv_threads: thread del pool interno di OpenCV (0 = default, o il set
+      'compositing' se l'affinity è attiva)
+    - inference_threads: thread del backend AI (0 = default del backend). In-process vale
+      solo per opencv_dnn, che usa il pool di OpenCV (condiviso con il compositing); per
+      MediaPipe solo in inference_mode 'subprocess', dove il figlio ha pool e core propri
+    - pin_threads: solo Linux, ogni stadio si fissa al proprio set di core con
+      os.sched_setaffinity; core_sets vuoto = suddivisione automatica dei core disponibili
+    Tutto ciò che viene applicato (o rifiutato) è pubblicato in get_stats().
+    """
+
+    def __init__(self, config: Optional[StreamBlurConfig] = None):
+        self.available_cores: List[int] = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+            else list(range(os.cpu_count() or 1))
+        self.affinity_supported = hasattr(os, 'sched_setaffinity')
+
+        opencv_threads = config.get('threads.opencv_threads', 0) if config else 0
+        self.opencv_threads = opencv_threads if isinstance(opencv_threads, int) and opencv_threads >= 0 else 0
+
+        inference_threads = config.get('threads.inference_threads', 0) if config else 0
+        self.inference_threads = inference_threads if isinstance(inference_threads, int) and inference_threads >= 0 else 0
+
+        pin_threads = config.get('threads.pin_threads', False) if config else False
+        self.pin_threads = pin_threads if isinstance(pin_threads, bool) else False
+
+        core_sets = config.get('threads.core_sets', {}) if config else {}
+        self.core_sets = self._resolve_core_sets(core_sets if isinstance(core_sets, dict) else {})
+
+        # Cosa è stato applicato
+        self.lock = threading.Lock()
+        self.applied: Dict[str, Any] = {}
+        self.pinned: Dict[str, Dict[str, Any]] = {}
+        self.inference: Dict[str, Any] = {}
+        self.errors: List[str] = []
+
+    def _resolve_core_sets(self, requested: Dict[str, Any]) -> Dict[str, List[int]]:
+        """Set di core per stadio: quelli configurati (filtrati sui core disponibili) o automatici"""
+        available = set(self.available_cores)
+        core_sets = {}
+        for stage, cores in requested.items():
+            if stage in THREAD_STAGES and isinstance(cores, list):
+                valid = sorted(core for core in cores if isinstance(core, int) and core in available)
+                if valid:
+                    core_sets[stage] = valid
+        return core_sets or self.auto_core_sets(self.available_cores)
+
+    @staticmethod
+    def auto_core_sets(cores: List[int], compositing_share: float = 0.25) -> Dict[str, List[int]]:
+        """Suddivisione automatica: 1 core cattura, 1 output, una quota al compositing, il resto all'AI
+
+        Sotto i 4 core non si separa nulla: il pinning costerebbe più di quanto fa risparmiare.
+        """
+        if len(cores) < 4:
+            return {}
+        compositing = max(1, int(len(cores) * compositing_share))
+        return {
+            'capture': cores[:1],
+            'output': cores[1:2],
+            'compositing': cores[2:2 + compositing],
+            'inference': cores[2 + compositing:],
+        }
+
+    def apply(self) -> Dict[str, Any]:
+        """Applica il budget process-wide (pool OpenCV); chiamare prima di avviare gli stadi"""
+        threads = self.opencv_threads
+        if threads == 0 and self.pin_threads and self.core_sets.get('compositing'):
+            threads = len(self.core_sets['compositing'])
+
+        if threads > 0:
+            cv2.setNumThreads(threads)
+
+        with self.lock:
+            self.applied = {
+                'opencv_threads': cv2.getNumThreads(),
+                'opencv_requested': self.opencv_threads or 'default',
+                'available_cores': len(self.available_cores),
+                'pin_threads': self.pin_threads and self.affinity_supported,
+            }
+            if self.pin_threads and not self.affinity_supported:
+                self.errors.append('sched_setaffinity non disponibile su questa piattaforma')
+            return dict(self.applied)
+
+    def apply_inference(self, backend) -> bool:
+        """Imposta i thread del backend AI; False se il backend non espone il parametro"""
+        if self.inference_threads == 0:
+            return False
+
+        applied = backend.set_num_threads(self.inference_threads)
+        with self.lock:
+            self.inference = {'backend': backend.name, 'threads': self.inference_threads, 'applied': applied}
+            if backend.name == 'opencv_dnn':
+                # Stesso pool del compositing: lo stato pubblicato riflette il valore effettivo
+                self.inference['shared_opencv_pool'] = True
+                if self.applied:
+                    self.applied['opencv_threads'] = cv2.getNumThreads()
+            elif not applied:
+                self.errors.append(f"inference_threads non applicabile in-process a '{backend.name}' "
+                                   f"(usare inference_mode 'subprocess')")
+        return applied
+
+    def pin_current_thread(self, stage: str) -> bool:
+        """Fissa il thread chiamante al set di core dello stadio (Linux: pid 0 = thread corrente)"""
+        cores = self.core_sets.get(stage)
+        if not self.pin_threads or not self.affinity_supported or not cores:
+            return False
+
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            with self.lock:
+                self.errors.append(f"{stage}: {e}")
+            return False
+
+        with self.lock:
+            self.pinned[stage] = {'thread': threading.current_thread().name, 'cores': cores}
+        return True
+
+    def configure_process(self, stage: str = 'inference'):
+        """Budget per un processo figlio dedicato a uno stadio: pool OpenCV e core dello stadio"""
+        threads = self.inference_threads or len(self.core_sets.get(stage, []))
+        if threads > 0:
+            cv2.setNumThreads(threads)
+        self.pin_current_thread(stage)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ottieni budget applicato: thread OpenCV, thread inferenza, pinning per stadio"""
+        with self.lock:
+            return {
+                'applied': dict(self.applied),
+                'inference': dict(self.inference),
+                'core_sets': dict(self.core_sets) if self.pin_threads else {},
+                'pinned': dict(self.pinned),
+                'errors': list(self.errors[-10:])
+            }
+
+
+# Budget unico per processo: il pool OpenCV e l'affinity sono globali
+_thread_budget: Optional[ThreadBudgetManager] = None
+
+
+def configure_thread_budget(config: StreamBlurConfig) -> ThreadBudgetManager:
+    """Crea e applica il budget dalla config (all'avvio della pipeline)"""
+    global _thread_budget
+    _thread_budget = ThreadBudgetManager(config)
+    _thread_budget.apply()
+    return _thread_budget
+
+
+def get_thread_budget() -> ThreadBudgetManager:
+    """Budget corrente; senza configurazione è un budget vuoto che non applica nulla"""
+    global _thread_budget
+    if _thread_budget is None:
+        _thread_budget = ThreadBudgetManager()
+    return _thread_budget
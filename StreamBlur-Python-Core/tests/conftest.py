@@ -0,0 +1,31 @@
+# =============================================================================
+# File 36: tests/conftest.py
+# =============================================================================
+
+import cv2
+import numpy as np
+import pytest
+
+from src.utils.config import StreamBlurConfig
+from src.core.model_pool import synthetic_frame
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Config di default in una home temporanea (nessuna scrittura in ~/.streamblur_pro)"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    return StreamBlurConfig()
+
+
+@pytest.fixture
+def frame():
+    return synthetic_frame(640, 360)
+
+
+@pytest.fixture
+def person_mask():
+    """Mask uint8 con bordo morbido, come una mask reale dopo l'upsample"""
+    mask = np.zeros((360, 640), dtype=np.uint8)
+    cv2.ellipse(mask, (320, 240), (110, 180), 0, 0, 360, 255, -1)
+    return cv2.GaussianBlur(mask, (0, 0), 3)
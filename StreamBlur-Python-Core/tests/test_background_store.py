@@ -0,0 +1,95 @@
+# =============================================================================
+# File 40: tests/test_background_store.py
+# =============================================================================
+
+import os
+import time
+import cv2
+import numpy as np
+
+from src.core.background_store import BackgroundStore
+
+
+def _write_image(path, color, size=(400, 300)):
+    image = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    image[:] = color
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def test_cover_crop_and_disk_cache(tmp_path):
+    path = _write_image(tmp_path / 'background.png', (10, 20, 30))
+    store = BackgroundStore(tmp_path / 'cache')
+    assert store.select(path, [(640, 360)])
+
+    background = store.get((640, 360))
+    assert background.shape == (360, 640, 3) and tuple(background[0, 0]) == (10, 20, 30)
+    assert isinstance(background, np.memmap)
+
+    # Riavvio: nessuna decodifica, sfondo letto dal .npy
+    restarted = BackgroundStore(tmp_path / 'cache')
+    assert restarted.select(path, [(640, 360)])
+    assert restarted.get_stats()['decodes'] == 0 and restarted.get_stats()['disk_hits'] == 1
+
+
+def test_modified_image_invalidates_the_cache(tmp_path):
+    path = _write_image(tmp_path / 'background.png', (10, 20, 30))
+    BackgroundStore(tmp_path / 'cache').select(path, [(320, 180)])
+
+    _write_image(path, (200, 100, 50))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    store = BackgroundStore(tmp_path / 'cache')
+    assert store.select(path, [(320, 180)])
+    assert store.get_stats()['decodes'] == 1
+    assert tuple(store.get((320, 180))[0, 0]) == (200, 100, 50)
+
+
+def test_switching_prepared_backgrounds_does_not_decode(tmp_path):
+    first = _write_image(tmp_path / 'first.png', (0, 0, 255))
+    second = _write_image(tmp_path / 'second.png', (255, 0, 0))
+    store = BackgroundStore(tmp_path / 'cache')
+    store.select(first, [(320, 180)])
+    store.select(second, [(320, 180)])
+
+    for path, color in ((first, (0, 0, 255)), (second, (255, 0, 0))) * 2:
+        store.select(path, [(320, 180)])
+        assert tuple(store.get((320, 180))[0, 0]) == color
+    assert store.get_stats()['decodes'] == 2 and store.get_stats()['frame_path_misses'] == 0
+
+
+def test_unreadable_image_is_rejected(tmp_path):
+    path = tmp_path / 'broken.png'
+    path.write_bytes(b'not an image')
+    store = BackgroundStore(tmp_path / 'cache')
+    assert not store.select(str(path), [(320, 180)])
+    assert store.get((320, 180)) is None
+
+
+def test_unprepared_resolution_is_prepared_off_thread(tmp_path):
+    path = _write_image(tmp_path / 'background.png', (10, 20, 30))
+    store = BackgroundStore(tmp_path / 'cache')
+    assert store.select(path)
+
+    # Il frame loop non decodifica: None finché il thread in background non ha finito
+    assert store.get((320, 180)) is None
+    deadline = time.time() + 10.0
+    while store.get_stats()['pending'] and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert tuple(store.get((320, 180))[0, 0]) == (10, 20, 30)
+    assert store.get_stats()['frame_path_misses'] == 1
+
+
+def test_disk_cache_is_capped(tmp_path):
+    # Limite per circa due sfondi 320x180 (170 KB ciascuno)
+    store = BackgroundStore(tmp_path / 'cache', max_cache_mb=0.4)
+    paths = [_write_image(tmp_path / f'background_{index}.png', (index, 0, 0)) for index in range(4)]
+    for path in paths:
+        assert store.select(path, [(320, 180)])
+
+    cached = list((tmp_path / 'cache').glob('*.npy'))
+    assert len(cached) == 2 and store.get_stats()['evictions'] == 2
+    # L'immagine attiva resta pronta
+    assert tuple(store.get((320, 180))[0, 0]) == (3, 0, 0)
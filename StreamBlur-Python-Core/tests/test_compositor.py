@@ -0,0 +1,65 @@
+# =============================================================================
+# File 37: tests/test_compositor.py
+# =============================================================================
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.compositor import AlphaCompositor
+
+
+def _float_composite(frame, background, mask, feather):
+    kernel, sigma = feather
+    alpha = cv2.GaussianBlur(mask, (kernel, kernel), sigma).astype(np.float32)[..., None] / 255.0
+    return (frame * alpha + background * (1.0 - alpha)).round().astype(np.uint8)
+
+
+@pytest.mark.parametrize('feather', [(5, 1.5), (3, 1)])
+def test_fixed_point_matches_float_blend(frame, person_mask, feather):
+    background = cv2.GaussianBlur(frame, (31, 31), 0)
+    output = AlphaCompositor(sparse=False).composite(frame, background, person_mask, feather)
+    assert cv2.absdiff(output, _float_composite(frame, background, person_mask, feather)).max() <= 2
+
+
+@pytest.mark.parametrize('mask_kind', ['person', 'empty', 'full', 'hard_edge'])
+def test_sparse_equals_dense(frame, person_mask, mask_kind):
+    background = cv2.GaussianBlur(frame, (31, 31), 0)
+    mask = {
+        'person': person_mask,
+        'empty': np.zeros_like(person_mask),
+        'full': np.full_like(person_mask, 255),
+        'hard_edge': (person_mask > 127).astype(np.uint8) * 255,
+    }[mask_kind]
+
+    dense = AlphaCompositor(sparse=False).composite(frame, background, mask, (5, 1.5))
+    # max_band_fraction=1: il percorso sparso non ricade mai su quello denso
+    sparse = AlphaCompositor(sparse=True, tile_size=32, max_band_fraction=1.0)
+    assert np.array_equal(sparse.composite(frame, background, mask, (5, 1.5)), dense)
+
+
+@pytest.mark.parametrize('sparse', [True, False])
+def test_rows_write_only_the_requested_view(frame, person_mask, sparse):
+    background = cv2.GaussianBlur(frame, (31, 31), 0)
+    expected = AlphaCompositor(sparse=False).composite(frame, background, person_mask, (5, 1.5))
+
+    # Finestra con alone di 8 righe, solo le righe interne scritte nella vista
+    y0, y1, halo = 100, 260, 8
+    output = np.zeros_like(frame)
+    AlphaCompositor(sparse=sparse, max_band_fraction=1.0).composite(
+        frame[y0 - halo:y1 + halo], background[y0 - halo:y1 + halo], person_mask[y0 - halo:y1 + halo],
+        (5, 1.5), out=output[y0:y1], rows=slice(halo, halo + y1 - y0))
+
+    assert np.array_equal(output[y0:y1], expected[y0:y1])
+    assert not output[:y0].any() and not output[y1:].any()
+
+
+def test_output_ring_keeps_previous_frames(frame, person_mask):
+    compositor = AlphaCompositor()
+    background = cv2.GaussianBlur(frame, (31, 31), 0)
+    first = compositor.composite(frame, background, person_mask, (5, 1.5))
+    snapshot = first.copy()
+    # Il frame composto resta valido mentre si calcolano i due successivi (ring di 3)
+    compositor.composite(background, frame, person_mask, (5, 1.5))
+    compositor.composite(background, frame, 255 - person_mask, (5, 1.5))
+    assert np.array_equal(first, snapshot)
@@ -0,0 +1,40 @@
+# =============================================================================
+# File 43: tests/test_config.py
+# =============================================================================
+
+import json
+
+import pytest
+
+from src.utils.config import StreamBlurConfig
+
+
+def _write_config(home, content):
+    config_dir = home / '.streamblur_pro'
+    config_dir.mkdir()
+    (config_dir / 'config.json').write_text(json.dumps(content))
+    return config_dir / 'config.json'
+
+
+@pytest.mark.parametrize('buffer_size, strength', [(2, 0.0), (3, 0.5), (5, 0.5)])
+def test_temporal_buffer_size_is_migrated(tmp_path, monkeypatch, buffer_size, strength):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    config_file = _write_config(tmp_path, {'performance': {'temporal_buffer_size': buffer_size}})
+
+    config = StreamBlurConfig()
+    assert config.get('effects.temporal_strength') == strength
+    assert config.get('performance.temporal_buffer_size') is None
+
+    # Salvata una volta: al riavvio non si migra di nuovo
+    saved = json.loads(config_file.read_text())
+    assert 'temporal_buffer_size' not in saved['performance']
+    assert saved['effects']['temporal_strength'] == strength
+
+
+def test_explicit_temporal_strength_is_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    _write_config(tmp_path, {'performance': {'temporal_buffer_size': 2}, 'effects': {'temporal_strength': 0.7}})
+
+    assert StreamBlurConfig().get('effects.temporal_strength') == 0.7
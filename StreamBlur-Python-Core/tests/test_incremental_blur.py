@@ -0,0 +1,64 @@
+# =============================================================================
+# File 39: tests/test_incremental_blur.py
+# =============================================================================
+
+import cv2
+import numpy as np
+
+from src.core.effects import EffectsProcessor
+
+
+def _moving_clip(frame, count):
+    """Sfondo fisso con un rettangolo che si sposta di pochi pixel per frame"""
+    for index in range(count):
+        moving = frame.copy()
+        x = 100 + 6 * index
+        cv2.rectangle(moving, (x, 120), (x + 80, 300), (40, 200, 90), -1)
+        yield moving
+
+
+def _processors(config):
+    # Con la piramide l'incrementale è disattivato
+    config.config['blur']['algorithm'] = 'optimized'
+    full = EffectsProcessor(config)
+    config.config['effects']['incremental_blur'] = True
+    return full, EffectsProcessor(config)
+
+
+def test_static_scene_reuses_the_cache(config, frame):
+    full, incremental = _processors(config)
+    expected = full.blur_background(frame)
+    for _ in range(5):
+        assert np.array_equal(incremental.blur_background(frame), expected)
+
+    stats = incremental.incremental_blur.get_stats()
+    assert stats['full_refreshes'] == 1 and stats['partial_frames'] == 4 and stats['regions'] == 0
+
+
+def test_moving_object_matches_full_blur(config, frame):
+    full, incremental = _processors(config)
+    for moving in _moving_clip(frame, 12):
+        expected = full.blur_background(moving).copy()
+        assert cv2.absdiff(incremental.blur_background(moving), expected).max() <= 1
+
+    stats = incremental.incremental_blur.get_stats()
+    assert stats['partial_frames'] > 0 and stats['dirty_ratio'] < 0.5
+
+
+def test_intensity_change_forces_refresh(config, frame):
+    full, incremental = _processors(config)
+    incremental.blur_background(frame)
+
+    full.set_blur_intensity(5)
+    incremental.set_blur_intensity(5)
+    assert np.array_equal(incremental.blur_background(frame), full.blur_background(frame))
+    assert incremental.incremental_blur.get_stats()['full_refreshes'] == 2
+
+
+def test_pyramid_bypasses_incremental(config, frame):
+    config.config['blur']['algorithm'] = 'pyramid'
+    config.config['effects']['incremental_blur'] = True
+    effects = EffectsProcessor(config)
+    effects.blur_background(frame)
+    assert effects.incremental_blur.background is None
+    assert effects.get_stats()['incremental_blur'] is None
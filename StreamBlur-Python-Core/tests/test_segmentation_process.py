@@ -0,0 +1,58 @@
+# =============================================================================
+# File 41: tests/test_segmentation_process.py
+# =============================================================================
+
+import numpy as np
+import pytest
+
+from src.core.segmentation_process import SharedMemorySegmenter
+
+
+@pytest.fixture
+def segmenter(config):
+    # Backend a soglia fissa: frame bianco -> mask 1, frame nero -> mask 0
+    config.config['ai']['threshold_level'] = 128
+    segmenter = SharedMemorySegmenter(config, 'threshold', 1600, 1600, ring_size=2, timeout=10.0)
+    if not segmenter.initialize(0):
+        pytest.skip('processo figlio non avviabile')
+    yield segmenter
+    segmenter.close()
+
+
+def _frames(size):
+    white = np.full((size[1], size[0], 3), 255, dtype=np.uint8)
+    return white, np.zeros_like(white)
+
+
+def test_masks_follow_their_frames(segmenter):
+    white, black = _frames((1600, 1600))
+    assert segmenter.process(white).min() == 1.0
+    assert segmenter.process(black).max() == 0.0
+
+
+def test_late_reply_after_timeout_is_discarded(segmenter):
+    white, black = _frames((1600, 1600))
+
+    # Timeout più breve dell'inferenza: la mask del frame bianco arriva dopo
+    segmenter.timeout = 1e-6
+    assert segmenter.process(white) is None
+
+    # La chiamata successiva restituisce la mask del proprio frame, non quella tardiva
+    segmenter.timeout = 10.0
+    assert segmenter.process(black).max() == 0.0
+    assert segmenter.process(white).min() == 1.0
+
+    stats = segmenter.get_stats()
+    assert stats['timeouts'] == 1 and stats['stale_replies'] == 1
+
+
+def test_resize_after_timeout_recovers(segmenter):
+    white, _ = _frames((1600, 1600))
+    segmenter.timeout = 1e-6
+    assert segmenter.process(white) is None
+
+    # Il 'ready' del nuovo ring arriva dopo la mask tardiva, che va scartata
+    segmenter.timeout = 10.0
+    small_white, small_black = _frames((320, 240))
+    assert segmenter.process(small_black).shape == (240, 320)
+    assert segmenter.process(small_white).min() == 1.0
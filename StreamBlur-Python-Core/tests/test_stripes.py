@@ -0,0 +1,53 @@
+# =============================================================================
+# File 38: tests/test_stripes.py
+# =============================================================================
+
+import numpy as np
+import pytest
+
+from src.core.effects import EffectsProcessor
+from src.core.stripe_executor import StripeExecutor
+
+
+@pytest.mark.parametrize('height, overlap, align', [(360, 3, 1), (720, 21, 8), (361, 0, 4)])
+def test_bounds_cover_every_row_once(height, overlap, align):
+    stripes = StripeExecutor(4).bounds(height, overlap, align)
+
+    assert stripes[0][0] == 0 and stripes[-1][1] == height
+    for (_, previous_end, _, _), (start, _, _, _) in zip(stripes, stripes[1:]):
+        assert start == previous_end and start % align == 0
+    for y0, y1, a, b in stripes:
+        assert a <= y0 < y1 <= b and y0 - a >= min(y0, overlap) and b - y1 >= min(height - y1, overlap)
+
+
+def test_run_propagates_stripe_errors():
+    executor = StripeExecutor(3)
+
+    def failing(index, y0, y1, a, b):
+        if index == 0:
+            raise ValueError('striscia')
+
+    try:
+        with pytest.raises(ValueError):
+            executor.run('test', failing, 90, 0)
+    finally:
+        executor.close()
+
+
+@pytest.mark.parametrize('algorithm', ['pyramid', 'optimized', 'quality'])
+@pytest.mark.parametrize('sparse', [True, False])
+def test_striped_equals_full_frame(config, frame, person_mask, algorithm, sparse):
+    config.config['blur']['algorithm'] = algorithm
+    config.config['effects']['sparse_compositing'] = sparse
+    expected = EffectsProcessor(config).apply_background_blur(frame, person_mask).copy()
+
+    for stripes in (2, 3):
+        config.config['effects']['parallel_stripes'] = stripes
+        effects = EffectsProcessor(config)
+        try:
+            assert np.array_equal(effects.apply_background_blur(frame, person_mask), expected)
+            # Sfondo a strisce (cache incrementale / idle) uguale al blur a frame intero
+            assert np.array_equal(effects._striped_background(frame).copy(), effects._region_background(
+                frame, (frame.shape[1], frame.shape[0]), effects.region_pyramid))
+        finally:
+            effects.cleanup()
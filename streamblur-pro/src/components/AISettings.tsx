@@ -37,7 +37,8 @@ function QualitySelect({ quality, setQuality, label, disabled = false }: Quality
   const qualities = [
     { value: 'low', label: 'Low (Fast)', description: 'Performance mode - più veloce' },
     { value: 'medium', label: 'Medium', description: 'Bilanciato' },
-    { value: 'high', label: 'High (Accurate)', description: 'Accuracy mode - più preciso' }
+    { value: 'high', label: 'High (Accurate)', description: 'Accuracy mode - più preciso' },
+    { value: 'auto', label: 'Auto', description: 'Adattiva - segue il budget del frame e il carico CPU' }
   ];
 
   return (